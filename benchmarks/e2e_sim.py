@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Runs the wallet flows end to end against chia's in-process chain simulator, without a wallet or a network.
+
+    coin:    create-coin -> spend-coin
+    auction: create-auction -> bid -> outbid -> two bids racing for the same auction coin
+
+The operations run unchanged; the wallet RPC is replaced by stubs backed by deterministic keys and the
+simulator's coin set, and the full node RPC by the simulator client, which only fails pushes of FAILED bundles
+like the RPC does. Blocks are farmed between the steps, so every step sees its inputs confirmed. For every flow
+the harness reports the flows per second, the latency of every step and the cost and size of the spend bundles
+each step pushed. Costs are deterministic; with a fixed number of iterations the results only vary by the speed
+of the machine.
+
+In the race, a rival bids from its own wallet while the last bid is still in the mempool. The unsigned auction
+spends are deduplicated rather than conflicting, so both bids are accepted; the rival's bid engine sees the other
+bid in the mempool, waits for the block and rebuilds its bid on the auction coin the winning bid created.
+
+Run it from the repository root, where the puzzles are:
+
+    python -m benchmarks.e2e_sim -n 20 --history .chiwo/e2e-history.jsonl
+
+The auction is not claimed: the claim in 5-auction.clsp melts the singleton and pays the creator an odd amount,
+which the singleton top layer rejects as a second odd output, so no claim spend of a workshop auction is valid.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
+
+from workshop import fees, operations
+from workshop.auction_index import AuctionIndex
+from workshop.bid import AUCTION_PUZZLE, BidEngine
+from workshop.fees import coin_spends_cost
+from workshop.signing import WalletKeys, sign_spends
+from workshop.utils import load_program_hash
+
+if TYPE_CHECKING:
+    from chia.clvm.spend_sim import SimClient, SpendSim
+    from chia.types.blockchain_format.sized_bytes import bytes32
+    from chia.types.spend_bundle import SpendBundle
+    from chia_rs import Coin
+
+# The stub wallets' keys, so every run creates the same coins and spend bundles
+SEED = bytes([7] * 32)
+RIVAL_SEED = bytes([8] * 32)
+PREFARM_BLOCKS = 10
+COIN_AMOUNT = 1000
+# Every auction gets a bid and is then outbid, so the second bid syncs the index from the first one
+BID_AMOUNTS = (4, 6)
+# Then two bids of the same amount race for the next auction coin, and the loser raises its bid to win after all
+RACE_AMOUNT = 8
+AUCTION_BLOCKS = 100
+POLL_INTERVAL = 0.01
+
+
+class Recorder:
+    """Step latencies, and the cost and size of every spend bundle pushed while a step runs."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, List[float]] = defaultdict(list)
+        self.costs: Dict[str, List[int]] = defaultdict(list)
+        self.sizes: Dict[str, List[int]] = defaultdict(list)
+        self.current = "setup"
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name].append(time.perf_counter() - start)
+            self.current = "setup"
+
+    def pushed(self, spend_bundle: SpendBundle) -> None:
+        self.costs[self.current].append(coin_spends_cost(spend_bundle.coin_spends))
+        self.sizes[self.current].append(len(bytes(spend_bundle)))
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        steps = {}
+        for name, seconds in self.seconds.items():
+            steps[name] = {
+                "mean_ms": statistics.mean(seconds) * 1000,
+                "median_ms": statistics.median(seconds) * 1000,
+                "max_ms": max(seconds) * 1000,
+                "bundles": len(self.costs[name]),
+                "mean_cost": statistics.mean(self.costs[name]) if self.costs[name] else 0,
+                "mean_bytes": statistics.mean(self.sizes[name]) if self.sizes[name] else 0,
+            }
+        return steps
+
+
+async def push(client: SimClient, recorder: Recorder, spend_bundle: SpendBundle) -> Dict[str, Any]:
+    # Fails like the full node RPC, which only raises for FAILED: a bundle conflicting with one in the mempool comes
+    # back PENDING, so the bid engine sees a lost race the way it would on a real node
+    from chia.types.mempool_inclusion_status import MempoolInclusionStatus
+
+    recorder.pushed(spend_bundle)
+    status, error = await client.push_tx(spend_bundle)
+    if status == MempoolInclusionStatus.FAILED:
+        raise ValueError(f"Failed to include transaction {spend_bundle.name()}, error {error and error.name}")
+    return {"status": status.name, "success": True}
+
+
+class LockedClient:
+    """
+    The simulator client, with every call waiting while a block is farmed: the simulator's database can't be read
+    while farm_block writes it, which only matters when a bid runs concurrently with farming.
+    """
+
+    def __init__(self, client: SimClient, lock: asyncio.Lock):
+        self.client = client
+        self.lock = lock
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.client, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            async with self.lock:
+                return await method(*args, **kwargs)
+
+        return call
+
+
+class SimFullNode:
+    """FullNodeRpcClient on top of the simulator client."""
+
+    def __init__(self, client: SimClient, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+
+    async def push_tx(self, spend_bundle: SpendBundle) -> Dict[str, Any]:
+        return await push(self.client, self.recorder, spend_bundle)
+
+    async def get_mempool_items_by_coin_name(self, coin_name: bytes32) -> Dict[str, Any]:
+        items = await self.client.get_all_mempool_items()
+        return {
+            "mempool_items": [
+                item.to_json_dict()
+                for item in items.values()
+                if any(coin.name() == coin_name for coin in item.removals)
+            ],
+            "success": True,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+@dataclass
+class StubTransaction:
+    spend_bundle: SpendBundle
+
+    @property
+    def additions(self) -> List[Coin]:
+        return self.spend_bundle.additions()
+
+    @property
+    def removals(self) -> List[Coin]:
+        return self.spend_bundle.removals()
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "additions": [coin.to_json_dict() for coin in self.additions],
+            "removals": [coin.to_json_dict() for coin in self.removals],
+        }
+
+
+class StubWallet:
+    """
+    The part of WalletRpcClient the operations use. All coins are locked by one p2_delegated_conditions puzzle,
+    and coins handed out by `select_coins` or spent by a transaction are never selected again.
+    """
+
+    def __init__(self, client: SimClient, recorder: Recorder, seed: bytes = SEED):
+        from blspy import AugSchemeMPL
+        from chia.wallet.puzzles.p2_delegated_conditions import puzzle_for_pk
+
+        self.client = client
+        self.recorder = recorder
+        secret_key = AugSchemeMPL.key_gen(seed)
+        public_key = secret_key.get_g1()
+        self.keys = WalletKeys(public_key.get_fingerprint(), public_key, secret_key)
+        self.puzzle = puzzle_for_pk(bytes(public_key))
+        self.puzzle_hash = self.puzzle.get_tree_hash()
+        self.reserved: Set[bytes] = set()
+
+    async def get_public_keys(self) -> List[int]:
+        return [self.keys.fingerprint]
+
+    async def get_private_key(self, fingerprint: int) -> Dict[str, Any]:
+        return {
+            "fingerprint": fingerprint,
+            "pk": bytes(self.keys.public_key).hex(),
+            "sk": bytes(self.keys.secret_key).hex(),
+        }
+
+    async def get_next_address(self, wallet_id: int, new_address: bool) -> str:
+        from chia.util.bech32m import encode_puzzle_hash
+
+        from workshop.config import get_address_prefix
+
+        return encode_puzzle_hash(self.puzzle_hash, get_address_prefix())
+
+    async def select_coins(self, amount: int, wallet_id: int, coin_selection_config: Any = None) -> List[Coin]:
+        records = await self.client.get_coin_records_by_puzzle_hash(self.puzzle_hash, include_spent_coins=False)
+        selected: List[Coin] = []
+        for record in sorted(records, key=lambda record: (-record.coin.amount, record.coin.name())):
+            if record.coin.name() in self.reserved:
+                continue
+            selected.append(record.coin)
+            if sum(coin.amount for coin in selected) >= amount:
+                self.reserved.update(coin.name() for coin in selected)
+                return selected
+        raise ValueError(f"Not enough unreserved coins for {amount} mojos")
+
+    async def create_signed_transaction(
+        self,
+        additions: List[Dict[str, Any]],
+        tx_config: Any = None,
+        coins: Optional[List[Coin]] = None,
+        fee: int = 0,
+        coin_announcements: Optional[List[Any]] = None,
+        **kwargs: Any,
+    ) -> StubTransaction:
+        from chia.types.blockchain_format.program import Program
+        from chia.types.coin_spend import CoinSpend
+        from chia.types.condition_opcodes import ConditionOpcode
+        from chia.wallet.puzzles.p2_delegated_conditions import solution_for_conditions
+
+        amount = sum(int(addition["amount"]) for addition in additions)
+        if coins is None:
+            coins = await self.select_coins(amount + fee, 1)
+        self.reserved.update(coin.name() for coin in coins)
+        conditions: List[List[Any]] = [
+            [ConditionOpcode.CREATE_COIN, addition["puzzle_hash"], int(addition["amount"])] for addition in additions
+        ]
+        change = sum(coin.amount for coin in coins) - amount - fee
+        if change > 0:
+            conditions.append([ConditionOpcode.CREATE_COIN, self.puzzle_hash, change])
+        if fee > 0:
+            conditions.append([ConditionOpcode.RESERVE_FEE, fee])
+        for announcement in coin_announcements or []:
+            conditions.append([ConditionOpcode.ASSERT_COIN_ANNOUNCEMENT, announcement.name()])
+        # The first coin creates all outputs, the others only add their value
+        coin_spends = [
+            CoinSpend(coin, self.puzzle, solution_for_conditions(Program.to(conditions if index == 0 else [])))
+            for index, coin in enumerate(coins)
+        ]
+        return StubTransaction(await sign_spends(coin_spends, self.keys))
+
+    async def send_transaction(
+        self, wallet_id: int, amount: int, address: str, tx_config: Any = None, fee: int = 0, **kwargs: Any
+    ) -> StubTransaction:
+        from chia.util.bech32m import decode_puzzle_hash
+
+        transaction = await self.create_signed_transaction(
+            [{"amount": amount, "puzzle_hash": decode_puzzle_hash(address)}], tx_config, fee=fee
+        )
+        await self.push_tx(transaction.spend_bundle)
+        return transaction
+
+    async def push_tx(self, spend_bundle: SpendBundle) -> Dict[str, Any]:
+        return await push(self.client, self.recorder, spend_bundle)
+
+
+def created_coin(additions: List[Dict[str, Any]], puzzle_hash: bytes) -> Coin:
+    from chia_rs import Coin
+
+    for addition in additions:
+        coin = Coin.from_json_dict(addition)
+        if coin.puzzle_hash == puzzle_hash:
+            return coin
+    raise RuntimeError(f"No coin with puzzle hash {puzzle_hash.hex()} was created")
+
+
+async def coin_flow(sim: SpendSim, wallet: StubWallet, recorder: Recorder, workdir: Path, iterations: int) -> None:
+    from chia.types.blockchain_format.program import Program
+    from chia.util.bech32m import encode_puzzle_hash
+
+    from workshop.config import get_address_prefix
+
+    # A puzzle that returns its solution as conditions, so the spend only costs what the flow itself adds
+    puzzle_file = workdir.joinpath("anyone_can_spend.hex")
+    puzzle_file.write_text(bytes(Program.to(1)).hex())
+    puzzle_hash = Program.to(1).get_tree_hash()
+    address = encode_puzzle_hash(puzzle_hash, get_address_prefix())
+    solution = f"((51 0x{wallet.puzzle_hash.hex()} {COIN_AMOUNT}))"
+
+    for _ in range(iterations):
+        with recorder.step("create_coin"):
+            additions = await operations.create_coin(wallet, address, COIN_AMOUNT)
+        with recorder.step("farm"):
+            await sim.farm_block()
+        coin = created_coin(additions, puzzle_hash)
+        with recorder.step("spend_coin"):
+            result = await operations.spend_coin(
+                wallet, coin.parent_coin_info.hex(), COIN_AMOUNT, str(puzzle_file), solution, lambda _: None
+            )
+        if result is None:
+            raise RuntimeError("spend-coin failed")
+        with recorder.step("farm"):
+            await sim.farm_block()
+
+
+async def race(sim: SpendSim, lock: asyncio.Lock, engine: BidEngine) -> Optional[Dict[str, Any]]:
+    """Bids RACE_AMOUNT against the bid in the mempool, and farms the block once both bids are in the mempool."""
+    bid = asyncio.create_task(
+        engine.bid(
+            RACE_AMOUNT, operations.no_confirm, max_amount=RACE_AMOUNT + 2, retries=1, poll_interval=POLL_INTERVAL
+        )
+    )
+    farmed = False
+    while not bid.done():
+        if not farmed and sim.mempool_manager.mempool.size() > 1:
+            # The earlier bid is first in the block, so this one has to be rebuilt
+            async with lock:
+                await sim.farm_block()
+            farmed = True
+        await asyncio.sleep(POLL_INTERVAL)
+    return bid.result()
+
+
+async def auction_flow(
+    sim: SpendSim,
+    wallet: StubWallet,
+    rival_wallet: StubWallet,
+    full_node: SimFullNode,
+    lock: asyncio.Lock,
+    recorder: Recorder,
+    workdir: Path,
+    iterations: int,
+) -> None:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    if load_program_hash(AUCTION_PUZZLE) is None:
+        raise RuntimeError(f"Couldn't build {AUCTION_PUZZLE}")
+    index = AuctionIndex(str(workdir.joinpath("auctions.sqlite")))
+    try:
+        for _ in range(iterations):
+            end_height = sim.block_height + AUCTION_BLOCKS
+            with recorder.step("create_auction"):
+                created = await operations.create_auction(wallet, end_height, lambda _: None, operations.no_confirm)
+            if created is None:
+                raise RuntimeError("create-auction failed")
+            with recorder.step("farm"):
+                await sim.farm_block()
+
+            launcher_id = bytes32.fromhex(created["launcher_id"])
+            engine = BidEngine(wallet, full_node, index, launcher_id, lambda _: None)
+            for amount in BID_AMOUNTS:
+                with recorder.step("bid"):
+                    result = await engine.bid(amount, operations.no_confirm, retries=0)
+                if result is None:
+                    raise RuntimeError("bid failed")
+                with recorder.step("farm"):
+                    await sim.farm_block()
+            with recorder.step("bid"):
+                result = await engine.bid(RACE_AMOUNT, operations.no_confirm, retries=0)
+            if result is None:
+                raise RuntimeError("bid failed")
+            # That bid is still in the mempool, so the rival bids on the same auction coin. An identical bid would
+            # be deduplicated with it instead, so the rival bids for another puzzle hash from its own wallet.
+            rival = BidEngine(rival_wallet, full_node, index, launcher_id, lambda _: None)
+            with recorder.step("rebuilt_bid"):
+                result = await race(sim, lock, rival)
+            if result is None or result["attempts"] != 2:
+                raise RuntimeError(f"The rival bid wasn't rebuilt: {result}")
+            with recorder.step("farm"):
+                await sim.farm_block()
+            state = await index.sync(full_node, launcher_id)
+            if state.highest_bid != result["amount"]:
+                raise RuntimeError(f"The last bid didn't confirm, the highest bid is {state.highest_bid}")
+    finally:
+        index.close()
+
+
+async def run_flow(flow: str, iterations: int, workdir: Path) -> Dict[str, Any]:
+    from chia.clvm.spend_sim import sim_and_client
+
+    from workshop.config import get_constants
+
+    recorder = Recorder()
+    async with sim_and_client(defaults=get_constants()) as (sim, sim_client):
+        lock = asyncio.Lock()
+        client: Any = LockedClient(sim_client, lock)
+        wallet = StubWallet(client, recorder)
+        rival_wallet = StubWallet(client, recorder, RIVAL_SEED)
+        full_node = SimFullNode(client, recorder)
+        for _ in range(PREFARM_BLOCKS):
+            await sim.farm_block(wallet.puzzle_hash)
+        if flow == "auction":
+            for _ in range(PREFARM_BLOCKS):
+                await sim.farm_block(rival_wallet.puzzle_hash)
+
+        start = time.perf_counter()
+        if flow == "coin":
+            await coin_flow(sim, wallet, recorder, workdir, iterations)
+        else:
+            await auction_flow(sim, wallet, rival_wallet, full_node, lock, recorder, workdir, iterations)
+        seconds = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "seconds": seconds,
+        "flows_per_second": iterations / seconds,
+        "steps": recorder.report(),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--iterations", type=int, default=10, help="Number of runs of every flow")
+    parser.add_argument("-f", "--flow", choices=["coin", "auction"], action="append", help="Only run these flows")
+    parser.add_argument("--fee-per-cost", type=float, help="Price fees by cost, so the fee transactions are included")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    parser.add_argument("--history", type=Path, help="Append the results as a JSON line to this file")
+    args = parser.parse_args()
+
+    # chia reads its root directory on first import, so the default config of a fresh root has to be in place
+    # before that. The simulator then runs with the same (mainnet) constants the operations sign for.
+    workdir = Path(tempfile.mkdtemp(prefix="chiwo-e2e-"))
+    os.environ["CHIA_ROOT"] = str(workdir.joinpath("chia"))
+    from chia.util.config import create_default_chia_config
+
+    create_default_chia_config(workdir.joinpath("chia"))
+    fees.configure(args.fee_per_cost)
+
+    results: Dict[str, Any] = {}
+    failed = False
+    for flow in args.flow or ["coin", "auction"]:
+        try:
+            results[flow] = asyncio.run(run_flow(flow, args.iterations, workdir))
+        except Exception as e:
+            print(f"{flow}: failed: {type(e).__name__}: {e}")
+            failed = True
+            continue
+        result = results[flow]
+        print(f"{flow}: {result['iterations']} runs in {result['seconds']:.2f} s ({result['flows_per_second']:.1f}/s)")
+        for name, step in result["steps"].items():
+            print(
+                f"  {name:<16} median {step['median_ms']:8.1f} ms  max {step['max_ms']:8.1f} ms  "
+                f"{step['bundles']:4} bundles  cost {step['mean_cost']:12.0f}  {step['mean_bytes']:8.0f} bytes"
+            )
+
+    if args.json:
+        with open(args.json, "w") as filehandle:
+            json.dump(results, filehandle, sort_keys=True, indent=4)
+    if args.history:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, "a") as filehandle:
+            record = {"time": time.time(), "revision": git_revision(), "results": results}
+            filehandle.write(json.dumps(record, sort_keys=True) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compares how the list giveaway (4-giveaway.clsp) and the merkle giveaway (6-merkle_giveaway.clsp) scale with
+the number of entries.
+
+For the list giveaway the whole list is curried into the puzzle and paid in one spend, so the reveal size and the
+cost of that spend grow with every entry. The merkle giveaway is paid in chunks sized to stay below the mempool
+cost limit; its reveal size and cost per spend only grow with the depth of the merkle proof.
+
+    python benchmarks/giveaway_scaling.py -e 100 1000 10000 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from workshop.config import get_constants
+from workshop.giveaway import GIVEAWAY_PUZZLE, MerkleGiveaway, chunk_cost, fit_chunk_size
+from workshop.utils import load_program, load_program_hash
+
+LIST_GIVEAWAY_PUZZLE = "clsp/4-giveaway.clsp"
+
+
+def list_giveaway(entries: List[bytes]) -> Dict[str, Any]:
+    from chia.consensus.condition_costs import ConditionCost
+    from chia.types.blockchain_format.program import Program
+
+    # The exercise may not be solved yet, so the list giveaway is estimated from its curried list and conditions
+    reveal_bytes = len(bytes(Program.to(entries)))
+    mod = load_program(LIST_GIVEAWAY_PUZZLE)
+    if mod is not None:
+        reveal_bytes += len(bytes(mod))
+    constants = get_constants()
+    cost = reveal_bytes * constants.COST_PER_BYTE + len(entries) * ConditionCost.CREATE_COIN.value
+    return {"reveal_bytes": reveal_bytes, "min_cost": cost, "fits_in_block": cost <= constants.MAX_BLOCK_COST_CLVM}
+
+
+def merkle_giveaway(entries: List[bytes]) -> Dict[str, Any]:
+    mod = load_program(GIVEAWAY_PUZZLE)
+    mod_hash = load_program_hash(GIVEAWAY_PUZZLE)
+    if mod is None or mod_hash is None:
+        raise RuntimeError(f"Couldn't build {GIVEAWAY_PUZZLE}")
+
+    start = time.perf_counter()
+    chunk_size = fit_chunk_size(mod, mod_hash, entries, 1000)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    giveaway = MerkleGiveaway(entries, 1000, chunk_size)
+    root = giveaway.root
+    commit_seconds = time.perf_counter() - start
+
+    last = len(giveaway.chunks) - 1
+    first_cost = chunk_cost(mod, mod_hash, giveaway, 0)
+    spend_bytes = len(bytes(giveaway.puzzle(mod, mod_hash, 0))) + len(bytes(giveaway.solution(0, len(entries))))
+    return {
+        "merkle_root": root.hex(),
+        "chunk_size": chunk_size,
+        "chunks": len(giveaway.chunks),
+        "proof_depth": len(giveaway.tree.proof(0)),
+        "chunk_spend_bytes": spend_bytes,
+        "first_chunk_cost": first_cost.total,
+        "first_chunk_clvm_cost": first_cost.clvm_cost,
+        "last_chunk_cost": chunk_cost(mod, mod_hash, giveaway, last).total,
+        "total_cost": sum(chunk_cost(mod, mod_hash, giveaway, index).total for index in range(len(giveaway.chunks))),
+        "fit_chunk_size_ms": fit_seconds * 1000,
+        "commit_ms": commit_seconds * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-e", "--entries", type=int, nargs="+", default=[10, 100, 1000, 10000, 50000])
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON lines")
+    args = parser.parse_args()
+
+    for count in args.entries:
+        entries = [os.urandom(32) for _ in range(count)]
+        result = {"entries": count, "list": list_giveaway(entries), "merkle": merkle_giveaway(entries)}
+        if args.json:
+            print(json.dumps(result, sort_keys=True))
+            continue
+        listed, merkle = result["list"], result["merkle"]
+        print(
+            f"{count:>7} entries  list: {listed['reveal_bytes']:>9} bytes, cost >= {listed['min_cost']:>14}"
+            f"{'' if listed['fits_in_block'] else ' (too big for a block)'}"
+        )
+        print(
+            f"{'':>15}merkle: {merkle['chunks']} chunks of {merkle['chunk_size']}, "
+            f"{merkle['chunk_spend_bytes']} bytes and cost {merkle['first_chunk_cost']} per chunk, "
+            f"committed in {merkle['commit_ms']:.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
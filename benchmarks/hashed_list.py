@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Measures computing the next giveaway puzzle hash for every signup, once by hashing the whole `PUZZLE_HASHES`
+list again (what `sha256tree` does) and once with HashedList, which only hashes the new entry.
+
+    python benchmarks/hashed_list.py -n 1000 5000 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from workshop.hashed_list import HashedList, giveaway_puzzle_hash, next_giveaway_puzzle_hash
+from workshop.merkle import list_hash
+from workshop.puzzle_hash import curry_hashes, hash_atom, hash_int
+
+MOD_HASH = bytes(32)
+PAYOUT_HEIGHT = 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--signups", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    for count in args.signups:
+        signups = [os.urandom(32) for _ in range(count)]
+
+        start = time.perf_counter()
+        entries: list = []
+        for puzzle_hash in signups:
+            entries.insert(0, puzzle_hash)
+            naive = curry_hashes(MOD_HASH, hash_atom(MOD_HASH), hash_int(PAYOUT_HEIGHT), list_hash(entries))
+        naive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hashed = HashedList()
+        for puzzle_hash in signups:
+            next_giveaway_puzzle_hash(MOD_HASH, PAYOUT_HEIGHT, hashed, puzzle_hash)
+            hashed.prepend(puzzle_hash)
+        hashed_seconds = time.perf_counter() - start
+
+        assert giveaway_puzzle_hash(MOD_HASH, PAYOUT_HEIGHT, hashed) == naive
+        print(
+            f"{count:>7} signups  rehash: {naive_seconds * 1000:10.1f} ms   "
+            f"HashedList: {hashed_seconds * 1000:8.1f} ms   ({naive_seconds / hashed_seconds:.0f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
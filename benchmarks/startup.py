@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Measures the cold-start time of `chiwo` for every subcommand.
+
+Each measurement spawns a fresh interpreter running `<subcommand> --help`, which covers importing the CLI
+and the subcommand itself but nothing that needs a wallet. Results are appended as one JSON line per run
+to the history file so startup time can be tracked across commits.
+
+    python benchmarks/startup.py -n 20 --history .chiwo/startup-history.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SUBCOMMANDS = [
+    [],
+    ["status"],
+    ["key"],
+    ["build"],
+    ["create-coin"],
+    ["spend-coin"],
+    ["push"],
+    ["shard-run"],
+    ["spend-batch"],
+    ["create-auction"],
+    ["bid"],
+    ["auction-status"],
+    ["giveaway-plan"],
+    ["giveaway-create"],
+    ["giveaway-payout"],
+    ["track"],
+    ["latency"],
+    ["watch"],
+    ["bench"],
+    ["get-singleton-puzzle"],
+    ["serve"],
+]
+
+
+def measure(args: List[str], runs: int) -> List[float]:
+    command = [sys.executable, "-m", "workshop.cli", *args, "--help"]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Number of runs per subcommand")
+    parser.add_argument("--history", type=Path, help="Append the results as a JSON line to this file")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for subcommand in SUBCOMMANDS:
+        name = " ".join(["chiwo", *subcommand])
+        timings = measure(subcommand, args.runs)
+        results[name] = {
+            "min_ms": min(timings) * 1000,
+            "median_ms": statistics.median(timings) * 1000,
+            "max_ms": max(timings) * 1000,
+        }
+        print(f"{name:<30} min {results[name]['min_ms']:8.1f} ms   median {results[name]['median_ms']:8.1f} ms")
+
+    if args.history:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, "a") as filehandle:
+            record = {"time": time.time(), "revision": git_revision(), "runs": args.runs, "results": results}
+            filehandle.write(json.dumps(record, sort_keys=True) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
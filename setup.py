@@ -57,6 +57,7 @@ setup(
     ],
     extras_require=dict(
         dev=dev_dependencies,
+        watch=["watchdog"],
     ),
     project_urls={
         "Bug Reports": "https://github.com/greimela/chialisp-workshop",
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO_PATH = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def default_constants(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Mainnet consensus constants instead of the ones of the network in the local chia config."""
+    from chia.consensus.default_constants import DEFAULT_CONSTANTS
+
+    import workshop.bench
+    import workshop.config
+
+    monkeypatch.setattr(workshop.config, "get_constants", lambda: DEFAULT_CONSTANTS)
+    monkeypatch.setattr(workshop.bench, "get_constants", lambda: DEFAULT_CONSTANTS)
+
+
+@pytest.fixture
+def workshop_project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A copy of the workshop puzzles and bench corpus, so builds never write into the repository."""
+    shutil.copytree(REPO_PATH.joinpath("clsp"), tmp_path.joinpath("clsp"), ignore=shutil.ignore_patterns("*.hex"))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
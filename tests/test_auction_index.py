@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from workshop.auction_index import AuctionIndex, AuctionState, RecordedChain, RecordingChain
+from workshop.bid import auction_coin_spend
+from workshop.utils import load_program_hash
+
+ORIGIN_ID = bytes.fromhex("01" * 32)
+CREATOR_PUZHASH = bytes.fromhex("cd" * 32)
+BIDDERS = [bytes.fromhex("e1" * 32), bytes.fromhex("e2" * 32)]
+END_HEIGHT = 50
+LAUNCHER_HEIGHT = 10
+BID_HEIGHTS = [11, 14, 17]
+CLAIM_HEIGHT = 60
+
+
+class ChainBuilder:
+    """Records coin records and spends in the format RecordedChain reads."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Dict[str, Any]] = {"coin_records": {}, "coin_spends": {}}
+
+    def add(self, coin: Any, height: int) -> None:
+        self.data["coin_records"][coin.name().hex()] = {
+            "coin": coin.to_json_dict(),
+            "confirmed_block_index": height,
+            "spent_block_index": 0,
+        }
+
+    def spend(self, coin_spend: Any, height: int, run: bool = True) -> List[Any]:
+        """Marks the coin spent and, unless `run` is False, adds the coins the spend creates."""
+        from chia.types.blockchain_format.program import Program
+        from chia_rs import Coin
+
+        coin = coin_spend.coin
+        self.data["coin_records"][coin.name().hex()]["spent_block_index"] = height
+        self.data["coin_spends"][coin.name().hex()] = coin_spend.to_json_dict()
+        if not run:
+            return []
+        puzzle = Program.from_bytes(bytes(coin_spend.puzzle_reveal))
+        conditions = puzzle.run(Program.from_bytes(bytes(coin_spend.solution)))
+        additions = [
+            Coin(coin.name(), condition.at("rf").as_atom(), condition.at("rrf").as_int())
+            for condition in conditions.as_iter()
+            if condition.first().as_int() == 51
+        ]
+        for addition in additions:
+            self.add(addition, height)
+        return additions
+
+    def chain(self) -> RecordedChain:
+        # Through JSON, like a recording loaded from a file
+        return RecordedChain(json.loads(json.dumps(self.data)))
+
+
+def launch_auction(builder: ChainBuilder) -> Tuple[bytes, AuctionState]:
+    """Creates the launcher and the first auction coin, with the creator as the highest bidder."""
+    from chia.types.blockchain_format.program import Program
+    from chia.types.coin_spend import CoinSpend
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import SINGLETON_LAUNCHER, SINGLETON_LAUNCHER_HASH
+    from chia_rs import Coin
+
+    from workshop.puzzle_hash import auction_puzzle_hash
+
+    mod_hash = load_program_hash("clsp/5-auction.clsp")
+    assert mod_hash is not None
+    launcher_coin = Coin(ORIGIN_ID, SINGLETON_LAUNCHER_HASH, 1)
+    launcher_id = launcher_coin.name()
+    full_puzzle_hash = auction_puzzle_hash(launcher_id, mod_hash, CREATOR_PUZHASH, END_HEIGHT, CREATOR_PUZHASH)
+    builder.add(launcher_coin, LAUNCHER_HEIGHT - 1)
+    (auction_coin,) = builder.spend(
+        CoinSpend(launcher_coin, SINGLETON_LAUNCHER, Program.to([full_puzzle_hash, 1, []])), LAUNCHER_HEIGHT
+    )
+    state = AuctionState(
+        launcher_id=launcher_id,
+        current_coin=auction_coin,
+        lineage_proof=[ORIGIN_ID, 1],
+        synced_height=LAUNCHER_HEIGHT,
+        mod_hash=bytes(mod_hash),
+        creator_puzhash=CREATOR_PUZHASH,
+        end_height=END_HEIGHT,
+        highest_bidder_puzhash=CREATOR_PUZHASH,
+    )
+    return launcher_id, state
+
+
+def bid(
+    builder: ChainBuilder, launcher_id: bytes, state: AuctionState, bidder: bytes, amount: int, height: int
+) -> None:
+    """Spends the auction coin with a bid and moves `state` to the coin it creates."""
+    from chia.types.blockchain_format.program import Program
+
+    from workshop.puzzle_hash import auction_inner_puzzle_hash
+
+    assert state.mod_hash and state.creator_puzhash and state.highest_bidder_puzhash and state.end_height
+    coin = state.current_coin
+    inner_solution = Program.to([0, coin.amount, bidder, amount])
+    additions = builder.spend(auction_coin_spend(launcher_id, state, inner_solution), height)
+    (next_coin,) = [addition for addition in additions if addition.amount % 2 == 1]
+    inner_puzzle_hash = auction_inner_puzzle_hash(
+        state.mod_hash, state.creator_puzhash, state.end_height, state.highest_bidder_puzhash
+    )
+    state.lineage_proof = [bytes(coin.parent_coin_info), inner_puzzle_hash, coin.amount]
+    state.current_coin = next_coin
+    state.highest_bidder_puzhash = bidder
+    state.highest_bid = amount
+
+
+def claim(builder: ChainBuilder, launcher_id: bytes, state: AuctionState, p2_auction_id: bytes) -> None:
+    from chia.types.blockchain_format.program import Program
+
+    inner_solution = Program.to([1, state.current_coin.amount, p2_auction_id, 0])
+    # The singleton rejects the creator payout after the melt, so the claim is recorded without running it
+    builder.spend(auction_coin_spend(launcher_id, state, inner_solution), CLAIM_HEIGHT, run=False)
+
+
+@pytest.fixture
+def auction(workshop_project: Path) -> Tuple[ChainBuilder, bytes, AuctionState]:
+    builder = ChainBuilder()
+    launcher_id, state = launch_auction(builder)
+    # The creator's own opening bid, as create-auction pushes it
+    bid(builder, launcher_id, state, CREATOR_PUZHASH, 2, BID_HEIGHTS[0])
+    return builder, launcher_id, state
+
+
+@pytest.mark.asyncio
+async def test_sync_follows_bids_and_claim(
+    auction: Tuple[ChainBuilder, bytes, AuctionState], tmp_path: Path
+) -> None:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    builder, launcher_id, state = auction
+    bid(builder, launcher_id, state, BIDDERS[0], 4, BID_HEIGHTS[1])
+    bid(builder, launcher_id, state, BIDDERS[1], 6, BID_HEIGHTS[2])
+    current_coin = state.current_coin
+    claim(builder, launcher_id, state, bytes.fromhex("99" * 32))
+
+    database = tmp_path.joinpath("auctions.sqlite")
+    index = AuctionIndex(str(database))
+    synced = await index.sync(builder.chain(), bytes32(launcher_id))
+    index.close()
+
+    assert synced.status == "claimed"
+    assert synced.current_coin == current_coin
+    assert synced.synced_height == CLAIM_HEIGHT
+    assert (synced.highest_bidder_puzhash, synced.highest_bid) == (BIDDERS[1], 6)
+    assert (synced.creator_puzhash, synced.end_height) == (CREATOR_PUZHASH, END_HEIGHT)
+
+    db = sqlite3.connect(database)
+    rows = db.execute(
+        "SELECT height, bidder_puzhash, amount FROM bids WHERE launcher_id = ? ORDER BY height", (launcher_id.hex(),)
+    ).fetchall()
+    stored = db.execute("SELECT synced_height FROM auctions WHERE launcher_id = ?", (launcher_id.hex(),)).fetchone()
+    db.close()
+    assert rows == [
+        (BID_HEIGHTS[0], CREATOR_PUZHASH.hex(), 2),
+        (BID_HEIGHTS[1], BIDDERS[0].hex(), 4),
+        (BID_HEIGHTS[2], BIDDERS[1].hex(), 6),
+    ]
+    assert stored == (CLAIM_HEIGHT,)
+
+
+class CountingChain:
+    def __init__(self, chain: RecordedChain):
+        self.chain = chain
+        self.spends_fetched: List[bytes] = []
+
+    async def get_coin_record_by_name(self, coin_id: Any) -> Any:
+        return await self.chain.get_coin_record_by_name(coin_id)
+
+    async def get_puzzle_and_solution(self, coin_id: Any, height: int) -> Any:
+        self.spends_fetched.append(bytes(coin_id))
+        return await self.chain.get_puzzle_and_solution(coin_id, height)
+
+
+@pytest.mark.asyncio
+async def test_sync_resumes_from_indexed_height(
+    auction: Tuple[ChainBuilder, bytes, AuctionState], tmp_path: Path
+) -> None:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    builder, launcher_id, state = auction
+    database = str(tmp_path.joinpath("auctions.sqlite"))
+    index = AuctionIndex(database)
+    first = await index.sync(builder.chain(), bytes32(launcher_id))
+    index.close()
+    assert (first.status, first.synced_height, first.highest_bid) == ("open", BID_HEIGHTS[0], 2)
+    assert first.current_coin == state.current_coin
+
+    resumed_from = state.current_coin.name()
+    bid(builder, launcher_id, state, BIDDERS[0], 4, BID_HEIGHTS[1])
+    chain = CountingChain(builder.chain())
+    # A new process opening the same database picks up where the last sync stopped
+    index = AuctionIndex(database)
+    second = await index.sync(chain, bytes32(launcher_id))
+
+    assert chain.spends_fetched == [bytes(resumed_from)]
+    assert (second.status, second.synced_height, second.highest_bid) == ("open", BID_HEIGHTS[1], 4)
+    assert second.current_coin == state.current_coin
+    assert [b.amount for b in index.bids(launcher_id)] == [2, 4]
+    index.close()
+
+
+@pytest.mark.asyncio
+async def test_recording_replays_the_same_sync(
+    auction: Tuple[ChainBuilder, bytes, AuctionState], tmp_path: Path
+) -> None:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    builder, launcher_id, _ = auction
+    recording = RecordingChain(builder.chain())
+    index = AuctionIndex(":memory:")
+    recorded = await index.sync(recording, bytes32(launcher_id))
+    index.close()
+    path = str(tmp_path.joinpath("chain.json"))
+    recording.save(path)
+
+    index = AuctionIndex(":memory:")
+    replayed = await index.sync(RecordedChain.load(path), bytes32(launcher_id))
+    index.close()
+    assert replayed.to_json_dict() == recorded.to_json_dict()
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from workshop.bench import bench, parse_value
+
+
+def test_parse_value_reads_numbers_and_bytes_as_atoms() -> None:
+    assert parse_value("1000").as_int() == 1000
+    assert parse_value("0x" + "aa" * 32).as_atom() == b"\xaa" * 32
+    assert parse_value("(1 0xbb)").as_python() == [b"\x01", b"\xbb"]
+
+
+@pytest.mark.usefixtures("default_constants")
+def test_corpus_runs_and_matches_baseline(workshop_project: Path) -> None:
+    lines: List[str] = []
+    results = bench(lines.append, runs=1)
+    assert results
+    assert [result.error for result in results if result.error is not None] == []
+    assert [result.regressions for result in results if result.regressions] == []
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from workshop.auction_index import AuctionState
+from workshop.bid import BidEngine, PreparedBid
+
+LAUNCHER_ID = bytes.fromhex("01" * 32)
+BIDDER_PUZHASH = bytes.fromhex("e1" * 32)
+NEXT_PUZZLE_HASH = bytes.fromhex("f1" * 32)
+
+
+class FakeFullNodeClient:
+    def __init__(self, statuses: List[str], competing: int = 0):
+        self.statuses = statuses
+        # The number of pushes that find another bid on the auction coin in the mempool
+        self.competing = competing
+        self.pushed: List[Any] = []
+
+    async def push_tx(self, spend_bundle: Any) -> Dict[str, Any]:
+        self.pushed.append(spend_bundle)
+        status = self.statuses[len(self.pushed) - 1]
+        if status == "FAILED":
+            raise ValueError("{'error': 'Failed to include transaction, error DOUBLE_SPEND'}")
+        return {"status": status, "success": True}
+
+    async def get_mempool_items_by_coin_name(self, coin_name: bytes) -> Dict[str, Any]:
+        names = [self.pushed[-1].name()]
+        if len(self.pushed) <= self.competing:
+            names.append(bytes.fromhex("ee" * 32))
+        return {"mempool_items": [{"spend_bundle_name": "0x" + name.hex()} for name in names], "success": True}
+
+
+def auction_state(coin_amount: int, puzzle_hash: bytes = bytes.fromhex("aa" * 32)) -> AuctionState:
+    from chia_rs import Coin
+
+    coin = Coin(bytes.fromhex(f"{coin_amount:02x}" * 32), puzzle_hash, coin_amount)
+    return AuctionState(LAUNCHER_ID, coin, [bytes.fromhex("02" * 32), 1], 10, highest_bid=coin_amount - 1)
+
+
+def make_engine(full_node_client: FakeFullNodeClient, states: List[AuctionState]) -> BidEngine:
+    from blspy import G2Element
+    from chia.types.spend_bundle import SpendBundle
+
+    engine = BidEngine(None, full_node_client, None, LAUNCHER_ID, lambda _: None)  # type: ignore[arg-type]
+    synced: List[AuctionState] = []
+
+    async def sync() -> AuctionState:
+        synced.append(states[min(len(synced), len(states) - 1)])
+        return synced[-1]
+
+    async def prepare(amount: int) -> PreparedBid:
+        state = await sync()
+        return PreparedBid(state, amount, BIDDER_PUZHASH, NEXT_PUZZLE_HASH, SpendBundle([], G2Element()))
+
+    async def wait_for_spend(state: AuctionState, timeout: float, poll_interval: float) -> None:
+        pass
+
+    engine.sync = sync  # type: ignore[method-assign]
+    engine.prepare = prepare  # type: ignore[method-assign]
+    engine.wait_for_spend = wait_for_spend  # type: ignore[method-assign]
+    return engine
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lost", ["PENDING", "FAILED"])
+async def test_bid_losing_the_race_is_rebuilt_on_the_new_coin(lost: str) -> None:
+    full_node_client = FakeFullNodeClient([lost, "SUCCESS"])
+    # The competing bid of 4 mojos moved the auction to a coin of 5 mojos
+    engine = make_engine(full_node_client, [auction_state(3), auction_state(5)])
+    result = await engine.bid(4, lambda _: None, max_amount=10)
+
+    assert result is not None
+    assert (result["amount"], result["attempts"]) == (6, 2)
+    assert result["auction_coin_id"] == auction_state(5).current_coin.name().hex()
+    assert len(full_node_client.pushed) == 2
+
+
+@pytest.mark.asyncio
+async def test_pending_bid_is_not_reported_as_a_success() -> None:
+    full_node_client = FakeFullNodeClient(["PENDING"])
+    engine = make_engine(full_node_client, [auction_state(3)])
+    assert await engine.bid(4, lambda _: None, retries=0) is None
+
+
+@pytest.mark.asyncio
+async def test_accepted_bid_losing_to_a_deduplicated_bid_is_rebuilt() -> None:
+    # Both bids are accepted, the other one makes it into the block
+    full_node_client = FakeFullNodeClient(["SUCCESS", "SUCCESS"], competing=1)
+    engine = make_engine(full_node_client, [auction_state(3), auction_state(5)])
+    result = await engine.bid(4, lambda _: None, max_amount=10)
+
+    assert result is not None
+    assert (result["amount"], result["attempts"]) == (6, 2)
+    assert len(full_node_client.pushed) == 2
+
+
+@pytest.mark.asyncio
+async def test_accepted_bid_winning_against_a_deduplicated_bid() -> None:
+    full_node_client = FakeFullNodeClient(["SUCCESS"], competing=1)
+    engine = make_engine(full_node_client, [auction_state(3), auction_state(5, NEXT_PUZZLE_HASH)])
+    result = await engine.bid(4, lambda _: None, max_amount=10)
+
+    assert result is not None
+    assert (result["amount"], result["attempts"]) == (4, 1)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from workshop.utils import build_all
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    tmp_path.joinpath("clsp/include").mkdir(parents=True)
+    tmp_path.joinpath("clsp/include/value.clib").write_text("((defconstant VALUE 1))\n")
+    tmp_path.joinpath("clsp/puzzle.clsp").write_text("(mod () (include value.clib) VALUE)\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_clib_edit_rebuilds_dependent_puzzle(project: Path) -> None:
+    hex_file = project.joinpath("clsp/puzzle.clsp.hex")
+    (result,) = build_all("clsp/puzzle.clsp")
+    assert result.success and not result.cached
+    before = hex_file.read_text().strip()
+
+    # The `.hex` is now newer than the puzzle source, which must not stop the rebuild
+    project.joinpath("clsp/include/value.clib").write_text("((defconstant VALUE 2))\n")
+    (result,) = build_all("clsp/puzzle.clsp")
+    assert result.success and not result.cached
+    after = hex_file.read_text().strip()
+
+    assert after != before
+    assert project.joinpath(".chiwo/build-cache", result.key + ".hex").read_text().strip() == after
+
+
+def test_unchanged_puzzle_is_restored_from_cache(project: Path) -> None:
+    (first,) = build_all("clsp/puzzle.clsp")
+    (second,) = build_all("clsp/puzzle.clsp")
+    assert second.cached and second.key == first.key
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from click.testing import CliRunner
+
+from workshop import daemon
+from workshop.cli import cli
+
+
+@pytest.fixture
+def forwarded(monkeypatch: pytest.MonkeyPatch) -> List[Tuple[str, Dict[str, Any]]]:
+    requests: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def forward(address: str, command: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        requests.append((command, request))
+        return {"result": None}
+
+    monkeypatch.setattr(daemon, "forward", forward)
+    return requests
+
+
+def test_puzzle_paths_are_sent_absolute(
+    forwarded: List[Tuple[str, Dict[str, Any]]], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    tmp_path.joinpath("clsp").mkdir()
+    tmp_path.joinpath("clsp/puzzle.clsp").write_text("(mod () ())")
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    runner.invoke(cli, ["--daemon", "sock", "create-coin", "clsp/puzzle.clsp"], input="y\n")
+    runner.invoke(
+        cli, ["--daemon", "sock", "spend-coin", "--parentId", "00", "--puzzle", "clsp/puzzle.clsp", "--solution", "()"]
+    )
+
+    expected = os.path.join(tmp_path, "clsp/puzzle.clsp")
+    assert [(command, request.get("file", request.get("puzzle"))) for command, request in forwarded] == [
+        ("create_coin", expected),
+        ("spend_coin", expected),
+    ]
+
+
+def test_program_literals_are_sent_unchanged(forwarded: List[Tuple[str, Dict[str, Any]]]) -> None:
+    CliRunner().invoke(cli, ["--daemon", "sock", "spend-coin", "--parentId", "00", "--puzzle", "ff0180"])
+    assert forwarded[0][1]["puzzle"] == "ff0180"
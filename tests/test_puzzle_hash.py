@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from workshop.puzzle_hash import (
+    auction_inner_puzzle_hash,
+    auction_puzzle_hash,
+    curry_hashes,
+    hash_atom,
+    int_to_atom,
+    p2_auction_puzzle_hash,
+    singleton_puzzle_hash,
+)
+from workshop.utils import load_program
+
+LAUNCHER_ID = bytes.fromhex("ab" * 32)
+CREATOR_PUZHASH = bytes.fromhex("cd" * 32)
+BIDDER_PUZHASH = bytes.fromhex("ef" * 32)
+HEIGHTS = [0, 1, 127, 128, 255, 256, 4_000_000, 2**63]
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 127, 128, -128, -129, 255, 256, 2**63, -(2**63)])
+def test_int_to_atom_matches_clvm(value: int) -> None:
+    from chia.types.blockchain_format.program import Program
+
+    assert int_to_atom(value) == Program.to(value).as_atom()
+
+
+def test_curry_hashes_matches_curried_program() -> None:
+    from chia.types.blockchain_format.program import Program
+
+    mod = Program.to([1, 2, 3])
+    arguments = [Program.to(b"\x01" * 32), Program.to(1000), Program.to([1, [2, 3]])]
+    expected = mod.curry(*arguments).get_tree_hash()
+    assert curry_hashes(bytes(mod.get_tree_hash()), *[bytes(a.get_tree_hash()) for a in arguments]) == expected
+
+
+@pytest.mark.parametrize("end_height", HEIGHTS)
+def test_auction_puzzle_hashes_match_curried_programs(workshop_project: Path, end_height: int) -> None:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_for_singleton
+
+    auction_mod = load_program("clsp/5-auction.clsp")
+    assert auction_mod is not None
+    mod_hash = bytes(auction_mod.get_tree_hash())
+    inner_puzzle = auction_mod.curry(mod_hash, CREATOR_PUZHASH, end_height, BIDDER_PUZHASH)
+
+    inner_puzzle_hash = auction_inner_puzzle_hash(mod_hash, CREATOR_PUZHASH, end_height, BIDDER_PUZHASH)
+    assert inner_puzzle_hash == inner_puzzle.get_tree_hash()
+    full_puzzle_hash = auction_puzzle_hash(LAUNCHER_ID, mod_hash, CREATOR_PUZHASH, end_height, BIDDER_PUZHASH)
+    assert full_puzzle_hash == puzzle_for_singleton(LAUNCHER_ID, inner_puzzle).get_tree_hash()
+
+
+def test_singleton_puzzle_hash_matches_puzzle_for_singleton() -> None:
+    from chia.types.blockchain_format.program import Program
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_for_singleton
+
+    inner_puzzle = Program.to((1, [[51, BIDDER_PUZHASH, 1]]))
+    expected = puzzle_for_singleton(LAUNCHER_ID, inner_puzzle).get_tree_hash()
+    assert singleton_puzzle_hash(LAUNCHER_ID, bytes(inner_puzzle.get_tree_hash())) == expected
+
+
+def test_p2_auction_puzzle_hash_matches_curried_program(workshop_project: Path) -> None:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import SINGLETON_LAUNCHER_HASH, SINGLETON_MOD_HASH
+
+    p2_auction_mod = load_program("clsp/5-p2_auction.clsp")
+    assert p2_auction_mod is not None
+    expected = p2_auction_mod.curry(SINGLETON_MOD_HASH, LAUNCHER_ID, SINGLETON_LAUNCHER_HASH).get_tree_hash()
+    assert p2_auction_puzzle_hash(bytes(p2_auction_mod.get_tree_hash()), LAUNCHER_ID) == expected
+
+
+def test_hash_atom_matches_program_tree_hash() -> None:
+    from chia.types.blockchain_format.program import Program
+
+    assert hash_atom(CREATOR_PUZHASH) == Program.to(CREATOR_PUZHASH).get_tree_hash()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from workshop import rpc
+
+
+class FakeWalletClient:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.health_checks = 0
+        self.closed = False
+
+    async def fetch(self, path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.health_checks += 1
+        if not self.healthy:
+            raise ConnectionError("wallet is gone")
+        return {"success": True}
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def await_closed(self) -> None:
+        pass
+
+
+@pytest.fixture
+def connections(monkeypatch: pytest.MonkeyPatch) -> List[FakeWalletClient]:
+    created: List[FakeWalletClient] = []
+
+    async def get_wallet_client() -> FakeWalletClient:
+        created.append(FakeWalletClient())
+        return created[-1]
+
+    monkeypatch.setattr(rpc, "get_wallet_client", get_wallet_client)
+    return created
+
+
+@pytest.mark.asyncio
+async def test_steady_traffic_still_replaces_a_dead_connection(
+    connections: List[FakeWalletClient], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(rpc.time, "monotonic", lambda: clock[0])
+    pool = rpc.WalletClientPool(health_check_interval=5.0)
+    first = await pool.get()
+
+    connections[0].healthy = False
+    # A request every second, more often than the health check interval
+    clients = []
+    for _ in range(10):
+        clock[0] += 1.0
+        clients.append(await pool.get())
+    assert connections[0].closed
+    assert clients[-1] is not first
+    assert len(connections) == 2
+
+
+@pytest.mark.asyncio
+async def test_health_check_runs_at_most_once_per_interval(connections: List[FakeWalletClient]) -> None:
+    pool = rpc.WalletClientPool(health_check_interval=60.0)
+    await pool.get()
+    for _ in range(5):
+        await pool.get()
+    # The new connection is checked once, after that the interval hasn't passed yet
+    assert connections[0].health_checks == 1
+    assert len(connections) == 1
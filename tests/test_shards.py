@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import pytest
+
+from workshop import shards
+from workshop.fees import FeeQuote
+from workshop.shards import Shard, ShardResult, run_shards, split_coins
+
+PUZZLE_HASH = bytes.fromhex("aa" * 32)
+
+
+@dataclass
+class FakeTransaction:
+    additions: List[Any]
+    spend_bundle: Any = None
+
+
+class FakeWalletClient:
+    def __init__(self, change_amount: int):
+        self.change_amount = change_amount
+
+    async def get_next_address(self, wallet_id: int, new_address: bool) -> str:
+        from chia.util.bech32m import encode_puzzle_hash
+
+        return encode_puzzle_hash(PUZZLE_HASH, "xch")
+
+    async def send_transaction_multi(
+        self, wallet_id: int, additions: List[Dict[str, Any]], tx_config: Any, fee: int = 0
+    ) -> FakeTransaction:
+        from chia_rs import Coin
+
+        parent = bytes.fromhex("01" * 32)
+        outputs = [Coin(parent, addition["puzzle_hash"], addition["amount"]) for addition in additions]
+        # With reuse_puzhash the change goes back to the same puzzle hash
+        change = Coin(bytes.fromhex("02" * 32), PUZZLE_HASH, self.change_amount)
+        return FakeTransaction(outputs + [change])
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def quote_fee(cost: int) -> FeeQuote:
+        return FeeQuote(cost, 0, "test")
+
+    async def wait_for_confirmations(bundles: Any, log: Any, **kwargs: Any) -> List[Any]:
+        return []
+
+    monkeypatch.setattr(shards, "quote_fee", quote_fee)
+    monkeypatch.setattr(shards, "get_tx_config", lambda: None)
+    monkeypatch.setattr(shards, "wait_for_confirmations", wait_for_confirmations)
+    monkeypatch.setattr(shards.PushedBundle, "from_spend_bundle", classmethod(lambda cls, bundle, kind: None))
+
+
+@pytest.mark.asyncio
+async def test_split_coins_skips_change_with_an_amount_in_range() -> None:
+    wallet_client = FakeWalletClient(change_amount=1002)
+    coins = await split_coins(wallet_client, 5, 1000, lambda _: None)  # type: ignore[arg-type]
+    # One pool coin per operation, even though the change has the same puzzle hash and one of the amounts
+    assert [coin.amount for coin in coins] == [1000, 1001, 1002, 1003, 1004]
+
+
+@pytest.mark.asyncio
+async def test_failing_shard_does_not_stop_the_others(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def run_shard(shard: Shard, count: int, *args: Any) -> ShardResult:
+        if shard.name == "broken":
+            raise ConnectionError("wallet unreachable")
+        return ShardResult(shard.name, operations=count, seconds=1.0)
+
+    monkeypatch.setattr(shards, "run_shard", run_shard)
+    lines: List[str] = []
+    result = await run_shards([Shard("ok"), Shard("broken")], 10, None, 1, 1, lines.append)  # type: ignore[arg-type]
+
+    by_shard = {shard["shard"]: shard for shard in result["shards"]}
+    assert by_shard["ok"]["operations"] == 5 and by_shard["ok"]["error"] is None
+    assert by_shard["broken"]["failed"] == 5 and by_shard["broken"]["error"] == "wallet unreachable"
+    assert (result["operations"], result["failed"]) == (5, 5)
+    assert "[broken] Failed: wallet unreachable" in lines
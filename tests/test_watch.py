@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from workshop.watch import WatchSession
+
+AUCTION_BID = "clsp/5-auction.clsp:bid"
+
+
+@pytest.mark.usefixtures("default_constants")
+def test_include_edit_rebuilds_dependents_and_reports_diffs(workshop_project: Path) -> None:
+    lines: List[str] = []
+    session = WatchSession("clsp", lines.append)
+    session.update()
+    auction = workshop_project.joinpath("clsp/5-auction.clsp")
+    launcher = workshop_project.joinpath("clsp/singleton_launcher.clsp")
+    auction_hash = session.programs[auction][1]
+    launcher_program = session.programs[launcher][0]
+    bid = session.results[AUCTION_BID]
+    assert bid.cost is not None
+
+    curry = workshop_project.joinpath("clsp/include/curry.clib")
+    # A wider constant changes the curried hashes, the CLVM cost and the size of every puzzle using it
+    curry.write_text(curry.read_text().replace("(defconstant TWO 2)", "(defconstant TWO 0x0002)"))
+    lines.clear()
+    affected = session.affected({curry})
+    assert auction in affected and launcher not in affected
+    session.update({curry})
+
+    assert session.programs[auction][1] != auction_hash
+    assert session.programs[launcher][0] is launcher_program
+    rebuilt = session.results[AUCTION_BID]
+    assert rebuilt.cost is not None and rebuilt.error is None
+    assert rebuilt.cost.total != bid.cost.total
+    assert any(line.startswith(f"{AUCTION_BID}: cost {bid.cost.total} -> {rebuilt.cost.total}") for line in lines)
+    assert any(line.strip().startswith("+ CREATE_COIN") for line in lines)
+
+
+@pytest.mark.usefixtures("default_constants")
+def test_unchanged_costs_are_not_reported(workshop_project: Path) -> None:
+    lines: List[str] = []
+    session = WatchSession("clsp", lines.append)
+    session.update()
+    auction = workshop_project.joinpath("clsp/5-auction.clsp")
+    # A comment doesn't change the compiled puzzle
+    auction.write_text(auction.read_text() + "\n; a comment\n")
+    lines.clear()
+    session.update({auction})
+    assert not any(line.startswith("clsp/") for line in lines)
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol
+
+from workshop import trace
+from workshop.puzzle_hash import auction_inner_puzzle_hash, auction_puzzle_hash
+
+if TYPE_CHECKING:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+    from chia.types.coin_record import CoinRecord
+    from chia.types.coin_spend import CoinSpend
+    from chia_rs import Coin
+
+DEFAULT_DATABASE = ".chiwo/auctions.sqlite"
+
+# A local index of auctions created from 5-auction.clsp, keyed by launcher ID. Syncing follows the singleton
+# lineage from the last indexed auction coin, decoding every bid from the spend, so lookups never re-walk
+# the lineage from the launcher.
+
+
+class ChainSource(Protocol):
+    """The part of FullNodeRpcClient the indexer uses, so it can also run against a recorded chain."""
+
+    async def get_coin_record_by_name(self, coin_id: bytes32) -> Optional[CoinRecord]:
+        ...
+
+    async def get_puzzle_and_solution(self, coin_id: bytes32, height: int) -> Optional[CoinSpend]:
+        ...
+
+
+@dataclass
+class Bid:
+    coin_id: bytes
+    height: int
+    bidder_puzhash: bytes
+    amount: int
+
+
+@dataclass
+class AuctionState:
+    launcher_id: bytes
+    current_coin: Coin
+    # The lineage proof of `current_coin`: (parent_parent_id, amount) for the first coin after the launcher,
+    # (parent_parent_id, parent_inner_puzzle_hash, parent_amount) afterwards
+    lineage_proof: List[Any]
+    synced_height: int
+    status: str = "open"
+    mod_hash: Optional[bytes] = None
+    creator_puzhash: Optional[bytes] = None
+    end_height: Optional[int] = None
+    highest_bidder_puzhash: Optional[bytes] = None
+    highest_bid: int = 0
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "launcher_id": self.launcher_id.hex(),
+            "status": self.status,
+            "current_coin_id": self.current_coin.name().hex(),
+            "current_coin": self.current_coin.to_json_dict(),
+            "lineage_proof": [item.hex() if isinstance(item, bytes) else item for item in self.lineage_proof],
+            "synced_height": self.synced_height,
+            "mod_hash": self.mod_hash.hex() if self.mod_hash else None,
+            "creator_puzhash": self.creator_puzhash.hex() if self.creator_puzhash else None,
+            "end_height": self.end_height,
+            "highest_bidder_puzhash": self.highest_bidder_puzhash.hex() if self.highest_bidder_puzhash else None,
+            "highest_bid": self.highest_bid,
+        }
+
+
+@dataclass
+class AuctionSpend:
+    mod_hash: bytes
+    creator_puzhash: bytes
+    end_height: int
+    highest_bidder_puzhash: bytes
+    mode: int
+    my_amount: int
+    new_bidder_puzhash_or_p2_auction_id: bytes
+    new_bid_amount: int
+
+
+def decode_auction_spend(coin_spend: CoinSpend) -> AuctionSpend:
+    """Reads the curried auction state and the inner solution from a spend of a singleton-wrapped 5-auction.clsp."""
+    from chia.types.blockchain_format.program import Program
+
+    puzzle = Program.from_bytes(bytes(coin_spend.puzzle_reveal))
+    solution = Program.from_bytes(bytes(coin_spend.solution))
+    _, singleton_args = puzzle.uncurry()
+    inner_puzzle = singleton_args.rest().first()
+    _, auction_args = inner_puzzle.uncurry()
+    mod_hash, creator_puzhash, end_height, highest_bidder_puzhash = list(auction_args.as_iter())
+    # The singleton solution is (lineage_proof my_amount inner_solution)
+    inner_solution = solution.rest().rest().first()
+    mode, my_amount, new_bidder, new_bid_amount = list(inner_solution.as_iter())
+    return AuctionSpend(
+        mod_hash.as_atom(),
+        creator_puzhash.as_atom(),
+        end_height.as_int(),
+        highest_bidder_puzhash.as_atom(),
+        mode.as_int(),
+        my_amount.as_int(),
+        new_bidder.as_atom(),
+        new_bid_amount.as_int(),
+    )
+
+
+def coin_from_json(value: Dict[str, Any]) -> Coin:
+    from chia_rs import Coin
+
+    return Coin(
+        bytes.fromhex(value["parent_coin_info"].replace("0x", "")),
+        bytes.fromhex(value["puzzle_hash"].replace("0x", "")),
+        int(value["amount"]),
+    )
+
+
+class AuctionIndex:
+    def __init__(self, path: str = DEFAULT_DATABASE):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS auctions (
+                launcher_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                synced_height INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bids (
+                launcher_id TEXT NOT NULL,
+                coin_id TEXT NOT NULL,
+                height INTEGER NOT NULL,
+                bidder_puzhash TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                PRIMARY KEY (launcher_id, coin_id)
+            );
+            CREATE INDEX IF NOT EXISTS bids_by_auction ON bids (launcher_id, height);
+            """
+        )
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get(self, launcher_id: bytes) -> Optional[AuctionState]:
+        row = self.db.execute("SELECT state FROM auctions WHERE launcher_id = ?", (launcher_id.hex(),)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        return AuctionState(
+            launcher_id=launcher_id,
+            current_coin=coin_from_json(state["current_coin"]),
+            lineage_proof=[
+                bytes.fromhex(item) if isinstance(item, str) else item for item in state["lineage_proof"]
+            ],
+            synced_height=state["synced_height"],
+            status=state["status"],
+            mod_hash=bytes.fromhex(state["mod_hash"]) if state["mod_hash"] else None,
+            creator_puzhash=bytes.fromhex(state["creator_puzhash"]) if state["creator_puzhash"] else None,
+            end_height=state["end_height"],
+            highest_bidder_puzhash=(
+                bytes.fromhex(state["highest_bidder_puzhash"]) if state["highest_bidder_puzhash"] else None
+            ),
+            highest_bid=state["highest_bid"],
+        )
+
+    def bids(self, launcher_id: bytes) -> List[Bid]:
+        rows = self.db.execute(
+            "SELECT coin_id, height, bidder_puzhash, amount FROM bids WHERE launcher_id = ? ORDER BY height, amount",
+            (launcher_id.hex(),),
+        )
+        return [
+            Bid(bytes.fromhex(coin_id), height, bytes.fromhex(bidder), amount)
+            for coin_id, height, bidder, amount in rows
+        ]
+
+    def launcher_ids(self) -> List[bytes]:
+        return [bytes.fromhex(row[0]) for row in self.db.execute("SELECT launcher_id FROM auctions")]
+
+    def _save(self, state: AuctionState, bids: List[Bid]) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO auctions (launcher_id, state, synced_height) VALUES (?, ?, ?)",
+                (state.launcher_id.hex(), json.dumps(state.to_json_dict()), state.synced_height),
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO bids (launcher_id, coin_id, height, bidder_puzhash, amount) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (state.launcher_id.hex(), bid.coin_id.hex(), bid.height, bid.bidder_puzhash.hex(), bid.amount)
+                    for bid in bids
+                ],
+            )
+
+    async def _from_launcher(self, chain: ChainSource, launcher_id: bytes32) -> AuctionState:
+        from chia.types.blockchain_format.program import Program
+        from chia_rs import Coin
+
+        launcher_record = await chain.get_coin_record_by_name(launcher_id)
+        if launcher_record is None:
+            raise ValueError(f"Launcher coin {launcher_id.hex()} not found")
+        if launcher_record.spent_block_index == 0:
+            raise ValueError(f"Launcher coin {launcher_id.hex()} is not spent yet")
+        launcher_spend = await chain.get_puzzle_and_solution(launcher_id, launcher_record.spent_block_index)
+        if launcher_spend is None:
+            raise ValueError(f"Spend of launcher coin {launcher_id.hex()} not found")
+        # The launcher solution is (singleton_full_puzzle_hash amount key_value_list)
+        launcher_solution = Program.from_bytes(bytes(launcher_spend.solution))
+        full_puzzle_hash = launcher_solution.first().as_atom()
+        amount = launcher_solution.rest().first().as_int()
+        launcher_coin = launcher_record.coin
+        return AuctionState(
+            launcher_id=launcher_id,
+            current_coin=Coin(launcher_id, full_puzzle_hash, amount),
+            lineage_proof=[bytes(launcher_coin.parent_coin_info), launcher_coin.amount],
+            synced_height=launcher_record.spent_block_index,
+        )
+
+    async def sync(self, chain: ChainSource, launcher_id: bytes32) -> AuctionState:
+        """Follows the lineage from the last indexed auction coin to the current one and stores every new bid."""
+        from chia_rs import Coin
+
+        with trace.span("auction_sync", "index", launcher_id=launcher_id.hex()) as span_args:
+            state = self.get(launcher_id)
+            if state is None:
+                state = await self._from_launcher(chain, launcher_id)
+
+            new_bids: List[Bid] = []
+            while state.status == "open":
+                coin = state.current_coin
+                record = await chain.get_coin_record_by_name(coin.name())
+                if record is None or record.spent_block_index == 0:
+                    break
+                coin_spend = await chain.get_puzzle_and_solution(coin.name(), record.spent_block_index)
+                if coin_spend is None:
+                    break
+                spend = decode_auction_spend(coin_spend)
+                state.mod_hash = spend.mod_hash
+                state.creator_puzhash = spend.creator_puzhash
+                state.end_height = spend.end_height
+                state.highest_bidder_puzhash = spend.highest_bidder_puzhash
+                state.synced_height = record.spent_block_index
+
+                if spend.mode == 1:
+                    # The auction was claimed and the singleton melted
+                    state.status = "claimed"
+                    break
+
+                inner_puzzle_hash = auction_inner_puzzle_hash(
+                    spend.mod_hash, spend.creator_puzhash, spend.end_height, spend.highest_bidder_puzhash
+                )
+                next_puzzle_hash = auction_puzzle_hash(
+                    launcher_id,
+                    spend.mod_hash,
+                    spend.creator_puzhash,
+                    spend.end_height,
+                    spend.new_bidder_puzhash_or_p2_auction_id,
+                )
+                new_bids.append(
+                    Bid(
+                        bytes(coin.name()),
+                        record.spent_block_index,
+                        spend.new_bidder_puzhash_or_p2_auction_id,
+                        spend.new_bid_amount,
+                    )
+                )
+                state.lineage_proof = [bytes(coin.parent_coin_info), inner_puzzle_hash, coin.amount]
+                state.current_coin = Coin(coin.name(), next_puzzle_hash, spend.new_bid_amount + 1)
+                state.highest_bidder_puzhash = spend.new_bidder_puzhash_or_p2_auction_id
+                state.highest_bid = spend.new_bid_amount
+
+            self._save(state, new_bids)
+            span_args["new_bids"] = len(new_bids)
+            return state
+
+
+@dataclass
+class RecordedCoinRecord:
+    coin: Coin
+    confirmed_block_index: int
+    spent_block_index: int
+
+
+class RecordedChain:
+    """
+    A ChainSource backed by a JSON file of coin records and spends, as written by RecordingChain.
+    Lets the indexer run against a fixed chain without a node.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    @classmethod
+    def load(cls, path: str) -> RecordedChain:
+        with open(path) as filehandle:
+            return cls(json.load(filehandle))
+
+    async def get_coin_record_by_name(self, coin_id: bytes32) -> Optional[RecordedCoinRecord]:
+        record = self.data.get("coin_records", {}).get(coin_id.hex())
+        if record is None:
+            return None
+        return RecordedCoinRecord(
+            coin_from_json(record["coin"]), record["confirmed_block_index"], record["spent_block_index"]
+        )
+
+    async def get_puzzle_and_solution(self, coin_id: bytes32, height: int) -> Optional[CoinSpend]:
+        from chia.types.coin_spend import CoinSpend
+
+        coin_spend = self.data.get("coin_spends", {}).get(coin_id.hex())
+        return None if coin_spend is None else CoinSpend.from_json_dict(coin_spend)
+
+
+class RecordingChain:
+    """Forwards to a real ChainSource and records every answer, so a sync can be replayed with RecordedChain."""
+
+    def __init__(self, chain: ChainSource):
+        self.chain = chain
+        self.data: Dict[str, Dict[str, Any]] = {"coin_records": {}, "coin_spends": {}}
+
+    async def get_coin_record_by_name(self, coin_id: bytes32) -> Optional[CoinRecord]:
+        record = await self.chain.get_coin_record_by_name(coin_id)
+        if record is not None:
+            self.data["coin_records"][coin_id.hex()] = {
+                "coin": record.coin.to_json_dict(),
+                "confirmed_block_index": int(record.confirmed_block_index),
+                "spent_block_index": int(record.spent_block_index),
+            }
+        return record
+
+    async def get_puzzle_and_solution(self, coin_id: bytes32, height: int) -> Optional[CoinSpend]:
+        coin_spend = await self.chain.get_puzzle_and_solution(coin_id, height)
+        if coin_spend is not None:
+            self.data["coin_spends"][coin_id.hex()] = coin_spend.to_json_dict()
+        return coin_spend
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as filehandle:
+            json.dump(self.data, filehandle, sort_keys=True, indent=4)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from workshop import trace
+from workshop.config import get_constants, get_tx_config
+from workshop.cost import SpendCost, spend_cost
+from workshop.fees import WALLET_TX_COST, FeeQuote, coin_spends_cost, quote_fee, report_fee
+from workshop.operations import Log
+from workshop.signing import get_wallet_keys, sign_spends, verify_spend_bundle
+from workshop.tracking import PushedBundle
+from workshop.utils import load_program
+
+if TYPE_CHECKING:
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.types.coin_spend import CoinSpend
+
+# The mempool rejects single spend bundles above half of the maximum block cost
+MEMPOOL_COST_FRACTION = 0.5
+
+
+@dataclass
+class PlannedSpend:
+    line: int
+    coin_spend: CoinSpend
+    cost: SpendCost
+
+
+def per_second(count: int, seconds: float) -> float:
+    return count / max(seconds, 1e-9)
+
+
+def read_manifest(manifest: str) -> List[Dict[str, Any]]:
+    # One spend per line: {"parent_id": "0x..", "amount": 1, "puzzle": "clsp/x.clsp", "solution": "(..)"}
+    entries = []
+    with open(manifest) as filehandle:
+        for line in filehandle:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entries.append(json.loads(line))
+    return entries
+
+
+def plan_spends(entries: List[Dict[str, Any]], log: Log) -> Optional[List[PlannedSpend]]:
+    """Runs every spend locally, so a broken manifest fails before anything is signed or pushed."""
+    from cdv.cmds.util import parse_program
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.condition_opcodes import ConditionOpcode
+    from chia.util.byte_types import hexstr_to_bytes
+    from chia_rs import Coin
+
+    max_cost = get_constants().MAX_BLOCK_COST_CLVM
+    planned = []
+    failed = False
+    for line, entry in enumerate(entries, start=1):
+        puzzle = load_program(entry["puzzle"])
+        if puzzle is None:
+            log(f"Line {line}: couldn't build {entry['puzzle']}")
+            failed = True
+            continue
+        solution = parse_program(entry.get("solution", "()"))
+        amount = int(entry.get("amount", 1))
+        try:
+            cost = spend_cost(puzzle, solution, max_cost)
+        except Exception as e:
+            log(f"Line {line}: failed to run puzzle with this solution: {e}")
+            failed = True
+            continue
+
+        created_amount = sum(
+            int.from_bytes(condition.vars[1], "big")
+            for condition in cost.conditions
+            if condition.opcode == ConditionOpcode.CREATE_COIN
+        )
+        if created_amount > amount:
+            # Funding missing mojos needs a wallet transaction per spend, use `spend-coin` for those
+            log(f"Line {line}: creates {created_amount} mojos but the coin only has {amount}")
+            failed = True
+            continue
+
+        coin = Coin(hexstr_to_bytes(entry["parent_id"]), puzzle.get_tree_hash(), amount)
+        planned.append(PlannedSpend(line, CoinSpend(coin, puzzle, solution), cost))
+    return None if failed else planned
+
+
+def chunk_by_cost(planned: List[PlannedSpend], max_cost: int) -> List[List[PlannedSpend]]:
+    chunks: List[List[PlannedSpend]] = []
+    chunk_cost = 0
+    for spend in planned:
+        if spend.cost.total > max_cost:
+            raise ValueError(f"Line {spend.line}: cost {spend.cost.total} exceeds the bundle cost limit {max_cost}")
+        if not chunks or chunk_cost + spend.cost.total > max_cost:
+            chunks.append([])
+            chunk_cost = 0
+        chunks[-1].append(spend)
+        chunk_cost += spend.cost.total
+    return chunks
+
+
+async def spend_batch(
+    wallet_client: WalletRpcClient,
+    manifest: str,
+    log: Log,
+    max_bundle_cost: Optional[int] = None,
+    fee: Optional[int] = None,
+    push: bool = True,
+    jobs: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    from chia.types.spend_bundle import SpendBundle
+    from chia.util.bech32m import decode_puzzle_hash
+
+    constants = get_constants()
+    # Leave room for the fee transaction in every bundle
+    max_bundle_cost = max_bundle_cost or int(constants.MAX_BLOCK_COST_CLVM * MEMPOOL_COST_FRACTION * 0.9)
+
+    start = time.perf_counter()
+    entries = read_manifest(manifest)
+    planned = plan_spends(entries, log)
+    if planned is None:
+        return None
+    if not planned:
+        log("Nothing to spend")
+        return None
+    run_seconds = time.perf_counter() - start
+    log(f"Ran {len(planned)} spends in {run_seconds:.2f} s ({per_second(len(planned), run_seconds):.0f} spends/s)")
+
+    chunks = chunk_by_cost(planned, max_bundle_cost)
+
+    keys = await get_wallet_keys(wallet_client)
+    sign_start = time.perf_counter()
+    bundles = [await sign_spends([spend.coin_spend for spend in chunk], keys, jobs) for chunk in chunks]
+    sign_seconds = time.perf_counter() - sign_start
+    log(f"Signed {len(planned)} spends in {sign_seconds:.2f} s ({per_second(len(planned), sign_seconds):.0f} spends/s)")
+
+    costs = [sum(spend.cost.total for spend in chunk) for chunk in chunks]
+    # With an explicit --fee, one wallet transaction in the first bundle pays for the whole batch. Otherwise
+    # every bundle is priced by its own cost, since the mempool ranks bundles by their fee per cost.
+    if fee is not None:
+        fees = [fee] + [0] * (len(bundles) - 1)
+        quotes = [FeeQuote(sum(costs), fee, "--fee")] * len(bundles)
+    else:
+        quotes = [await quote_fee(cost + WALLET_TX_COST) for cost in costs]
+        fees = [quote.fee for quote in quotes]
+    bundle_costs = list(costs)
+    if any(fees):
+        my_address = await wallet_client.get_next_address(1, False)
+        for index, bundle_fee in enumerate(fees):
+            if bundle_fee > 0:
+                fee_tx = await wallet_client.create_signed_transaction(
+                    [{"amount": 0, "puzzle_hash": decode_puzzle_hash(my_address)}],
+                    get_tx_config(),
+                    fee=bundle_fee,
+                )
+                bundles[index] = SpendBundle.aggregate([bundles[index], fee_tx.spend_bundle])
+                bundle_costs[index] += coin_spends_cost(fee_tx.spend_bundle.coin_spends)
+
+    for index, bundle in enumerate(bundles):
+        error = verify_spend_bundle(bundle)
+        if error is not None:
+            log(f"Bundle {index + 1}/{len(bundles)} would be rejected, not pushing anything: {error}")
+            return None
+
+    results = []
+    pushed = []
+    push_start = time.perf_counter()
+    for index, (bundle, cost) in enumerate(zip(bundles, costs)):
+        log(f"Bundle {index + 1}/{len(bundles)}: {len(bundle.coin_spends)} spends, cost {cost}, id {bundle.name()}")
+        report_fee(log, bundle_costs[index], fees[index], quotes[index])
+        trace.counter("spend_bundle", bytes=len(bytes(bundle)), coin_spends=len(bundle.coin_spends), cost=cost)
+        if push:
+            pushed.append(PushedBundle.from_spend_bundle(bundle, "spend_batch"))
+            results.append(await wallet_client.push_tx(bundle))
+    push_seconds = time.perf_counter() - push_start
+
+    total_seconds = time.perf_counter() - start
+    if push:
+        log(f"Pushed {len(bundles)} bundles in {push_seconds:.2f} s")
+    log(
+        f"Total: {len(planned)} spends in {total_seconds:.2f} s "
+        f"({per_second(len(planned), total_seconds):.0f} spends/s)"
+    )
+    return {
+        "spends": len(planned),
+        "bundles": [bundle.name().hex() for bundle in bundles],
+        "costs": costs,
+        "fees": [int(bundle_fee) for bundle_fee in fees],
+        "push_results": results,
+        "pushed": [bundle.to_json_dict() for bundle in pushed],
+        "seconds": {"run": run_seconds, "sign": sign_seconds, "push": push_seconds, "total": total_seconds},
+    }
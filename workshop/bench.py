@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from workshop.config import get_constants
+from workshop.cost import SpendCost, spend_cost
+from workshop.operations import Log
+from workshop.utils import load_program
+
+if TYPE_CHECKING:
+    from chia.types.blockchain_format.program import Program
+    from chia.types.blockchain_format.sized_bytes import bytes32
+    from chia.types.condition_with_args import ConditionWithArgs
+
+DEFAULT_CORPUS = "clsp/bench.json"
+DEFAULT_BASELINE = "clsp/bench-baseline.json"
+
+# The corpus maps puzzle files to solution cases:
+#
+#     {"clsp/5-auction.clsp": [{"name": "bid", "curry": ["$MOD_HASH", "0x..", "100", "0x.."], "solution": "(..)"}]}
+#
+# `curry` is optional. Its entries and the solution are CLVM source, so `100` is the number and `0x..` the bytes,
+# and the placeholders below are replaced by their values before parsing.
+
+
+def placeholders(puzzle: Program, puzzle_hash: Optional[bytes32] = None) -> Dict[str, str]:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import SINGLETON_LAUNCHER_HASH, SINGLETON_MOD_HASH
+
+    return {
+        "$MOD_HASH": "0x" + (puzzle.get_tree_hash() if puzzle_hash is None else puzzle_hash).hex(),
+        "$SINGLETON_MOD_HASH": "0x" + SINGLETON_MOD_HASH.hex(),
+        "$SINGLETON_LAUNCHER_HASH": "0x" + SINGLETON_LAUNCHER_HASH.hex(),
+    }
+
+
+def substitute(value: str, values: Dict[str, str]) -> str:
+    # Longest first, so `$MOD_HASH` doesn't replace the tail of `$SINGLETON_MOD_HASH`
+    for name in sorted(values, key=len, reverse=True):
+        value = value.replace(name, values[name])
+    return value
+
+
+@dataclass
+class CaseResult:
+    key: str
+    cost: Optional[SpendCost] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+    regressions: List[str] = field(default_factory=list)
+
+    def to_baseline(self) -> Dict[str, int]:
+        assert self.cost is not None
+        return {
+            "cost": self.cost.total,
+            "clvm_cost": self.cost.clvm_cost,
+            "condition_cost": self.cost.condition_cost,
+            "byte_cost": self.cost.byte_cost,
+        }
+
+
+def parse_value(value: str) -> Program:
+    # Unlike `parse_program`, which reads anything without parentheses as serialized CLVM
+    from chia.types.blockchain_format.program import Program
+    from clvm_tools.binutils import assemble
+
+    return Program.to(assemble(value))
+
+
+def run_case(puzzle: Program, case: Dict[str, Any], runs: int, puzzle_hash: Optional[bytes32] = None) -> CaseResult:
+    key = case["name"]
+    values = placeholders(puzzle, puzzle_hash)
+    try:
+        curried = puzzle
+        if case.get("curry"):
+            curried = puzzle.curry(*[parse_value(substitute(arg, values)) for arg in case["curry"]])
+        solution = parse_value(substitute(case.get("solution", "()"), values))
+        max_cost = get_constants().MAX_BLOCK_COST_CLVM
+        timings = []
+        cost = None
+        for _ in range(max(runs, 1)):
+            start = time.perf_counter()
+            cost = spend_cost(curried, solution, max_cost)
+            timings.append(time.perf_counter() - start)
+        return CaseResult(key, cost, statistics.median(timings))
+    except Exception as e:
+        return CaseResult(key, error=str(e))
+
+
+def compare(result: CaseResult, baseline: Optional[Dict[str, int]], tolerance: float) -> None:
+    if baseline is None:
+        return
+    if result.cost is None:
+        result.regressions.append("fails, but has a baseline")
+        return
+    for name, value in result.to_baseline().items():
+        if name in baseline and value > baseline[name] * (1 + tolerance):
+            result.regressions.append(f"{name} {baseline[name]} -> {value}")
+
+
+def condition_name(condition: ConditionWithArgs) -> str:
+    from chia.types.condition_opcodes import ConditionOpcode
+
+    try:
+        return ConditionOpcode(condition.opcode).name
+    except ValueError:
+        return str(int.from_bytes(condition.opcode, "big"))
+
+
+def format_conditions(cost: SpendCost) -> List[str]:
+    return [
+        f"      {condition_name(condition):<28} {condition_cost:>12}"
+        for condition, condition_cost in zip(cost.conditions, cost.condition_costs)
+    ]
+
+
+def bench(
+    log: Log,
+    corpus: str = DEFAULT_CORPUS,
+    baseline_file: str = DEFAULT_BASELINE,
+    runs: int = 10,
+    tolerance: float = 0.0,
+    save_baseline: bool = False,
+) -> List[CaseResult]:
+    with open(corpus) as filehandle:
+        cases_by_puzzle: Dict[str, List[Dict[str, Any]]] = json.load(filehandle)
+    baseline: Dict[str, Dict[str, int]] = {}
+    if Path(baseline_file).exists():
+        with open(baseline_file) as filehandle:
+            baseline = json.load(filehandle)
+
+    results = []
+    for file, cases in cases_by_puzzle.items():
+        puzzle = load_program(file)
+        for case in cases:
+            if puzzle is None:
+                result = CaseResult(case["name"], error=f"Couldn't build {file}")
+            else:
+                result = run_case(puzzle, case, runs)
+            result.key = f"{file}:{case['name']}"
+            compare(result, baseline.get(result.key), tolerance)
+            results.append(result)
+
+            if result.cost is None:
+                log(f"{result.key}: failed: {result.error}")
+            else:
+                log(
+                    f"{result.key}: cost {result.cost.total} (clvm {result.cost.clvm_cost}, "
+                    f"conditions {result.cost.condition_cost}, bytes {result.cost.byte_cost}), "
+                    f"{result.seconds * 1_000_000:.0f} us"
+                )
+                for line in format_conditions(result.cost):
+                    log(line)
+            for regression in result.regressions:
+                log(f"    REGRESSION: {regression}")
+
+    if save_baseline:
+        new_baseline = {result.key: result.to_baseline() for result in results if result.cost is not None}
+        with open(baseline_file, "w") as filehandle:
+            json.dump(new_baseline, filehandle, sort_keys=True, indent=4)
+            filehandle.write("\n")
+        log(f"Saved baseline for {len(new_baseline)} cases to {baseline_file}")
+    return results
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from workshop import trace
+from workshop.auction_index import AuctionIndex, AuctionState, ChainSource
+from workshop.config import get_constants, get_tx_config
+from workshop.fees import FeeQuote, coin_spends_cost, quote_fee_for, report_fee
+from workshop.operations import Confirm, Log, trace_spend_bundle
+from workshop.pipeline import Pipeline
+from workshop.puzzle_hash import auction_puzzle_hash
+from workshop.tracking import PushedBundle
+from workshop.utils import load_program, load_program_hash
+
+if TYPE_CHECKING:
+    from chia.rpc.full_node_rpc_client import FullNodeRpcClient
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.types.blockchain_format.program import Program
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.spend_bundle import SpendBundle
+
+# Bidding on 5-auction.clsp. Everything that doesn't need the latest chain state (the compiled auction puzzle,
+# the bidder address, the funding transaction for the current auction coin) is prepared before the bid is
+# pushed, so the hot path is a single push_tx to the full node. When another bid wins the race for the auction
+# coin, the engine follows the auction to its new coin and pushes a rebuilt bid.
+
+AUCTION_PUZZLE = "clsp/5-auction.clsp"
+
+# Errors from the full node meaning the auction coin was spent by someone else, in a block or in the mempool
+CONFLICT_ERRORS = ("DOUBLE_SPEND", "MEMPOOL_CONFLICT", "UNKNOWN_UNSPENT", "ASSERT_MY_AMOUNT_FAILED")
+
+
+class BidRejected(Exception):
+    pass
+
+
+@dataclass
+class PreparedBid:
+    state: AuctionState
+    amount: int
+    bidder_puzhash: bytes
+    next_puzzle_hash: bytes
+    spend_bundle: SpendBundle
+
+
+def next_bid_amount(state: AuctionState) -> int:
+    # Bids have to be even and higher than the amount of the auction coin, which is the highest bid plus one
+    return state.current_coin.amount + 1
+
+
+def is_conflict(error: Exception) -> bool:
+    return any(name in str(error) for name in CONFLICT_ERRORS)
+
+
+def auction_coin_spend(launcher_id: bytes, state: AuctionState, inner_solution: Program) -> CoinSpend:
+    """The spend of the current auction coin with `inner_solution` for 5-auction.clsp (a bid or the claim)."""
+    from chia.types.coin_spend import CoinSpend
+    from chia.util.ints import uint64
+    from chia.wallet.lineage_proof import LineageProof
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_for_singleton, solution_for_singleton
+
+    auction_puzzle = load_program(AUCTION_PUZZLE)
+    if auction_puzzle is None:
+        raise BidRejected(f"Couldn't build {AUCTION_PUZZLE}")
+    inner_puzzle = auction_puzzle.curry(
+        state.mod_hash, state.creator_puzhash, uint64(state.end_height), state.highest_bidder_puzhash
+    )
+    full_puzzle = puzzle_for_singleton(launcher_id, inner_puzzle)
+    if len(state.lineage_proof) == 2:
+        lineage_proof = LineageProof(state.lineage_proof[0], None, uint64(state.lineage_proof[1]))
+    else:
+        lineage_proof = LineageProof(state.lineage_proof[0], state.lineage_proof[1], uint64(state.lineage_proof[2]))
+    coin = state.current_coin
+    return CoinSpend(coin, full_puzzle, solution_for_singleton(lineage_proof, uint64(coin.amount), inner_solution))
+
+
+class BidEngine:
+    def __init__(
+        self,
+        wallet_client: WalletRpcClient,
+        full_node_client: FullNodeRpcClient,
+        index: AuctionIndex,
+        launcher_id: bytes,
+        log: Log,
+        chain: Optional[ChainSource] = None,
+    ):
+        self.wallet_client = wallet_client
+        self.full_node_client = full_node_client
+        self.chain = chain or full_node_client
+        self.index = index
+        self.launcher_id = launcher_id
+        self.log = log
+        self.bidder_puzhash: Optional[bytes] = None
+        self.fee_quote: Optional[FeeQuote] = None
+
+    async def sync(self) -> AuctionState:
+        from chia.types.blockchain_format.sized_bytes import bytes32
+
+        return await self.index.sync(self.chain, bytes32(self.launcher_id))
+
+    async def get_bidder_puzhash(self) -> bytes:
+        from chia.util.bech32m import decode_puzzle_hash
+
+        if self.bidder_puzhash is None:
+            self.bidder_puzhash = decode_puzzle_hash(await self.wallet_client.get_next_address(1, False))
+        return self.bidder_puzhash
+
+    async def create_funding(self, state: AuctionState, amount: int, auction_spend: SpendBundle) -> SpendBundle:
+        """
+        Signs a wallet transaction creating a p2_conditions coin with the bid amount, and the spend of that coin
+        asserting the `$` announcement of the current auction coin. The transaction also pays the fee for the bid.
+        """
+        from blspy import G2Element
+        from chia.types.announcement import Announcement
+        from chia.types.blockchain_format.program import Program
+        from chia.types.coin_spend import CoinSpend
+        from chia.types.spend_bundle import SpendBundle
+        from chia.wallet.puzzles import p2_conditions
+        from chia.wallet.puzzles.puzzle_utils import make_assert_coin_announcement
+
+        p2_conditions_puzzle = p2_conditions.puzzle_for_conditions(
+            [make_assert_coin_announcement(Announcement(state.current_coin.name(), b"$").name())]
+        )
+        p2_conditions_puzzle_hash = p2_conditions_puzzle.get_tree_hash()
+        # The cost of a spend doesn't depend on the coin, so the funding coin is priced before it exists
+        unfunded_spend = CoinSpend(state.current_coin, p2_conditions_puzzle, Program.to(0))
+        self.fee_quote = await quote_fee_for([*auction_spend.coin_spends, unfunded_spend])
+        with trace.span("create_funding", "bid", amount=amount):
+            transaction = await self.wallet_client.create_signed_transaction(
+                [{"amount": amount, "puzzle_hash": p2_conditions_puzzle_hash}],
+                get_tx_config(),
+                fee=self.fee_quote.fee,
+            )
+        funding_coin = next(
+            coin
+            for coin in transaction.additions
+            if coin.puzzle_hash == p2_conditions_puzzle_hash and coin.amount == amount
+        )
+        p2_conditions_spend = CoinSpend(funding_coin, p2_conditions_puzzle, Program.to(0))
+        return SpendBundle.aggregate([transaction.spend_bundle, SpendBundle([p2_conditions_spend], G2Element())])
+
+    def auction_spend_bundle(self, state: AuctionState, amount: int, bidder_puzhash: bytes) -> SpendBundle:
+        from blspy import G2Element
+        from chia.types.blockchain_format.program import Program
+        from chia.types.spend_bundle import SpendBundle
+
+        inner_solution = Program.to([0, state.current_coin.amount, bidder_puzhash, amount])
+        return SpendBundle([auction_coin_spend(self.launcher_id, state, inner_solution)], G2Element())
+
+    def check(self, state: AuctionState, amount: int) -> None:
+        if state.status != "open":
+            raise BidRejected(f"Auction {self.launcher_id.hex()} is {state.status}")
+        if state.mod_hash is None:
+            # No bid was indexed yet, so the curried values are only known from the creator's bid
+            raise BidRejected("The auction has no indexed bid to read its curried values from")
+        if load_program_hash(AUCTION_PUZZLE) != state.mod_hash:
+            raise BidRejected(f"{AUCTION_PUZZLE} doesn't match the mod hash of the auction")
+        if amount % 2 or amount <= state.current_coin.amount:
+            raise BidRejected(f"Bids have to be even and at least {next_bid_amount(state)} mojos")
+
+    async def prepare(self, amount: int) -> PreparedBid:
+        """Syncs the auction and signs everything for a bid on its current coin, without pushing it."""
+        from chia.types.spend_bundle import SpendBundle
+
+        async def build_auction_spend(state: AuctionState, bidder_puzhash: bytes) -> SpendBundle:
+            self.check(state, amount)
+            auction_spend = self.auction_spend_bundle(state, amount, bidder_puzhash)
+            # Fail here rather than in the mempool if the auction rejects the bid
+            coin_spend = auction_spend.coin_spends[0]
+            try:
+                with trace.span("run_puzzle", "clvm", puzzle="auction"):
+                    coin_spend.puzzle_reveal.run_with_cost(get_constants().MAX_BLOCK_COST_CLVM, coin_spend.solution)
+            except Exception as e:
+                raise BidRejected(f"The auction rejects the bid: {e}")
+            return auction_spend
+
+        pipeline = Pipeline()
+        pipeline.step("sync", self.sync)
+        pipeline.step("get_next_address", self.get_bidder_puzhash)
+        pipeline.step("auction_spend", build_auction_spend, ["sync", "get_next_address"])
+        pipeline.step(
+            "create_funding",
+            lambda state, auction_spend: self.create_funding(state, amount, auction_spend),
+            ["sync", "auction_spend"],
+        )
+        results = await pipeline.run()
+        for line in pipeline.report():
+            self.log(line)
+
+        state: AuctionState = results["sync"]
+        bidder_puzhash: bytes = results["get_next_address"]
+        spend_bundle = SpendBundle.aggregate([results["auction_spend"], results["create_funding"]])
+        assert self.fee_quote is not None
+        report_fee(self.log, coin_spends_cost(spend_bundle.coin_spends), self.fee_quote.fee, self.fee_quote)
+        next_puzzle_hash = auction_puzzle_hash(
+            self.launcher_id, state.mod_hash, state.creator_puzhash, state.end_height, bidder_puzhash
+        )
+        return PreparedBid(state, amount, bidder_puzhash, next_puzzle_hash, spend_bundle)
+
+    async def wait_for_spend(self, state: AuctionState, timeout: float, poll_interval: float) -> None:
+        # A competing bid in the mempool can't be built upon, so wait until it is in a block (or was dropped)
+        deadline = time.monotonic() + timeout
+        with trace.span("wait_for_competing_bid", "bid"):
+            while time.monotonic() < deadline:
+                record = await self.full_node_client.get_coin_record_by_name(state.current_coin.name())
+                if record is not None and record.spent_block_index > 0:
+                    return
+                await asyncio.sleep(poll_interval)
+
+    async def lost_race(self, prepared: PreparedBid, timeout: float, poll_interval: float) -> bool:
+        """
+        Whether another bid on the same auction coin was pushed as well and made it into the block instead. The
+        auction spend isn't signed, which makes it eligible for identical spend deduplication, so the full node
+        accepts competing bids side by side without a mempool conflict and only picks one when it builds a block.
+        """
+        from chia.types.blockchain_format.sized_bytes import bytes32
+
+        coin_id = prepared.state.current_coin.name()
+        response = await self.full_node_client.get_mempool_items_by_coin_name(coin_id)
+        names = {bytes32.from_hexstr(item["spend_bundle_name"]) for item in response.get("mempool_items", [])}
+        if not names - {prepared.spend_bundle.name()}:
+            return False
+        self.log(f"Another bid on auction coin {coin_id.hex()} is in the mempool, waiting for the next block...")
+        await self.wait_for_spend(prepared.state, timeout, poll_interval)
+        state = await self.sync()
+        return state.current_coin != prepared.state.current_coin and (
+            state.current_coin.puzzle_hash != prepared.next_puzzle_hash
+        )
+
+    async def bid(
+        self,
+        amount: int,
+        confirm: Confirm,
+        max_amount: Optional[int] = None,
+        retries: int = 5,
+        conflict_timeout: float = 120.0,
+        poll_interval: float = 1.0,
+    ) -> Optional[Dict[str, Any]]:
+        prepared = await self.prepare(amount)
+        confirm(
+            f"Do you want to bid {amount} mojos? The highest bid is {prepared.state.highest_bid} mojos "
+            f"(auction coin {prepared.state.current_coin.name().hex()})"
+        )
+
+        latencies: List[float] = []
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            trace_spend_bundle(prepared.spend_bundle)
+            pushed = PushedBundle.from_spend_bundle(prepared.spend_bundle, "auction_bid")
+            push_start = time.perf_counter()
+            try:
+                with trace.span("push_bid", "bid", attempt=attempt):
+                    result = await self.full_node_client.push_tx(prepared.spend_bundle)
+            except ValueError as e:
+                if not is_conflict(e):
+                    self.log(f"Bid rejected: {e}")
+                    return None
+                result = {"status": "FAILED", "error": str(e)}
+            latency = time.perf_counter() - push_start
+            # push_tx only raises for FAILED. A bid conflicting with another bid in the mempool comes back
+            # PENDING and waits in the conflict cache, so it lost the race just the same
+            if result.get("status") != "SUCCESS" or await self.lost_race(prepared, conflict_timeout, poll_interval):
+                latencies.append(latency)
+                if attempt == retries:
+                    self.log(f"Bid rejected: {result.get('error', result.get('status'))}")
+                    return None
+                self.log(f"Lost the race for auction coin {prepared.state.current_coin.name().hex()}, rebuilding...")
+                await self.wait_for_spend(prepared.state, conflict_timeout, poll_interval)
+                state = await self.sync()
+                if amount <= state.current_coin.amount:
+                    amount = next_bid_amount(state)
+                    if max_amount is None or amount > max_amount:
+                        self.log(f"Outbid: the highest bid is now {state.highest_bid} mojos")
+                        return None
+                    self.log(f"Raising the bid to {amount} mojos")
+                prepared = await self.prepare(amount)
+                continue
+
+            self.log(f"Bid of {amount} mojos in the mempool after {latency * 1000:.1f} ms")
+            if attempt:
+                self.log(
+                    f"  {attempt} rebuild{'s' if attempt != 1 else ''}, "
+                    f"{(time.perf_counter() - start) * 1000:.1f} ms since the first push"
+                )
+            return {
+                "push_result": result,
+                "pushed": pushed.to_json_dict(),
+                "amount": amount,
+                "attempts": attempt + 1,
+                "bid_to_mempool_ms": latency * 1000,
+                "total_ms": (time.perf_counter() - start) * 1000,
+                "rejected_push_ms": [seconds * 1000 for seconds in latencies],
+                "auction_coin_id": prepared.state.current_coin.name().hex(),
+                "next_puzzle_hash": prepared.next_puzzle_hash.hex(),
+                "bidder_puzhash": prepared.bidder_puzhash.hex(),
+            }
+        return None
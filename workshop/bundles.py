@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from chia.types.spend_bundle import SpendBundle
+
+    from workshop.operations import Log
+
+# Writing spend bundles out and reading them back for `chiwo push`. Besides the indented JSON the commands always
+# printed, bundles can be written as compact JSON, as the serialized bytes, or as JSON lines: the aggregated
+# signature first, then one coin spend per line, so large bundles never become one big string.
+
+OUTPUT_FORMATS = ("pretty", "compact", "bytes", "jsonl", "none")
+
+
+def compact(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def spend_bundle_lines(spend_bundle: SpendBundle, output: str) -> Iterator[str]:
+    if output == "pretty":
+        yield json.dumps(spend_bundle.to_json_dict(), sort_keys=True, indent=4)
+    elif output == "compact":
+        yield compact(spend_bundle.to_json_dict())
+    elif output == "bytes":
+        yield bytes(spend_bundle).hex()
+    elif output == "jsonl":
+        yield compact({"aggregated_signature": "0x" + bytes(spend_bundle.aggregated_signature).hex()})
+        for coin_spend in spend_bundle.coin_spends:
+            yield compact(coin_spend.to_json_dict())
+    elif output != "none":
+        raise ValueError(f"Unknown output format {output}, use one of {', '.join(OUTPUT_FORMATS)}")
+
+
+def emit_spend_bundle(spend_bundle: SpendBundle, log: Log, output: str = "pretty", path: Optional[str] = None) -> None:
+    """Logs the spend bundle in the `output` format, or writes it to `path` (raw bytes for "bytes")."""
+    if output == "none":
+        return
+    if path is None:
+        log("Spend Bundle:")
+        for line in spend_bundle_lines(spend_bundle, output):
+            log(line)
+        return
+    if output == "bytes":
+        with open(path, "wb") as binary_filehandle:
+            binary_filehandle.write(bytes(spend_bundle))
+    else:
+        with open(path, "w") as filehandle:
+            for line in spend_bundle_lines(spend_bundle, output):
+                filehandle.write(line + "\n")
+    log(f"Spend bundle written to {path}")
+
+
+def load_spend_bundle(path: str) -> SpendBundle:
+    """Reads a spend bundle in any of the output formats, telling them apart by their content."""
+    from blspy import G2Element
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.spend_bundle import SpendBundle
+
+    with open(path, "rb") as filehandle:
+        data = filehandle.read()
+    # A serialized bundle starts with the big endian number of coin spends, never with text
+    text = data.lstrip()
+    if not text.startswith(b"{"):
+        try:
+            return SpendBundle.from_bytes(bytes.fromhex(text.decode().strip()))
+        except (UnicodeDecodeError, ValueError):
+            return SpendBundle.from_bytes(data)
+    try:
+        return SpendBundle.from_json_dict(json.loads(text))
+    except json.JSONDecodeError:
+        pass
+    lines = [json.loads(line) for line in text.splitlines() if line.strip()]
+    signature = G2Element.from_bytes(bytes.fromhex(lines[0]["aggregated_signature"].replace("0x", "")))
+    return SpendBundle([CoinSpend.from_json_dict(line) for line in lines[1:]], signature)
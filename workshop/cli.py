@@ -2,58 +2,22 @@ from __future__ import annotations
 
 import asyncio
 import json
-from pprint import pprint
-from typing import Optional, Dict
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
 
-import aiohttp
 import click
-from blspy import PrivateKey, G1Element, G2Element
-from cdv.cmds.util import parse_program
-from chia.cmds.cmds_util import CMDTXConfigLoader
-from chia.consensus.default_constants import DEFAULT_CONSTANTS
-from chia.rpc.wallet_rpc_client import WalletRpcClient
-from chia.types.announcement import Announcement
-from chia.types.blockchain_format.program import Program
-from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.types.coin_spend import CoinSpend
-from chia.types.condition_opcodes import ConditionOpcode
-from chia.types.spend_bundle import SpendBundle
-from chia.util.bech32m import encode_puzzle_hash, decode_puzzle_hash
-from chia.util.byte_types import hexstr_to_bytes
-from chia.util.condition_tools import parse_sexp_to_conditions
-from chia.util.config import load_config, selected_network_address_prefix
-from chia.util.default_root import DEFAULT_ROOT_PATH
-from chia.util.ints import uint16, uint32, uint64
-from chia.wallet.puzzles import p2_conditions
-from chia.wallet.puzzles.puzzle_utils import make_assert_coin_announcement
-from chia.wallet.puzzles.singleton_top_layer_v1_1 import (
-    generate_launcher_coin,
-    SINGLETON_LAUNCHER,
-    SINGLETON_MOD,
-    SINGLETON_MOD_HASH,
-    SINGLETON_LAUNCHER_HASH,
-    solution_for_singleton,
-    puzzle_for_singleton,
-    lineage_proof_for_coinsol,
-)
-from chia.wallet.sign_coin_spends import sign_coin_spends
-from chia.wallet.transaction_record import TransactionRecord
-from chia_rs import Coin
-from clvm_tools.binutils import disassemble
 
-from workshop.utils import build
+from workshop import operations
+from workshop.bundles import OUTPUT_FORMATS
+from workshop.rpc import wallet_client_session
+from workshop.utils import build_all
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
-config = load_config(DEFAULT_ROOT_PATH, "config.yaml")
-selected_network = config["wallet"]["selected_network"]
-overrides = config["wallet"]["network_overrides"]["constants"][selected_network]
-constants = DEFAULT_CONSTANTS.replace_str_to_bytes(**overrides)
-
-fee = uint64(5_000_000 if selected_network == "testnet10" else 0)
-tx_config = CMDTXConfigLoader(
-    reuse_puzhash=True,
-).to_tx_config(1, config, -1)
+# chia and its dependencies are imported inside the commands that need them, so `chiwo --help` and
+# offline commands start without loading the wallet, consensus and singleton modules.
 
 
 def monkey_patch_click() -> None:
@@ -76,40 +40,90 @@ def monkey_patch_click() -> None:
     help="\n  Command Line Interface for the Chialisp workshop \n",
     context_settings=CONTEXT_SETTINGS,
 )
+@click.option(
+    "--daemon",
+    help="Forward wallet commands to a running `chiwo serve` (unix socket path or http:// URL)",
+    envvar="CHIWO_DAEMON",
+)
+@click.option(
+    "--trace",
+    "trace_file",
+    help="Record timed spans for compilation, CLVM runs, signing and wallet RPCs as a Chrome trace "
+    "(.json) or JSON lines (.jsonl)",
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--fee-per-cost",
+    help="Price fees at this many mojos per unit of cost instead of the flat network fee",
+    type=float,
+    envvar="CHIWO_FEE_PER_COST",
+)
+@click.option(
+    "--fee-estimate",
+    "fee_estimate_seconds",
+    help="Price fees with the full node's fee estimate for inclusion within this many seconds",
+    type=int,
+    metavar="SECONDS",
+)
 @click.pass_context
-def cli(ctx: click.Context) -> None:
+def cli(
+    ctx: click.Context,
+    daemon: Optional[str],
+    trace_file: Optional[str],
+    fee_per_cost: Optional[float],
+    fee_estimate_seconds: Optional[int],
+) -> None:
+    from workshop import fees
+
     ctx.ensure_object(dict)
+    ctx.obj["daemon"] = daemon
+    fees.configure(fee_per_cost, fee_estimate_seconds)
+    if trace_file:
+        from workshop import trace
 
+        tracer = trace.enable()
+        ctx.call_on_close(lambda: tracer.write(trace_file))
 
-# Loading the client requires the standard chia root directory configuration that all of the chia commands rely on
-async def get_wallet_client() -> Optional[WalletRpcClient]:
-    try:
-        self_hostname = config["self_hostname"]
-        wallet_rpc_port = config["wallet"]["rpc_port"]
-        wallet_client: Optional[WalletRpcClient] = await WalletRpcClient.create(
-            self_hostname, uint16(wallet_rpc_port), DEFAULT_ROOT_PATH, config
-        )
-        return wallet_client
-    except Exception as e:
-        if isinstance(e, aiohttp.ClientConnectorError):
-            pprint(f"Connection error. Check if wallet is running at {wallet_rpc_port}")
-        else:
-            pprint(f"Exception from 'harvester' {e}")
-        return None
+
+def forward_to_daemon(ctx: click.Context, command: str, request: Dict[str, Any]) -> Any:
+    from workshop.daemon import forward
+
+    response = asyncio.get_event_loop().run_until_complete(forward(ctx.obj["daemon"], command, request))
+    for line in response.get("log", []):
+        print(line)
+    if "error" in response:
+        print(response["error"])
+        sys.exit(1)
+    return response.get("result")
+
+
+def daemon_path(value: str) -> str:
+    # The daemon resolves relative paths against its own working directory, program literals are sent as they are
+    return os.path.abspath(value) if os.path.exists(value) else value
+
+
+def wait_for_pushed(pushed: List[Dict[str, Any]], **kwargs: Any) -> None:
+    from workshop.tracking import PushedBundle, wait_for_confirmations
+
+    confirmations = asyncio.get_event_loop().run_until_complete(
+        wait_for_confirmations([PushedBundle.from_json_dict(bundle) for bundle in pushed], print, **kwargs)
+    )
+    print(json.dumps([confirmation.to_json_dict() for confirmation in confirmations], sort_keys=True, indent=4))
+    if any(confirmation.status != "confirmed" for confirmation in confirmations):
+        sys.exit(1)
 
 
 @cli.command("status", short_help="Gets the status of the wallet (get_sync_status)")
-def status_cmd():
+@click.pass_context
+def status_cmd(ctx: click.Context):
+    if ctx.obj["daemon"]:
+        print(json.dumps(forward_to_daemon(ctx, "status", {}), sort_keys=True, indent=4))
+        return
+
     async def do_command():
-        try:
-            wallet_client: WalletRpcClient = await get_wallet_client()
-            state: Dict = await wallet_client.fetch("get_sync_status", {})
-            height: uint32 = await wallet_client.get_height_info()
-            state["height"] = height
+        async with wallet_client_session() as wallet_client:
+            state = await operations.status(wallet_client)
             print(json.dumps(state, sort_keys=True, indent=4))
-        finally:
-            wallet_client.close()
-            await wallet_client.await_closed()
 
     asyncio.get_event_loop().run_until_complete(do_command())
 
@@ -118,17 +132,13 @@ def status_cmd():
 @click.option("-f", "--fingerprint", help="The wallet fingerprint to use")
 def get_public_key_cmd(fingerprint: Optional[str]):
     async def do_command():
-        try:
-            wallet_client: WalletRpcClient = await get_wallet_client()
+        async with wallet_client_session() as wallet_client:
             fingerprint_to_use = fingerprint
             if not fingerprint_to_use:
                 public_keys = await wallet_client.get_public_keys()
                 fingerprint_to_use = public_keys[0]
             private_key: Dict = await wallet_client.get_private_key(fingerprint_to_use)
             print("Public Key: 0x" + private_key.get("pk"))
-        finally:
-            wallet_client.close()
-            await wallet_client.await_closed()
 
     asyncio.get_event_loop().run_until_complete(do_command())
 
@@ -136,34 +146,28 @@ def get_public_key_cmd(fingerprint: Optional[str]):
 @cli.command("create-coin", short_help="Creates a coin with a given puzzle file (i.e mypuz.clsp or ./puzzles/*.clsp)")
 @click.argument("file", required=True, default=None)
 @click.option("-a", "--amount", help="The amount in mojos to send to the new coin", default=1)
-def create_coin_cmd(file: str, amount: int):
-    async def do_command():
-        is_built = build(file)
-        if is_built:
-            puzzle_hash = parse_program(file + ".hex", "clsp/include").get_tree_hash()
-            prefix = selected_network_address_prefix(config)
-            address = encode_puzzle_hash(puzzle_hash, prefix)
+@click.pass_context
+def create_coin_cmd(ctx: click.Context, file: str, amount: int):
+    if ctx.obj["daemon"]:
+        click.confirm(
+            f"Do you want to send {amount} mojo{'s' if amount > 1 else ''} to the puzzle in {file}?",
+            abort=True,
+        )
+        additions = forward_to_daemon(ctx, "create_coin", {"file": daemon_path(file), "amount": amount, "yes": True})
+        print(json.dumps(additions, sort_keys=True, indent=4))
+        return
 
+    async def do_command():
+        address = operations.puzzle_address(file)
+        if address is not None:
             click.confirm(
                 f"Do you want to send {amount} mojo{'s' if amount > 1 else ''} to your puzzle hash {address})?",
                 abort=True,
             )
 
-            try:
-                wallet_client: WalletRpcClient = await get_wallet_client()
-                transaction: TransactionRecord = await wallet_client.send_transaction(
-                    1,
-                    uint64(amount),
-                    address,
-                    CMDTXConfigLoader(
-                        reuse_puzhash=True,
-                    ).to_tx_config(1, config, -1),
-                    fee,
-                )
-                print(json.dumps(transaction.to_json_dict().get("additions"), sort_keys=True, indent=4))
-            finally:
-                wallet_client.close()
-                await wallet_client.await_closed()
+            async with wallet_client_session() as wallet_client:
+                additions = await operations.create_coin(wallet_client, address, amount)
+                print(json.dumps(additions, sort_keys=True, indent=4))
 
     asyncio.get_event_loop().run_until_complete(do_command())
 
@@ -173,118 +177,148 @@ def create_coin_cmd(file: str, amount: int):
 @click.option("-a", "--amount", required=True, default=1)
 @click.option("--puzzle", required=True, default=None)
 @click.option("--solution", required=True, default="()")
-def spend_coin_cmd(parentid: str, amount: int, puzzle: str, solution: str):
-    async def do_command():
-        is_built = True if puzzle.endswith(".hex") else build(puzzle)
-        if is_built:
-            parsed_puzzle = parse_program(puzzle if puzzle.endswith(".hex") else puzzle + ".hex", "clsp/include")
-            parsed_solution = parse_program(solution)
+@click.option(
+    "--output",
+    "output_format",
+    help="How to print the spend bundle: indented or compact JSON, serialized bytes, one coin spend per line, or not",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="pretty",
+)
+@click.option("--save-bundle", help="Write the spend bundle to this file instead of printing it (see `chiwo push`)")
+@click.option("--wait", help="Wait until the spend bundle is confirmed and record its latency", is_flag=True)
+@click.pass_context
+def spend_coin_cmd(
+    ctx: click.Context,
+    parentid: str,
+    amount: int,
+    puzzle: str,
+    solution: str,
+    output_format: str,
+    save_bundle: Optional[str],
+    wait: bool,
+):
+    if ctx.obj["daemon"]:
+        request = {
+            "parent_id": parentid,
+            "amount": amount,
+            "puzzle": daemon_path(puzzle),
+            "solution": solution,
+            "output": output_format,
+            "save_bundle": save_bundle and os.path.abspath(save_bundle),
+        }
+        result = forward_to_daemon(ctx, "spend_coin", request)
+    else:
+
+        async def do_command():
+            async with wallet_client_session() as wallet_client:
+                return await operations.spend_coin(
+                    wallet_client, parentid, amount, puzzle, solution, print, output_format, save_bundle
+                )
 
-            missing_mojos = 0
-            try:
-                print("Trying to run the puzzle with this solution...")
-                result = parsed_puzzle.run(parsed_solution)
-                print("Resulting conditions: " + disassemble(result))
+        result = asyncio.get_event_loop().run_until_complete(do_command())
+    if result is not None:
+        print(json.dumps(result, sort_keys=True, indent=4))
+        if wait:
+            wait_for_pushed([result["pushed"]])
 
-                conditions = parse_sexp_to_conditions(result)
-                created_amount = 0
-                for condition in conditions:
-                    if condition.opcode == ConditionOpcode.CREATE_COIN:
-                        created_amount = created_amount + int.from_bytes(condition.vars[1])
 
-                missing_mojos = created_amount - amount
-            except Exception as e:
-                print("Failed to run puzzle with this solution: " + str(e))
-                return
+@cli.command("push", short_help="Pushes a spend bundle written with --save-bundle (any --output format)")
+@click.argument("file", required=True, default=None)
+@click.option("--wait", help="Wait until the spend bundle is confirmed and record its latency", is_flag=True)
+@click.pass_context
+def push_cmd(ctx: click.Context, file: str, wait: bool):
+    if ctx.obj["daemon"]:
+        result = forward_to_daemon(ctx, "push", {"file": os.path.abspath(file)})
+    else:
+
+        async def do_command():
+            async with wallet_client_session() as wallet_client:
+                return await operations.push(wallet_client, file, print)
+
+        result = asyncio.get_event_loop().run_until_complete(do_command())
+    if result is None:
+        sys.exit(1)
+    print(json.dumps(result, sort_keys=True, indent=4))
+    if wait:
+        wait_for_pushed([result["pushed"]])
+
+
+@cli.command("shard-run", short_help="Runs many create-coin or create-auction operations across several wallets")
+@click.argument("shards_file", required=True, default=None)
+@click.option("--operation", type=click.Choice(["create-coin", "create-auction"]), required=True)
+@click.option("-n", "--count", help="Number of operations across all shards", required=True, type=int)
+@click.option("--file", help="The puzzle to create coins for (create-coin)")
+@click.option("-a", "--amount", help="The amount in mojos of every new coin (create-coin)", default=1)
+@click.option("--endHeight", help="The end height of every auction (create-auction)", type=int)
+@click.option("--coin-amount", help="Mojos per pool coin, covering one operation and its fee", default=1_000_000_000)
+@click.option("-c", "--concurrency", help="Operations in flight per shard", default=4)
+def shard_run_cmd(
+    shards_file: str,
+    operation: str,
+    count: int,
+    file: Optional[str],
+    amount: int,
+    endheight: Optional[int],
+    coin_amount: int,
+    concurrency: int,
+):
+    from workshop.shards import read_shards, run_shards
+
+    if operation == "create-coin":
+        address = operations.puzzle_address(file) if file else None
+        if address is None:
+            print("create-coin needs a puzzle that builds (--file)")
+            sys.exit(1)
+
+        def run_operation(wallet_client):
+            return operations.create_coin(wallet_client, address, amount)
+
+    else:
+        if endheight is None:
+            print("create-auction needs --endHeight")
+            sys.exit(1)
+
+        def run_operation(wallet_client):
+            return operations.create_auction(wallet_client, endheight, lambda _: None, operations.no_confirm, "none")
+
+    shards = read_shards(shards_file)
+    click.confirm(f"Do you want to run {count} {operation} operations across {len(shards)} wallets?", abort=True)
+    result = asyncio.get_event_loop().run_until_complete(
+        run_shards(shards, count, run_operation, coin_amount, concurrency, print)
+    )
+    print(json.dumps(result, sort_keys=True, indent=4))
+    if result["failed"]:
+        sys.exit(1)
+
+
+@cli.command("spend-batch", short_help="Spend many coins from a JSON lines manifest in cost-capped spend bundles")
+@click.argument("manifest", required=True, default=None)
+@click.option("--max-bundle-cost", help="Maximum CLVM cost per pushed spend bundle", type=int)
+@click.option("--fee", help="A flat fee in mojos for the whole batch (default: price each bundle by cost)", type=int)
+@click.option("--dry-run", help="Run and sign the spends without pushing them", is_flag=True)
+@click.option("-j", "--jobs", help="Number of signing processes for large bundles", type=int)
+@click.option("--wait", help="Wait until all spend bundles are confirmed and record their latencies", is_flag=True)
+def spend_batch_cmd(
+    manifest: str, max_bundle_cost: Optional[int], fee: Optional[int], dry_run: bool, jobs: Optional[int], wait: bool
+):
+    from workshop.batch import spend_batch
 
-            try:
-                wallet_client: WalletRpcClient = await get_wallet_client()
-
-                fingerprint_to_use = None
-                if not fingerprint_to_use:
-                    public_keys = await wallet_client.get_public_keys()
-                    fingerprint_to_use = public_keys[0]
-                private_key: Dict = await wallet_client.get_private_key(fingerprint_to_use)
-
-                def pk_to_sk(pk: bytes32) -> Optional[PrivateKey]:
-                    if pk == G1Element.from_bytes(bytes.fromhex(private_key.get("pk"))):
-                        return PrivateKey.from_bytes(bytes.fromhex(private_key.get("sk")))
-                    return None
-
-                coin = Coin(
-                    parent_coin_info=hexstr_to_bytes(parentid),
-                    amount=amount,
-                    puzzle_hash=parsed_puzzle.get_tree_hash(),
-                )
+    async def do_command():
+        async with wallet_client_session() as wallet_client:
+            result = await spend_batch(wallet_client, manifest, print, max_bundle_cost, fee, not dry_run, jobs)
+            if result is None:
+                sys.exit(1)
+            for push_result in result["push_results"]:
+                print(json.dumps(push_result, sort_keys=True, indent=4))
+            return result
 
-                spend_bundle = await sign_coin_spends(
-                    [
-                        CoinSpend(
-                            coin=coin,
-                            puzzle_reveal=parsed_puzzle,
-                            solution=parsed_solution,
-                        )
-                    ],
-                    pk_to_sk,
-                    lambda _: None,
-                    constants.AGG_SIG_ME_ADDITIONAL_DATA,
-                    constants.MAX_BLOCK_COST_CLVM,
-                    [],
-                )
+    result = asyncio.get_event_loop().run_until_complete(do_command())
+    if wait and result["pushed"]:
+        wait_for_pushed(result["pushed"])
 
-                if missing_mojos:
-                    print(missing_mojos)
-                    # Create an empty coin and immediately spend while checking the auction coin announcement
-                    p2_conditions_puzzle = p2_conditions.puzzle_for_conditions(
-                        [
-                            make_assert_coin_announcement(Announcement(coin.name(), b"$").name()),
-                        ]
-                    )
-                    create_p2_conditions_tx = await wallet_client.create_signed_transaction(
-                        [{"amount": missing_mojos, "puzzle_hash": p2_conditions_puzzle.get_tree_hash()}],
-                        tx_config,
-                        fee=fee,
-                    )
-
-                    p2_conditions_spend = CoinSpend(
-                        Coin(
-                            create_p2_conditions_tx.removals[0].name(),
-                            p2_conditions_puzzle.get_tree_hash(),
-                            missing_mojos,
-                        ),
-                        p2_conditions_puzzle,
-                        Program.to(0),
-                    )
-                    spend_bundle = SpendBundle.aggregate(
-                        [
-                            spend_bundle,
-                            create_p2_conditions_tx.spend_bundle,
-                            SpendBundle([p2_conditions_spend], G2Element()),
-                        ]
-                    )
-
-                if fee > 0:
-                    my_address = await wallet_client.get_next_address(1, False)
-                    my_puzhash = decode_puzzle_hash(my_address)
-                    fee_tx = await wallet_client.create_signed_transaction(
-                        [{"amount": 0, "puzzle_hash": my_puzhash}],
-                        tx_config,
-                        fee=fee,
-                    )
-                    spend_bundle = SpendBundle.aggregate([spend_bundle, fee_tx.spend_bundle])
-
-                print("Spend Bundle:")
-                print(json.dumps(spend_bundle.to_json_dict(), sort_keys=True, indent=4))
-
-                print("Pushing transaction...")
-                result = await wallet_client.push_tx(spend_bundle)
-
-                print(json.dumps(result, sort_keys=True, indent=4))
-            finally:
-                wallet_client.close()
-                await wallet_client.await_closed()
 
-    asyncio.get_event_loop().run_until_complete(do_command())
+def confirm_or_abort(message: str) -> None:
+    click.confirm(message, abort=True)
 
 
 @cli.command(
@@ -292,128 +326,276 @@ def spend_coin_cmd(parentid: str, amount: int, puzzle: str, solution: str):
     short_help="Creates an auction with a given inner puzzle file (i.e mypuz.clsp or ./clsp/*.clsp)",
 )
 @click.option("--endHeight", required=True)
-def create_auction_cmd(endheight: int):
-    async def do_command():
-        auction_is_built = build("clsp/5-auction.clsp")
-        p2_auction_is_built = build("clsp/5-p2_auction.clsp")
-        if auction_is_built and p2_auction_is_built:
-            auction_puzzle = parse_program("clsp/5-auction.clsp.hex", "clsp/include")
-            p2_auction_puzzle = parse_program("clsp/5-p2_auction.clsp.hex", "clsp/include")
-            auction_puzzle_hash = auction_puzzle.get_tree_hash()
-
-            try:
-                wallet_client: WalletRpcClient = await get_wallet_client()
-
-                creator_address = await wallet_client.get_next_address(1, False)
-                creator_puzhash = decode_puzzle_hash(creator_address)
-
-                curried_auction_puzzle = auction_puzzle.curry(
-                    auction_puzzle_hash, creator_puzhash, uint64(endheight), creator_puzhash
-                )
-
-                coins = await wallet_client.select_coins(1, 1, tx_config.coin_selection_config)
-                origin = coins.copy().pop()
-
-                launcher_coin: Coin = generate_launcher_coin(origin, uint64(1))
-
-                auction_full_puzzle: Program = puzzle_for_singleton(launcher_coin.name(), curried_auction_puzzle)
-
-                launcher_solution = Program.to([auction_full_puzzle.get_tree_hash(), 1, []])
-                launcher_coin_spend = CoinSpend(
-                    launcher_coin,
-                    SINGLETON_LAUNCHER,
-                    launcher_solution,
-                )
-
-                auction_coin = Coin(launcher_coin.name(), auction_full_puzzle.get_tree_hash(), 1)
-
-                second_bid_amount = 2
-                auction_inner_solution = Program.to([0, 1, creator_puzhash, second_bid_amount])
-                lineage_proof = lineage_proof_for_coinsol(launcher_coin_spend)
-                auction_solution = solution_for_singleton(lineage_proof, auction_coin.amount, auction_inner_solution)
-                auction_coin_spend = CoinSpend(
-                    auction_coin,
-                    auction_full_puzzle,
-                    auction_solution,
-                )
-
-                result = auction_full_puzzle.run(auction_solution)
-                # print(disassemble(result))
-
-                # Create an empty coin and immediately spend while checking the auction coin announcement
-                p2_conditions_puzzle = p2_conditions.puzzle_for_conditions(
-                    [
-                        make_assert_coin_announcement(Announcement(auction_coin.name(), b"$").name()),
-                    ]
-                )
-                p2_conditions_spend = CoinSpend(
-                    Coin(origin.name(), p2_conditions_puzzle.get_tree_hash(), second_bid_amount),
-                    p2_conditions_puzzle,
-                    Program.to(0),
+@click.option(
+    "--output",
+    "output_format",
+    help="How to print the spend bundle: indented or compact JSON, serialized bytes, one coin spend per line, or not",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="pretty",
+)
+@click.option("--save-bundle", help="Write the spend bundle to this file instead of printing it (see `chiwo push`)")
+@click.option("--wait", help="Wait until the spend bundle is confirmed and record its latency", is_flag=True)
+@click.pass_context
+def create_auction_cmd(ctx: click.Context, endheight: int, output_format: str, save_bundle: Optional[str], wait: bool):
+    if ctx.obj["daemon"]:
+        click.confirm("Do you want to create a new auction?", abort=True)
+        save_bundle = save_bundle and os.path.abspath(save_bundle)
+        request = {"end_height": endheight, "yes": True, "output": output_format, "save_bundle": save_bundle}
+        result = forward_to_daemon(ctx, "create_auction", request)
+    else:
+
+        async def do_command():
+            async with wallet_client_session() as wallet_client:
+                return await operations.create_auction(
+                    wallet_client, endheight, print, confirm_or_abort, output_format, save_bundle
                 )
 
-                origin_spend_transaction = await wallet_client.create_signed_transaction(
-                    [
-                        {"amount": launcher_coin.amount, "puzzle_hash": launcher_coin.puzzle_hash},
-                        {"amount": second_bid_amount, "puzzle_hash": p2_conditions_puzzle.get_tree_hash()},
-                    ],
-                    tx_config,
-                    [origin],
-                    fee,
-                    coin_announcements=[
-                        Announcement(launcher_coin.name(), launcher_solution.get_tree_hash()),
-                    ],
-                )
+        result = asyncio.get_event_loop().run_until_complete(do_command())
+    if wait and result is not None:
+        wait_for_pushed([result["pushed"]])
+
+
+@cli.command("bid", short_help="Bids on an auction, rebuilding the bid when a competing bid wins the auction coin")
+@click.option("-lid", "--launcherId", "--launcher-id", "launcherid", help="The auction launcher ID", required=True)
+@click.option("-a", "--amount", help="The bid in mojos (has to be even)", required=True, type=int)
+@click.option("--max-amount", help="Outbid competing bids up to this amount instead of giving up", type=int)
+@click.option("--retries", help="How often to rebuild the bid after losing the auction coin", default=5)
+@click.option("--database", help="The SQLite auction index", default=None)
+@click.option("-y", "--yes", help="Don't ask for confirmation", is_flag=True)
+@click.option("--wait", help="Wait until the bid is confirmed and record its latency", is_flag=True)
+def bid_cmd(
+    launcherid: str,
+    amount: int,
+    max_amount: Optional[int],
+    retries: int,
+    database: Optional[str],
+    yes: bool,
+    wait: bool,
+):
+    from workshop.auction_index import DEFAULT_DATABASE, AuctionIndex
+    from workshop.bid import BidEngine, BidRejected
+    from workshop.operations import no_confirm
+    from workshop.rpc import full_node_client_session
+
+    index = AuctionIndex(database or DEFAULT_DATABASE)
 
-                spend_bundle = SpendBundle.aggregate(
-                    [
-                        SpendBundle([launcher_coin_spend, p2_conditions_spend, auction_coin_spend], G2Element()),
-                        origin_spend_transaction.spend_bundle,
-                    ]
-                )
+    async def do_command():
+        async with wallet_client_session() as wallet_client, full_node_client_session() as full_node_client:
+            engine = BidEngine(
+                wallet_client, full_node_client, index, bytes.fromhex(launcherid.replace("0x", "")), print
+            )
+            try:
+                result = await engine.bid(amount, no_confirm if yes else confirm_or_abort, max_amount, retries)
+            except BidRejected as e:
+                print(e)
+                sys.exit(1)
+            if result is None:
+                sys.exit(1)
+            print(json.dumps(result, sort_keys=True, indent=4))
+            return result
 
-                print("Spend Bundle:")
-                print(json.dumps(spend_bundle.to_json_dict(), sort_keys=True, indent=4))
+    try:
+        result = asyncio.get_event_loop().run_until_complete(do_command())
+    finally:
+        index.close()
+    if wait:
+        wait_for_pushed([result["pushed"]])
+
+
+@cli.command("auction-status", short_help="Syncs an auction into the local index and prints its current state")
+@click.option("-lid", "--launcherId", help="The launcher ID of the auction singleton", required=True)
+@click.option("--database", help="The SQLite auction index", default=None)
+@click.option("--no-sync", help="Print the indexed state without asking the full node for new bids", is_flag=True)
+@click.option("--history", help="Also print every indexed bid", is_flag=True)
+@click.option("--chain", help="Sync against a recorded chain JSON file instead of the full node")
+@click.option("--record", help="Record the full node responses of this sync to a JSON file")
+def auction_status_cmd(
+    launcherid: str,
+    database: Optional[str],
+    no_sync: bool,
+    history: bool,
+    chain: Optional[str],
+    record: Optional[str],
+):
+    from workshop.auction_index import DEFAULT_DATABASE, AuctionIndex, RecordedChain, RecordingChain
+    from workshop.rpc import full_node_client_session
+
+    launcher_id = bytes.fromhex(launcherid.replace("0x", ""))
+    index = AuctionIndex(database or DEFAULT_DATABASE)
 
-                click.confirm(
-                    f"Do you want to create a new auction?",
-                    abort=True,
-                )
+    async def do_command():
+        from chia.types.blockchain_format.sized_bytes import bytes32
+
+        if no_sync:
+            return index.get(launcher_id)
+        if chain:
+            return await index.sync(RecordedChain.load(chain), bytes32(launcher_id))
+        async with full_node_client_session() as full_node_client:
+            source = RecordingChain(full_node_client) if record else full_node_client
+            state = await index.sync(source, bytes32(launcher_id))
+            if record:
+                source.save(record)
+            return state
 
-                print("Pushing transaction...")
-                result = await wallet_client.push_tx(spend_bundle)
+    try:
+        state = asyncio.get_event_loop().run_until_complete(do_command())
+        if state is None:
+            print(f"Auction {launcherid} is not indexed yet")
+            sys.exit(1)
+        result = state.to_json_dict()
+        if history:
+            result["bids"] = [
+                {
+                    "coin_id": bid.coin_id.hex(),
+                    "height": bid.height,
+                    "bidder_puzhash": bid.bidder_puzhash.hex(),
+                    "amount": bid.amount,
+                }
+                for bid in index.bids(launcher_id)
+            ]
+        print(json.dumps(result, sort_keys=True, indent=4))
+    finally:
+        index.close()
+
+
+@cli.command("giveaway-plan", short_help="Splits a giveaway into chunks that fit into a block and commits to them")
+@click.argument("entries", required=True, default=None)
+@click.option("--payoutHeight", help="The height after which the giveaway pays out", required=True, type=int)
+@click.option("--chunk-size", help="Entries per payout spend (defaults to the most that fit)", type=int)
+def giveaway_plan_cmd(entries: str, payoutheight: int, chunk_size: Optional[int]):
+    from workshop.giveaway import plan_giveaway
+
+    if plan_giveaway(entries, payoutheight, chunk_size, print) is None:
+        sys.exit(1)
+
+
+@cli.command("giveaway-create", short_help="Funds a planned giveaway")
+@click.argument("entries", required=True, default=None)
+@click.option("-a", "--amount", help="The amount in mojos to give away", required=True, type=int)
+def giveaway_create_cmd(entries: str, amount: int):
+    from chia.util.bech32m import encode_puzzle_hash
+
+    from workshop.config import get_address_prefix
+    from workshop.giveaway import GIVEAWAY_PUZZLE, load_giveaway
+    from workshop.utils import load_program_hash
+
+    giveaway = load_giveaway(entries)
+    mod_hash = load_program_hash(GIVEAWAY_PUZZLE)
+    if giveaway is None or mod_hash is None:
+        print(f"No giveaway plan found, run `chiwo giveaway-plan {entries}` first")
+        sys.exit(1)
+    address = encode_puzzle_hash(giveaway.puzzle_hash(mod_hash, 0), get_address_prefix())
+    click.confirm(
+        f"Do you want to give away {amount} mojos to {len(giveaway.entries)} entries ({address})?", abort=True
+    )
 
-                print(json.dumps(result, sort_keys=True, indent=4))
+    async def do_command():
+        async with wallet_client_session() as wallet_client:
+            additions = await operations.create_coin(wallet_client, address, amount)
+            print(json.dumps(additions, sort_keys=True, indent=4))
 
-                expected_auction_inner_puzzle = auction_puzzle.curry(
-                    auction_puzzle_hash, creator_puzhash, uint64(endheight), creator_puzhash
-                )
-                expected_auction_full_puzzle: Program = puzzle_for_singleton(
-                    launcher_coin.name(), expected_auction_inner_puzzle
-                )
+    asyncio.get_event_loop().run_until_complete(do_command())
 
-                expected_auction_coin = Coin(
-                    auction_coin.name(), expected_auction_full_puzzle.get_tree_hash(), second_bid_amount + 1
-                )
 
-                p2_auction_full_puzzle = p2_auction_puzzle.curry(
-                    SINGLETON_MOD_HASH, launcher_coin.name(), SINGLETON_LAUNCHER_HASH
-                )
+@cli.command("giveaway-payout", short_help="Pays out one chunk of a planned giveaway")
+@click.argument("entries", required=True, default=None)
+@click.option("--parentId", help="The parent of the current giveaway coin", required=True)
+@click.option("-a", "--amount", help="The amount of the current giveaway coin", required=True, type=int)
+@click.option("--chunk", help="The chunk to pay out", default=0)
+@click.option("--wait", help="Wait until the spend bundle is confirmed and record its latency", is_flag=True)
+def giveaway_payout_cmd(entries: str, parentid: str, amount: int, chunk: int, wait: bool):
+    from workshop.giveaway import payout_chunk
 
-                print(f"Auction Launcher ID: `{launcher_coin.name().hex()}`")
-                print(f"P2_auction puzzle hash: `{p2_auction_full_puzzle.get_tree_hash().hex()}`")
-                print(f"Creator puzzle hash: `{creator_puzhash.hex()}`")
-                print(f"End Height: `{endheight}`")
-                print(f"Highest bidder puzzle hash: `{creator_puzhash.hex()}`")
-                print("")
-                print(f"Latest auction coin ID: `{expected_auction_coin.name().hex()}`")
-                print(f"Latest auction coin: `{expected_auction_coin.to_json_dict()}`")
-                print(f"Latest auction puzzle: `{bytes(expected_auction_full_puzzle).hex()}`")
-            finally:
-                wallet_client.close()
-                await wallet_client.await_closed()
+    async def do_command():
+        async with wallet_client_session() as wallet_client:
+            result = await payout_chunk(wallet_client, entries, parentid, amount, chunk, print)
+            if result is None:
+                sys.exit(1)
+            print(json.dumps(result, sort_keys=True, indent=4))
+            return result
+
+    result = asyncio.get_event_loop().run_until_complete(do_command())
+    if wait:
+        wait_for_pushed([result["pushed"]])
+
+
+@cli.command("track", short_help="Waits until pushed spend bundles are confirmed and reports their latency")
+@click.argument("file", type=click.File("r"), required=True, default=None)
+@click.option("--timeout", help="Seconds to wait before giving up", default=600.0)
+def track_cmd(file: Any, timeout: float):
+    value = json.load(file)
+    if "coin_spends" in value:
+        from chia.types.spend_bundle import SpendBundle
+
+        from workshop.tracking import PushedBundle
+
+        # Without the time of the push the latencies only count from now, so they are not recorded
+        bundle = PushedBundle.from_spend_bundle(SpendBundle.from_json_dict(value), "track")
+        wait_for_pushed([bundle.to_json_dict()], timeout=timeout, histogram=None)
+        return
+    pushed = value["pushed"]
+    wait_for_pushed(pushed if isinstance(pushed, list) else [pushed], timeout=timeout)
+
+
+@cli.command("latency", short_help="Prints the recorded time-to-mempool and time-to-confirmation histograms")
+def latency_cmd():
+    from workshop.tracking import format_histograms, load_histograms
+
+    histograms = load_histograms()
+    if not histograms:
+        print("No latencies recorded yet, use --wait or `chiwo track`")
+        return
+    for line in format_histograms(histograms):
+        print(line)
+
+
+@cli.command("build", short_help="Compiles every puzzle in a directory in parallel (i.e. ./clsp)")
+@click.argument("directory", required=True, default=None)
+@click.option("-j", "--jobs", help="Number of parallel compiler processes (defaults to the number of cores)", type=int)
+def build_cmd(directory: str, jobs: Optional[int]):
+    start = time.perf_counter()
+    results = build_all(directory, jobs, verbose=True)
+    compiled = [result for result in results if result.success and not result.cached]
+    failed = [result for result in results if not result.success]
+    print(
+        f"Built {len(results)} puzzle{'s' if len(results) != 1 else ''} in {time.perf_counter() - start:.2f} s "
+        f"({len(compiled)} compiled, {len(results) - len(compiled) - len(failed)} up to date, {len(failed)} failed)"
+    )
+    if failed:
+        sys.exit(1)
+
+
+@cli.command("watch", short_help="Rebuilds puzzles as they change and reruns their cases of the bench corpus")
+@click.argument("directory", required=True, type=click.Path(exists=True, file_okay=False))
+@click.option("-c", "--corpus", help="The JSON file with the solution cases", default="clsp/bench.json")
+@click.option("--interval", help="Seconds between polls when watchdog is not installed", default=0.2)
+def watch_cmd(directory: str, corpus: str, interval: float):
+    from workshop.watch import watch
 
-    asyncio.get_event_loop().run_until_complete(do_command())
+    try:
+        watch(directory, print, corpus, interval)
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command("bench", short_help="Measures the CLVM cost of the puzzles against a corpus of solutions")
+@click.option("-c", "--corpus", help="The JSON file with the solution cases", default="clsp/bench.json")
+@click.option("-b", "--baseline", help="The JSON file with the baseline costs", default="clsp/bench-baseline.json")
+@click.option("-n", "--runs", help="Number of runs per case for the wall time", default=10)
+@click.option("--tolerance", help="Allowed relative cost increase over the baseline", default=0.0)
+@click.option("--save-baseline", help="Store the measured costs as the new baseline", is_flag=True)
+def bench_cmd(corpus: str, baseline: str, runs: int, tolerance: float, save_baseline: bool):
+    from workshop.bench import bench
+
+    results = bench(print, corpus, baseline, runs, tolerance, save_baseline)
+    failed = [result for result in results if result.error is not None]
+    regressions = [result for result in results if result.regressions]
+    if failed:
+        print(f"{len(failed)} case{'s' if len(failed) != 1 else ''} failed")
+    if regressions and not save_baseline:
+        print(f"{len(regressions)} case{'s' if len(regressions) != 1 else ''} regressed")
+    if failed or (regressions and not save_baseline):
+        sys.exit(1)
 
 
 @cli.command(
@@ -421,18 +603,46 @@ def create_auction_cmd(endheight: int):
     short_help="Get a singleton puzzle",
 )
 @click.argument("file", required=True, default=None)
-@click.option("-lid", "--launcherId", help="The launcher ID of the singleton", required=True, default=None)
-def get_singleton_puzzle_cmd(file: str, launcherid: str):
-    async def do_command():
-        is_built = True if file.endswith(".hex") else build(file)
-        if is_built:
-            parsed_puzzle = parse_program(file if file.endswith(".hex") else file + ".hex", "clsp/include")
-            with open(file + ".singleton.hex", "w") as filehandle:
-                filehandle.write(
-                    bytes(puzzle_for_singleton(bytes.fromhex(launcherid.replace("0x", "")), parsed_puzzle)).hex()
-                )
-
-    asyncio.get_event_loop().run_until_complete(do_command())
+@click.option("-lid", "--launcherId", help="The launcher ID of the singleton", default=None)
+@click.option("--launcher-ids", help="A file with one launcher ID per line ('-' for stdin) to process in a batch")
+@click.option("-o", "--output", help="Write the batch results to this file instead of stdout")
+@click.option("--binary", help="Write the batch as binary records instead of JSON lines", is_flag=True)
+@click.option("--full", "full_puzzles", help="Also write the full singleton puzzles in a batch", is_flag=True)
+@click.option("-j", "--jobs", help="Number of worker processes for large batches", type=int)
+def get_singleton_puzzle_cmd(
+    file: str,
+    launcherid: Optional[str],
+    launcher_ids: Optional[str],
+    output: Optional[str],
+    binary: bool,
+    full_puzzles: bool,
+    jobs: Optional[int],
+):
+    if launcher_ids is None:
+        if launcherid is None:
+            print("Pass either --launcherId or --launcher-ids")
+            sys.exit(1)
+        operations.get_singleton_puzzle(file, launcherid)
+        return
+
+    from workshop.singletons import get_singleton_puzzles
+
+    start = time.perf_counter()
+    count = get_singleton_puzzles(file, launcher_ids, output, binary, full_puzzles, jobs)
+    if count is None:
+        sys.exit(1)
+    print(f"Wrote {count} singleton puzzle hashes in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+
+@cli.command("serve", short_help="Runs a daemon that keeps the wallet connection and compiled puzzles warm")
+@click.option("-s", "--socket", "socket_path", help="The unix socket to listen on", default=None)
+@click.option("-p", "--port", help="Listen on http://127.0.0.1:<port> instead of a unix socket", type=int)
+@click.option("--health-check-interval", help="Seconds between wallet connection health checks", default=5.0)
+def serve_cmd(socket_path: Optional[str], port: Optional[int], health_check_interval: float):
+    from workshop.daemon import DEFAULT_SOCKET, WorkshopDaemon
+
+    daemon = WorkshopDaemon(health_check_interval)
+    asyncio.get_event_loop().run_until_complete(daemon.serve(socket_path or DEFAULT_SOCKET, port))
 
 
 def main() -> None:
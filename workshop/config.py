@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    from chia.consensus.constants import ConsensusConstants
+    from chia.util.ints import uint64
+    from chia.wallet.util.tx_config import TXConfig
+
+# Everything in here is loaded on first use and then kept for the lifetime of the process,
+# so commands that never talk to the wallet don't pay for importing chia or parsing the config.
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Dict[str, Any]:
+    from chia.util.config import load_config
+    from chia.util.default_root import DEFAULT_ROOT_PATH
+
+    return load_config(DEFAULT_ROOT_PATH, "config.yaml")
+
+
+def get_selected_network() -> str:
+    return get_config()["wallet"]["selected_network"]
+
+
+@lru_cache(maxsize=1)
+def get_constants() -> ConsensusConstants:
+    from chia.consensus.default_constants import DEFAULT_CONSTANTS
+
+    overrides = get_config()["wallet"]["network_overrides"]["constants"][get_selected_network()]
+    return DEFAULT_CONSTANTS.replace_str_to_bytes(**overrides)
+
+
+@lru_cache(maxsize=1)
+def get_fee() -> uint64:
+    from chia.util.ints import uint64
+
+    return uint64(5_000_000 if get_selected_network() == "testnet10" else 0)
+
+
+@lru_cache(maxsize=1)
+def get_tx_config() -> TXConfig:
+    from chia.cmds.cmds_util import CMDTXConfigLoader
+
+    return CMDTXConfigLoader(
+        reuse_puzhash=True,
+    ).to_tx_config(1, get_config(), -1)
+
+
+def get_address_prefix() -> str:
+    from chia.util.config import selected_network_address_prefix
+
+    return selected_network_address_prefix(get_config())
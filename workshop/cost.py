@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List
+
+from workshop import trace
+
+if TYPE_CHECKING:
+    from chia.types.blockchain_format.program import Program
+    from chia.types.condition_with_args import ConditionWithArgs
+
+
+@dataclass
+class SpendCost:
+    """The cost of a single coin spend, split the same way the mempool charges it."""
+
+    clvm_cost: int
+    condition_cost: int
+    byte_cost: int
+    conditions: List[ConditionWithArgs] = field(default_factory=list)
+    condition_costs: List[int] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.clvm_cost + self.condition_cost + self.byte_cost
+
+
+def condition_cost(condition: ConditionWithArgs) -> int:
+    from chia.consensus.condition_costs import ConditionCost
+    from chia.types.condition_opcodes import ConditionOpcode
+
+    if condition.opcode == ConditionOpcode.CREATE_COIN:
+        return ConditionCost.CREATE_COIN.value
+    if condition.opcode in (ConditionOpcode.AGG_SIG_ME, ConditionOpcode.AGG_SIG_UNSAFE) or (
+        # AGG_SIG_PARENT .. AGG_SIG_PARENT_PUZZLE
+        43 <= int.from_bytes(condition.opcode, "big") <= 48
+    ):
+        return ConditionCost.AGG_SIG.value
+    return 0
+
+
+def spend_cost(puzzle: Program, solution: Program, max_cost: int) -> SpendCost:
+    """Runs the puzzle with the solution and returns its cost. Raises if the puzzle fails."""
+    from chia.util.condition_tools import parse_sexp_to_conditions
+
+    from workshop.config import get_constants
+
+    with trace.span("run_puzzle", "clvm"):
+        clvm_cost, result = puzzle.run_with_cost(max_cost, solution)
+    trace.counter("clvm_cost", run_puzzle=clvm_cost)
+    conditions = parse_sexp_to_conditions(result)
+    condition_costs = [condition_cost(condition) for condition in conditions]
+    byte_cost = (len(bytes(puzzle)) + len(bytes(solution))) * get_constants().COST_PER_BYTE
+    return SpendCost(clvm_cost, sum(condition_costs), byte_cost, conditions, condition_costs)
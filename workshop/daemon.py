@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from workshop import operations
+from workshop.rpc import WalletClientPool
+from workshop.signing import clear_key_cache
+
+DEFAULT_SOCKET = ".chiwo/daemon.sock"
+
+# `chiwo serve` keeps one wallet connection and the compiled puzzles of this project warm, and runs the
+# wallet operations for thin clients. Every request is a JSON object POSTed to `/<command>`, and every
+# response is `{"log": [...], "result": ...}` or `{"log": [...], "error": "..."}`.
+
+
+class ConfirmationRequired(Exception):
+    pass
+
+
+def confirm_from_request(request: Dict[str, Any]) -> operations.Confirm:
+    # The daemon can't prompt, so the client has to confirm up front by sending `"yes": true`
+    def confirm(message: str) -> None:
+        if not request.get("yes"):
+            raise ConfirmationRequired(message)
+
+    return confirm
+
+
+class WorkshopDaemon:
+    def __init__(self, health_check_interval: float = 5.0):
+        self.pool = WalletClientPool(health_check_interval)
+        # Operations that create transactions share the wallet's coins, so they run one at a time
+        self.transaction_lock = asyncio.Lock()
+        self.handlers: Dict[str, Callable[[Dict[str, Any], operations.Log], Awaitable[Any]]] = {
+            "status": self.status,
+            "create_coin": self.create_coin,
+            "spend_coin": self.spend_coin,
+            "create_auction": self.create_auction,
+            "push": self.push,
+        }
+
+    async def status(self, request: Dict[str, Any], log: operations.Log) -> Any:
+        return await operations.status(await self.pool.get())
+
+    async def create_coin(self, request: Dict[str, Any], log: operations.Log) -> Any:
+        address = operations.puzzle_address(request["file"])
+        if address is None:
+            raise ValueError(f"Couldn't build {request['file']}")
+        amount = int(request.get("amount", 1))
+        confirm_from_request(request)(
+            f"Do you want to send {amount} mojo{'s' if amount > 1 else ''} to your puzzle hash {address})?"
+        )
+        async with self.transaction_lock:
+            return await operations.create_coin(await self.pool.get(), address, amount)
+
+    async def spend_coin(self, request: Dict[str, Any], log: operations.Log) -> Any:
+        async with self.transaction_lock:
+            return await operations.spend_coin(
+                await self.pool.get(),
+                request["parent_id"],
+                int(request.get("amount", 1)),
+                request["puzzle"],
+                request.get("solution", "()"),
+                log,
+                request.get("output", "pretty"),
+                request.get("save_bundle"),
+            )
+
+    async def create_auction(self, request: Dict[str, Any], log: operations.Log) -> Any:
+        async with self.transaction_lock:
+            return await operations.create_auction(
+                await self.pool.get(),
+                int(request["end_height"]),
+                log,
+                confirm_from_request(request),
+                request.get("output", "pretty"),
+                request.get("save_bundle"),
+            )
+
+    async def push(self, request: Dict[str, Any], log: operations.Log) -> Any:
+        return await operations.push(await self.pool.get(), request["file"], log)
+
+    async def handle(self, http_request: Any) -> Any:
+        from aiohttp import web
+
+        command = http_request.match_info["command"]
+        handler = self.handlers.get(command)
+        if handler is None:
+            return web.json_response({"log": [], "error": f"Unknown command {command}"}, status=404)
+
+        lines: List[str] = []
+        try:
+            request = await http_request.json() if http_request.can_read_body else {}
+            result = await handler(request, lines.append)
+            return web.json_response({"log": lines, "result": result}, dumps=dumps)
+        except ConfirmationRequired as e:
+            return web.json_response({"log": lines, "error": f"Confirmation required: {e}"}, status=409)
+        except Exception as e:
+            if not isinstance(e, (KeyError, ValueError)):
+                # The failure may have come from a broken connection or a wallet that switched keys,
+                # so reconnect and fetch the keys again on the next request
+                await self.pool.invalidate()
+                clear_key_cache()
+            return web.json_response({"log": lines, "error": f"{type(e).__name__}: {e}"}, status=500)
+
+    async def serve(self, socket_path: Optional[str], port: Optional[int]) -> None:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/{command}", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        if port is not None:
+            site: web.BaseSite = web.TCPSite(runner, "127.0.0.1", port)
+            print(f"Serving on http://127.0.0.1:{port}")
+        else:
+            assert socket_path is not None
+            Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            site = web.UnixSite(runner, socket_path)
+            print(f"Serving on {socket_path}")
+        await site.start()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            # Connect right away, so the first request doesn't pay for the handshake
+            await self.pool.get()
+        except Exception as e:
+            print(f"Wallet not reachable yet: {e}")
+        await stop.wait()
+
+        await runner.cleanup()
+        await self.pool.close()
+        if port is None and socket_path is not None and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def dumps(value: Any) -> str:
+    # Results may contain chia's sized ints and bytes, which the standard encoder doesn't know about
+    return json.dumps(value, default=lambda o: o.hex() if isinstance(o, bytes) else str(o))
+
+
+async def forward(daemon: str, command: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Sends a request to a running `chiwo serve`, either at a unix socket path or an http:// URL."""
+    import aiohttp
+
+    if daemon.startswith("http://") or daemon.startswith("https://"):
+        connector: Optional[aiohttp.BaseConnector] = None
+        url = daemon.rstrip("/") + "/" + command
+    else:
+        connector = aiohttp.UnixConnector(path=daemon)
+        url = "http://chiwo/" + command
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.post(url, data=dumps(request)) as response:
+            return await response.json(content_type=None)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from workshop.config import get_constants, get_fee
+from workshop.cost import spend_cost
+
+if TYPE_CHECKING:
+    from chia.types.coin_spend import CoinSpend
+
+    from workshop.operations import Log
+
+# Fees proportional to the cost of what is pushed. The rate comes from `--fee-per-cost`, or from the full node's
+# fee estimator with `--fee-estimate SECONDS`; without either, the flat network fee is used as before.
+
+# Roughly the cost of a standard wallet transaction with one input and two outputs, used to price the wallet
+# transaction that carries the fee before it exists
+WALLET_TX_COST = 15_000_000
+
+# How long a fee rate from the full node is reused
+ESTIMATE_TTL = 30.0
+
+
+@dataclass
+class FeePolicy:
+    fee_per_cost: Optional[float] = None
+    target_seconds: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class FeeQuote:
+    cost: int
+    fee: int
+    source: str
+
+    @property
+    def fee_per_cost(self) -> float:
+        return self.fee / self.cost if self.cost else 0.0
+
+
+_policy = FeePolicy()
+_estimates: Dict[int, Tuple[float, float]] = {}
+
+
+def configure(fee_per_cost: Optional[float] = None, target_seconds: Optional[int] = None) -> None:
+    global _policy
+    _policy = FeePolicy(fee_per_cost, target_seconds)
+
+
+def get_policy() -> FeePolicy:
+    return _policy
+
+
+def coin_spends_cost(coin_spends: Iterable[CoinSpend]) -> int:
+    """The CLVM, condition and byte cost of the coin spends, as in `chiwo bench`."""
+    max_cost = get_constants().MAX_BLOCK_COST_CLVM
+    return sum(spend_cost(coin_spend.puzzle_reveal, coin_spend.solution, max_cost).total for coin_spend in coin_spends)
+
+
+def estimate_cost(coin_spends: Iterable[CoinSpend], wallet_transactions: int = 1) -> int:
+    return coin_spends_cost(coin_spends) + wallet_transactions * WALLET_TX_COST
+
+
+async def estimated_fee_per_cost(target_seconds: int, cost: int) -> float:
+    from workshop.rpc import full_node_client_session
+
+    cached = _estimates.get(target_seconds)
+    if cached is not None and time.monotonic() - cached[0] < ESTIMATE_TTL:
+        return cached[1]
+    async with full_node_client_session() as full_node_client:
+        response = await full_node_client.fetch("get_fee_estimate", {"cost": cost, "target_times": [target_seconds]})
+    fee_per_cost = int(response["estimates"][0]) / cost
+    _estimates[target_seconds] = (time.monotonic(), fee_per_cost)
+    return fee_per_cost
+
+
+async def quote_fee(cost: int) -> FeeQuote:
+    policy = get_policy()
+    if policy.fee_per_cost is not None:
+        return FeeQuote(cost, math.ceil(cost * policy.fee_per_cost), "--fee-per-cost")
+    if policy.target_seconds is not None:
+        fee_per_cost = await estimated_fee_per_cost(policy.target_seconds, cost)
+        return FeeQuote(cost, math.ceil(cost * fee_per_cost), f"full node estimate for {policy.target_seconds} s")
+    return FeeQuote(cost, int(get_fee()), "flat network fee")
+
+
+async def quote_fee_for(coin_spends: Iterable[CoinSpend], wallet_transactions: int = 1) -> FeeQuote:
+    return await quote_fee(estimate_cost(coin_spends, wallet_transactions))
+
+
+def report_fee(log: Log, cost: int, fee: int, quote: FeeQuote) -> None:
+    log(
+        f"Cost: {cost}, fee: {fee} mojos ({fee / cost if cost else 0:.3f} mojos per cost, "
+        f"priced at {quote.fee_per_cost:.3f} by {quote.source})"
+    )
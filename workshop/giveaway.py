@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from workshop.batch import MEMPOOL_COST_FRACTION
+from workshop.config import get_constants, get_tx_config
+from workshop.cost import SpendCost, spend_cost
+from workshop.fees import coin_spends_cost, quote_fee_for, report_fee
+from workshop.merkle import MerkleTree, leaf_hash
+from workshop.operations import Log, trace_spend_bundle
+from workshop.puzzle_hash import curry_hashes, hash_atom, hash_int
+from workshop.tracking import PushedBundle
+from workshop.utils import load_program, load_program_hash
+
+if TYPE_CHECKING:
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.types.blockchain_format.program import Program
+
+# Giveaways with more entries than fit into one spend. See 6-merkle_giveaway.clsp: the entries are committed as the
+# merkle root of fixed-size chunks and paid out one chunk per spend.
+
+GIVEAWAY_PUZZLE = "clsp/6-merkle_giveaway.clsp"
+
+# Entry counts used to measure the cost per entry when choosing the chunk size
+SAMPLE_SIZES = (32, 64)
+
+
+def read_entries(file: str) -> List[bytes]:
+    # One puzzle hash (hex) or address per line
+    from chia.util.bech32m import decode_puzzle_hash
+
+    entries = []
+    with open(file) as filehandle:
+        for line in filehandle:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("xch", "txch")):
+                entries.append(bytes(decode_puzzle_hash(line)))
+            else:
+                entries.append(bytes.fromhex(line.replace("0x", "")))
+    return entries
+
+
+def plan_file(entries_file: str) -> str:
+    return entries_file + ".giveaway.json"
+
+
+@dataclass
+class MerkleGiveaway:
+    entries: List[bytes]
+    payout_height: int
+    chunk_size: int
+
+    @cached_property
+    def chunks(self) -> List[List[bytes]]:
+        return [self.entries[i : i + self.chunk_size] for i in range(0, len(self.entries), self.chunk_size)]
+
+    @cached_property
+    def tree(self) -> MerkleTree:
+        return MerkleTree([leaf_hash(chunk) for chunk in self.chunks])
+
+    @property
+    def root(self) -> bytes:
+        return self.tree.root
+
+    def entries_remaining(self, chunk_index: int) -> int:
+        return len(self.entries) - chunk_index * self.chunk_size
+
+    def amount(self, chunk_index: int, total_amount: int) -> int:
+        """The amount of the giveaway coin paying `chunk_index`, once `total_amount` was given away."""
+        if chunk_index == 0:
+            return total_amount
+        return total_amount // len(self.entries) * self.entries_remaining(chunk_index)
+
+    def puzzle_hash(self, mod_hash: bytes, chunk_index: int) -> bytes:
+        return curry_hashes(
+            mod_hash,
+            hash_atom(mod_hash),
+            hash_int(self.payout_height),
+            hash_atom(self.root),
+            hash_int(self.entries_remaining(chunk_index)),
+            hash_int(chunk_index),
+        )
+
+    def puzzle(self, mod: Program, mod_hash: bytes, chunk_index: int) -> Program:
+        return mod.curry(mod_hash, self.payout_height, self.root, self.entries_remaining(chunk_index), chunk_index)
+
+    def solution(self, chunk_index: int, my_amount: int) -> Program:
+        from chia.types.blockchain_format.program import Program
+
+        return Program.to([my_amount, self.chunks[chunk_index], self.tree.proof(chunk_index)])
+
+    def to_json_dict(self, mod_hash: bytes) -> Dict[str, Any]:
+        return {
+            "payout_height": self.payout_height,
+            "chunk_size": self.chunk_size,
+            "entries": len(self.entries),
+            "merkle_root": self.root.hex(),
+            "chunks": [
+                {
+                    "index": index,
+                    "entries_remaining": self.entries_remaining(index),
+                    "puzzle_hash": self.puzzle_hash(mod_hash, index).hex(),
+                }
+                for index in range(len(self.chunks))
+            ],
+        }
+
+
+def chunk_cost(mod: Program, mod_hash: bytes, giveaway: MerkleGiveaway, chunk_index: int = 0) -> SpendCost:
+    # The amount only has to cover one mojo per entry for the cost to be representative
+    amount = giveaway.amount(chunk_index, len(giveaway.entries))
+    puzzle = giveaway.puzzle(mod, mod_hash, chunk_index)
+    return spend_cost(puzzle, giveaway.solution(chunk_index, amount), get_constants().MAX_BLOCK_COST_CLVM)
+
+
+def fit_chunk_size(mod: Program, mod_hash: bytes, entries: List[bytes], payout_height: int) -> int:
+    """The largest chunk size whose payout spend stays below the mempool cost limit."""
+    max_cost = int(get_constants().MAX_BLOCK_COST_CLVM * MEMPOOL_COST_FRACTION)
+
+    def cost(size: int) -> int:
+        return chunk_cost(mod, mod_hash, MerkleGiveaway(entries, payout_height, size)).total
+
+    small, large = (min(size, len(entries)) for size in SAMPLE_SIZES)
+    if large == len(entries) and cost(large) <= max_cost:
+        return large
+    # The cost is linear in the chunk size, so two measurements give a close estimate
+    small_cost = cost(small)
+    per_entry = (cost(large) - small_cost) / (large - small)
+    size = min(len(entries), int((max_cost - small_cost) / per_entry) + small)
+    while size > 1 and cost(size) > max_cost:
+        size = int(size * 0.95)
+    return size
+
+
+def load_giveaway(entries_file: str) -> Optional[MerkleGiveaway]:
+    try:
+        with open(plan_file(entries_file)) as filehandle:
+            plan = json.load(filehandle)
+    except FileNotFoundError:
+        return None
+    giveaway = MerkleGiveaway(read_entries(entries_file), plan["payout_height"], plan["chunk_size"])
+    if giveaway.root.hex() != plan["merkle_root"]:
+        raise ValueError(f"{entries_file} changed since {plan_file(entries_file)} was written")
+    return giveaway
+
+
+def plan_giveaway(entries_file: str, payout_height: int, chunk_size: Optional[int], log: Log) -> Optional[Dict]:
+    mod = load_program(GIVEAWAY_PUZZLE)
+    mod_hash = load_program_hash(GIVEAWAY_PUZZLE)
+    if mod is None or mod_hash is None:
+        return None
+    entries = read_entries(entries_file)
+    if not entries:
+        log(f"{entries_file} has no entries")
+        return None
+    if chunk_size is None:
+        chunk_size = fit_chunk_size(mod, mod_hash, entries, payout_height)
+    giveaway = MerkleGiveaway(entries, payout_height, chunk_size)
+
+    plan = giveaway.to_json_dict(mod_hash)
+    with open(plan_file(entries_file), "w") as filehandle:
+        json.dump(plan, filehandle, sort_keys=True, indent=4)
+
+    cost = chunk_cost(mod, mod_hash, giveaway)
+    log(f"{len(entries)} entries in {len(giveaway.chunks)} chunks of {chunk_size}")
+    log(f"Merkle root: `{giveaway.root.hex()}`")
+    log(f"Cost of the first chunk: {cost.total} ({cost.clvm_cost} CLVM, {cost.condition_cost} conditions)")
+    log(f"Giveaway puzzle hash: `{plan['chunks'][0]['puzzle_hash']}`")
+    log(f"Plan written to {plan_file(entries_file)}")
+    return plan
+
+
+async def payout_chunk(
+    wallet_client: WalletRpcClient, entries_file: str, parentid: str, amount: int, chunk_index: int, log: Log
+) -> Optional[Dict[str, Any]]:
+    from blspy import G2Element
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.spend_bundle import SpendBundle
+    from chia.util.bech32m import decode_puzzle_hash
+    from chia.util.byte_types import hexstr_to_bytes
+    from chia_rs import Coin
+
+    giveaway = load_giveaway(entries_file)
+    if giveaway is None:
+        log(f"No giveaway plan found, run `chiwo giveaway-plan {entries_file}` first")
+        return None
+    mod = load_program(GIVEAWAY_PUZZLE)
+    mod_hash = load_program_hash(GIVEAWAY_PUZZLE)
+    if mod is None or mod_hash is None:
+        return None
+    if not 0 <= chunk_index < len(giveaway.chunks):
+        log(f"The giveaway has chunks 0 to {len(giveaway.chunks) - 1}")
+        return None
+
+    puzzle = giveaway.puzzle(mod, mod_hash, chunk_index)
+    solution = giveaway.solution(chunk_index, amount)
+    try:
+        cost = spend_cost(puzzle, solution, get_constants().MAX_BLOCK_COST_CLVM)
+    except Exception as e:
+        log("Failed to run the payout: " + str(e))
+        return None
+    log(f"Chunk {chunk_index}: paying {len(giveaway.chunks[chunk_index])} entries at cost {cost.total}")
+
+    coin = Coin(hexstr_to_bytes(parentid), giveaway.puzzle_hash(mod_hash, chunk_index), amount)
+    coin_spend = CoinSpend(coin, puzzle, solution)
+    spend_bundle = SpendBundle([coin_spend], G2Element())
+    # The rounding remainder of the amount per entry is left to the farmer
+    surplus = amount % giveaway.entries_remaining(chunk_index)
+    quote = await quote_fee_for([coin_spend], wallet_transactions=0)
+    if quote.fee > surplus:
+        quote = await quote_fee_for([coin_spend], wallet_transactions=1)
+    fee = max(quote.fee - surplus, 0)
+    if fee > 0:
+        my_address = await wallet_client.get_next_address(1, False)
+        fee_tx = await wallet_client.create_signed_transaction(
+            [{"amount": 0, "puzzle_hash": decode_puzzle_hash(my_address)}],
+            get_tx_config(),
+            fee=fee,
+        )
+        spend_bundle = SpendBundle.aggregate([spend_bundle, fee_tx.spend_bundle])
+    report_fee(log, coin_spends_cost(spend_bundle.coin_spends), fee + surplus, quote)
+
+    trace_spend_bundle(spend_bundle)
+    log("Pushing transaction...")
+    pushed = PushedBundle.from_spend_bundle(spend_bundle, "giveaway_payout")
+    result = {**await wallet_client.push_tx(spend_bundle), "pushed": pushed.to_json_dict()}
+    if chunk_index + 1 < len(giveaway.chunks):
+        next_amount = amount // giveaway.entries_remaining(chunk_index) * giveaway.entries_remaining(chunk_index + 1)
+        log(f"Next chunk: --chunk {chunk_index + 1} --parentId {coin.name().hex()} --amount {next_amount}")
+    return result
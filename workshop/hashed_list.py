@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Sequence
+
+from workshop.puzzle_hash import SHA256_ONE, curry_hashes, hash_atom, hash_int, hash_pair
+
+# The tree hash of a proper list is built from its end: `(a b c)` hashes to
+# hash_pair(a, hash_pair(b, hash_pair(c, nil))). Keeping the hash of every suffix makes adding an entry in front,
+# which is what `(c puzzle_hash_to_add PUZZLE_HASHES)` does in a giveaway, a single pair hash instead of running
+# `sha256tree` over the whole list again.
+
+
+class HashedList:
+    """
+    A list of atoms that keeps the `sha256tree` of itself up to date.
+
+    `prepend` and `prepend_all` cost one hash per new entry, regardless of the list length. Adding entries at the
+    tail changes every suffix, so `append` and `extend` rehash the whole list and are O(n).
+    """
+
+    def __init__(self, items: Iterable[bytes] = ()):
+        # Stored back to front, so the suffix hashes only grow at the end of both lists
+        self._reversed: List[bytes] = []
+        self._suffix_hashes: List[bytes] = [SHA256_ONE]
+        self.prepend_all(list(items))
+
+    def __len__(self) -> int:
+        return len(self._reversed)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return reversed(self._reversed)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._reversed[-1 - index]
+
+    @property
+    def tree_hash(self) -> bytes:
+        return self._suffix_hashes[-1]
+
+    def suffix_hash(self, index: int) -> bytes:
+        """The tree hash of the list without its first `index` entries."""
+        return self._suffix_hashes[len(self._reversed) - index]
+
+    def prepend(self, item: bytes) -> None:
+        self._reversed.append(item)
+        self._suffix_hashes.append(hash_pair(hash_atom(item), self._suffix_hashes[-1]))
+
+    def prepend_all(self, items: Sequence[bytes]) -> None:
+        """Adds `items` in front, keeping their order: `(x y) + (a b)` becomes `(x y a b)`."""
+        for item in reversed(items):
+            self.prepend(item)
+
+    def hash_with(self, item: bytes) -> bytes:
+        """The tree hash after `prepend(item)`, without changing the list."""
+        return hash_pair(hash_atom(item), self.tree_hash)
+
+    def pop(self) -> bytes:
+        """Removes and returns the first entry."""
+        self._suffix_hashes.pop()
+        return self._reversed.pop()
+
+    def append(self, item: bytes) -> None:
+        self.extend([item])
+
+    def extend(self, items: Sequence[bytes]) -> None:
+        existing = list(self)
+        self._reversed = []
+        self._suffix_hashes = [SHA256_ONE]
+        self.prepend_all(existing + list(items))
+
+
+def giveaway_puzzle_hash(mod_hash: bytes, payout_height: int, puzzle_hashes: HashedList) -> bytes:
+    """The puzzle hash of 4-giveaway.clsp curried with `(MOD_HASH PAYOUT_HEIGHT PUZZLE_HASHES)`."""
+    return curry_hashes(mod_hash, hash_atom(mod_hash), hash_int(payout_height), puzzle_hashes.tree_hash)
+
+
+def next_giveaway_puzzle_hash(
+    mod_hash: bytes, payout_height: int, puzzle_hashes: HashedList, puzzle_hash_to_add: bytes
+) -> bytes:
+    """The puzzle hash of the giveaway once `puzzle_hash_to_add` was added in front, in constant time."""
+    list_hash = puzzle_hashes.hash_with(puzzle_hash_to_add)
+    return curry_hashes(mod_hash, hash_atom(mod_hash), hash_int(payout_height), list_hash)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+from workshop.puzzle_hash import hash_atom, hash_pair, sha256
+
+# The merkle tree of 6-merkle_giveaway.clsp. Leaves are `sha256(1, sha256tree(chunk))` and nodes
+# `sha256(2, left, right)`, so a leaf can never be mistaken for a node. The tree is padded with empty chunks to a
+# power of two, which makes the bits of a chunk's index its path from the leaf to the root.
+
+LEAF_PREFIX = b"\x01"
+NODE_PREFIX = b"\x02"
+
+
+def list_hash(items: Sequence[bytes]) -> bytes:
+    """The `sha256tree` of a proper list of atoms."""
+    result = hash_atom(b"")
+    for item in reversed(items):
+        result = hash_pair(hash_atom(item), result)
+    return result
+
+
+def leaf_hash(chunk: Sequence[bytes]) -> bytes:
+    return sha256(LEAF_PREFIX, list_hash(chunk))
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return sha256(NODE_PREFIX, left, right)
+
+
+EMPTY_LEAF = leaf_hash([])
+
+
+class MerkleTree:
+    def __init__(self, leaves: Sequence[bytes]):
+        if not leaves:
+            raise ValueError("A merkle tree needs at least one leaf")
+        width = 1
+        while width < len(leaves):
+            width *= 2
+        level = list(leaves) + [EMPTY_LEAF] * (width - len(leaves))
+        self.levels: List[List[bytes]] = [level]
+        while len(level) > 1:
+            level = [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+            self.levels.append(level)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[bytes]:
+        """The sibling hashes from the leaf at `index` up to the root."""
+        siblings = []
+        for level in self.levels[:-1]:
+            siblings.append(level[index ^ 1])
+            index >>= 1
+        return siblings
+
+
+def verify(leaf: bytes, index: int, proof: Sequence[bytes], root: bytes) -> bool:
+    # Mirrors `merkle_root` in 6-merkle_giveaway.clsp
+    node = leaf
+    for sibling in proof:
+        node = node_hash(sibling, node) if index & 1 else node_hash(node, sibling)
+        index >>= 1
+    return node == root
@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from workshop import trace
+from workshop.bundles import emit_spend_bundle, load_spend_bundle
+from workshop.config import get_address_prefix, get_config, get_constants, get_tx_config
+from workshop.fees import WALLET_TX_COST, coin_spends_cost, quote_fee, quote_fee_for, report_fee
+from workshop.pipeline import Pipeline
+from workshop.puzzle_hash import auction_puzzle_hash, p2_auction_puzzle_hash
+from workshop.signing import WalletKeys, get_wallet_keys, sign_spends, verify_spend_bundle
+from workshop.tracking import PushedBundle
+from workshop.utils import load_program, load_program_hash
+
+if TYPE_CHECKING:
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.types.spend_bundle import SpendBundle
+    from chia.util.ints import uint32
+    from chia.wallet.transaction_record import TransactionRecord
+
+# The wallet operations behind the CLI commands. They are shared by the CLI and `chiwo serve`, so they
+# report progress through `log` and ask for confirmation through `confirm` instead of printing and prompting.
+
+Log = Callable[[str], None]
+Confirm = Callable[[str], None]
+
+
+def no_confirm(message: str) -> None:
+    pass
+
+
+def trace_spend_bundle(spend_bundle: SpendBundle) -> None:
+    if trace.get_tracer() is not None:
+        trace.counter("spend_bundle", bytes=len(bytes(spend_bundle)), coin_spends=len(spend_bundle.coin_spends))
+
+
+async def status(wallet_client: WalletRpcClient) -> Dict[str, Any]:
+    state: Dict = await wallet_client.fetch("get_sync_status", {})
+    height: uint32 = await wallet_client.get_height_info()
+    state["height"] = height
+    return state
+
+
+def puzzle_address(file: str) -> Optional[str]:
+    from chia.util.bech32m import encode_puzzle_hash
+
+    puzzle = load_program(file)
+    if puzzle is None:
+        return None
+    return encode_puzzle_hash(puzzle.get_tree_hash(), get_address_prefix())
+
+
+async def create_coin(wallet_client: WalletRpcClient, address: str, amount: int) -> List[Dict[str, Any]]:
+    from chia.cmds.cmds_util import CMDTXConfigLoader
+    from chia.util.ints import uint64
+
+    transaction: TransactionRecord = await wallet_client.send_transaction(
+        1,
+        uint64(amount),
+        address,
+        CMDTXConfigLoader(
+            reuse_puzhash=True,
+        ).to_tx_config(1, get_config(), -1),
+        (await quote_fee(WALLET_TX_COST)).fee,
+    )
+    return transaction.to_json_dict().get("additions")
+
+
+async def spend_coin(
+    wallet_client: WalletRpcClient,
+    parentid: str,
+    amount: int,
+    puzzle: str,
+    solution: str,
+    log: Log,
+    output: str = "pretty",
+    save_bundle: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    from blspy import G2Element
+    from cdv.cmds.util import parse_program
+    from chia.types.announcement import Announcement
+    from chia.types.blockchain_format.program import Program
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.condition_opcodes import ConditionOpcode
+    from chia.types.spend_bundle import SpendBundle
+    from chia.util.bech32m import decode_puzzle_hash
+    from chia.util.byte_types import hexstr_to_bytes
+    from chia.util.condition_tools import parse_sexp_to_conditions
+    from chia.wallet.puzzles import p2_conditions
+    from chia.wallet.puzzles.puzzle_utils import make_assert_coin_announcement
+    from chia_rs import Coin
+    from clvm_tools.binutils import disassemble
+
+    constants = get_constants()
+    tx_config = get_tx_config()
+
+    parsed_puzzle = load_program(puzzle)
+    if parsed_puzzle is None:
+        return None
+    parsed_solution = parse_program(solution)
+
+    missing_mojos = 0
+    try:
+        log("Trying to run the puzzle with this solution...")
+        with trace.span("run_puzzle", "clvm", puzzle=puzzle):
+            cost, result = parsed_puzzle.run_with_cost(constants.MAX_BLOCK_COST_CLVM, parsed_solution)
+        trace.counter("clvm_cost", run_puzzle=cost)
+        log("Resulting conditions: " + disassemble(result))
+
+        conditions = parse_sexp_to_conditions(result)
+        created_amount = 0
+        for condition in conditions:
+            if condition.opcode == ConditionOpcode.CREATE_COIN:
+                created_amount = created_amount + int.from_bytes(condition.vars[1])
+
+        missing_mojos = created_amount - amount
+    except Exception as e:
+        log("Failed to run puzzle with this solution: " + str(e))
+        return None
+
+    with trace.span("tree_hash", "clvm", puzzle=puzzle):
+        puzzle_hash = parsed_puzzle.get_tree_hash()
+    coin = Coin(
+        parent_coin_info=hexstr_to_bytes(parentid),
+        amount=amount,
+        puzzle_hash=puzzle_hash,
+    )
+    coin_spend = CoinSpend(coin=coin, puzzle_reveal=parsed_puzzle, solution=parsed_solution)
+
+    # Mojos the puzzle doesn't assign to new coins already go to the farmer, so a fee transaction is only
+    # needed for what they don't cover
+    surplus = max(-missing_mojos, 0)
+    quote = await quote_fee_for([coin_spend], wallet_transactions=0)
+    if missing_mojos > 0 or quote.fee > surplus:
+        quote = await quote_fee_for([coin_spend], wallet_transactions=1)
+    fee = max(quote.fee - surplus, 0)
+
+    # The wallet calls only depend on each other within a chain (keys -> signature, address -> fee),
+    # so the chains run concurrently and the latency is that of the longest chain
+    pipeline = Pipeline()
+
+    async def get_keys() -> WalletKeys:
+        return await get_wallet_keys(wallet_client)
+
+    async def sign(keys: WalletKeys) -> SpendBundle:
+        return await sign_spends([coin_spend], keys)
+
+    pipeline.step("get_wallet_keys", get_keys)
+    pipeline.step("sign_coin_spends", sign, ["get_wallet_keys"])
+
+    if missing_mojos > 0:
+        log(str(missing_mojos))
+        # Create an empty coin and immediately spend while checking the auction coin announcement
+        p2_conditions_puzzle = p2_conditions.puzzle_for_conditions(
+            [
+                make_assert_coin_announcement(Announcement(coin.name(), b"$").name()),
+            ]
+        )
+        p2_conditions_puzzle_hash = p2_conditions_puzzle.get_tree_hash()
+
+        async def create_p2_conditions_tx() -> SpendBundle:
+            # This transaction also pays the fee, so no separate fee transaction is needed
+            create_p2_conditions_tx = await wallet_client.create_signed_transaction(
+                [{"amount": missing_mojos, "puzzle_hash": p2_conditions_puzzle_hash}],
+                tx_config,
+                fee=fee,
+            )
+            p2_conditions_spend = CoinSpend(
+                Coin(
+                    create_p2_conditions_tx.removals[0].name(),
+                    p2_conditions_puzzle_hash,
+                    missing_mojos,
+                ),
+                p2_conditions_puzzle,
+                Program.to(0),
+            )
+            return SpendBundle.aggregate(
+                [create_p2_conditions_tx.spend_bundle, SpendBundle([p2_conditions_spend], G2Element())]
+            )
+
+        pipeline.step("create_p2_conditions_tx", create_p2_conditions_tx)
+    elif fee > 0:
+
+        async def get_next_address() -> str:
+            return await wallet_client.get_next_address(1, False)
+
+        async def create_fee_tx(my_address: str) -> SpendBundle:
+            fee_tx = await wallet_client.create_signed_transaction(
+                [{"amount": 0, "puzzle_hash": decode_puzzle_hash(my_address)}],
+                tx_config,
+                fee=fee,
+            )
+            return fee_tx.spend_bundle
+
+        pipeline.step("get_next_address", get_next_address)
+        pipeline.step("create_fee_tx", create_fee_tx, ["get_next_address"])
+
+    results = await pipeline.run()
+    log("Wallet calls:")
+    for line in pipeline.report():
+        log(line)
+
+    spend_bundle = SpendBundle.aggregate(
+        [results[name] for name in ("sign_coin_spends", "create_p2_conditions_tx", "create_fee_tx") if name in results]
+    )
+
+    trace_spend_bundle(spend_bundle)
+    emit_spend_bundle(spend_bundle, log, output, save_bundle)
+    report_fee(log, coin_spends_cost(spend_bundle.coin_spends), fee + surplus, quote)
+
+    error = verify_spend_bundle(spend_bundle)
+    if error is not None:
+        log(f"Not pushing the spend bundle: {error}")
+        return None
+
+    log("Pushing transaction...")
+    pushed = PushedBundle.from_spend_bundle(spend_bundle, Path(puzzle).stem)
+    result = await wallet_client.push_tx(spend_bundle)
+    # What `--wait` and `chiwo track` need to follow the bundle onto the chain
+    return {**result, "pushed": pushed.to_json_dict()}
+
+
+async def create_auction(
+    wallet_client: WalletRpcClient,
+    endheight: int,
+    log: Log,
+    confirm: Confirm,
+    output: str = "pretty",
+    save_bundle: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    from blspy import G2Element
+    from chia.types.announcement import Announcement
+    from chia.types.blockchain_format.program import Program
+    from chia.types.blockchain_format.sized_bytes import bytes32
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.spend_bundle import SpendBundle
+    from chia.util.bech32m import decode_puzzle_hash
+    from chia.util.ints import uint64
+    from chia.wallet.puzzles import p2_conditions
+    from chia.wallet.puzzles.puzzle_utils import make_assert_coin_announcement
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import (
+        SINGLETON_LAUNCHER,
+        generate_launcher_coin,
+        lineage_proof_for_coinsol,
+        puzzle_for_singleton,
+        solution_for_singleton,
+    )
+    from chia_rs import Coin
+
+    tx_config = get_tx_config()
+    auction_puzzle = load_program("clsp/5-auction.clsp")
+    auction_mod_hash = load_program_hash("clsp/5-auction.clsp")
+    p2_auction_mod_hash = load_program_hash("clsp/5-p2_auction.clsp")
+    if auction_puzzle is None or auction_mod_hash is None or p2_auction_mod_hash is None:
+        return None
+
+    # The creator address and the origin coin don't depend on each other, so both are fetched at once
+    pipeline = Pipeline()
+
+    async def get_next_address() -> str:
+        return await wallet_client.get_next_address(1, False)
+
+    async def select_coins() -> List[Coin]:
+        return await wallet_client.select_coins(1, 1, tx_config.coin_selection_config)
+
+    pipeline.step("get_next_address", get_next_address)
+    pipeline.step("select_coins", select_coins)
+    results = await pipeline.run()
+
+    creator_puzhash = decode_puzzle_hash(results["get_next_address"])
+
+    curried_auction_puzzle = auction_puzzle.curry(auction_mod_hash, creator_puzhash, uint64(endheight), creator_puzhash)
+
+    origin = results["select_coins"].copy().pop()
+
+    launcher_coin: Coin = generate_launcher_coin(origin, uint64(1))
+
+    # The full program is only needed as the puzzle reveal, its hash comes from the hash-only path
+    auction_full_puzzle: Program = puzzle_for_singleton(launcher_coin.name(), curried_auction_puzzle)
+    auction_full_puzzle_hash = bytes32(
+        auction_puzzle_hash(launcher_coin.name(), auction_mod_hash, creator_puzhash, endheight, creator_puzhash)
+    )
+
+    launcher_solution = Program.to([auction_full_puzzle_hash, 1, []])
+    launcher_coin_spend = CoinSpend(
+        launcher_coin,
+        SINGLETON_LAUNCHER,
+        launcher_solution,
+    )
+
+    auction_coin = Coin(launcher_coin.name(), auction_full_puzzle_hash, 1)
+
+    second_bid_amount = 2
+    auction_inner_solution = Program.to([0, 1, creator_puzhash, second_bid_amount])
+    lineage_proof = lineage_proof_for_coinsol(launcher_coin_spend)
+    auction_solution = solution_for_singleton(lineage_proof, auction_coin.amount, auction_inner_solution)
+    auction_coin_spend = CoinSpend(
+        auction_coin,
+        auction_full_puzzle,
+        auction_solution,
+    )
+
+    with trace.span("run_puzzle", "clvm", puzzle="auction"):
+        cost, result = auction_full_puzzle.run_with_cost(get_constants().MAX_BLOCK_COST_CLVM, auction_solution)
+    trace.counter("clvm_cost", run_puzzle=cost)
+    # print(disassemble(result))
+
+    # Create an empty coin and immediately spend while checking the auction coin announcement
+    p2_conditions_puzzle = p2_conditions.puzzle_for_conditions(
+        [
+            make_assert_coin_announcement(Announcement(auction_coin.name(), b"$").name()),
+        ]
+    )
+    p2_conditions_puzzle_hash = p2_conditions_puzzle.get_tree_hash()
+    p2_conditions_spend = CoinSpend(
+        Coin(origin.name(), p2_conditions_puzzle_hash, second_bid_amount),
+        p2_conditions_puzzle,
+        Program.to(0),
+    )
+
+    # The origin transaction carries the fee, priced for the whole bundle
+    quote = await quote_fee_for([launcher_coin_spend, auction_coin_spend, p2_conditions_spend])
+    fee = quote.fee
+
+    origin_spend_start = time.perf_counter()
+    origin_spend_transaction = await wallet_client.create_signed_transaction(
+        [
+            {"amount": launcher_coin.amount, "puzzle_hash": launcher_coin.puzzle_hash},
+            {"amount": second_bid_amount, "puzzle_hash": p2_conditions_puzzle_hash},
+        ],
+        tx_config,
+        [origin],
+        fee,
+        coin_announcements=[
+            Announcement(launcher_coin.name(), launcher_solution.get_tree_hash()),
+        ],
+    )
+
+    spend_bundle = SpendBundle.aggregate(
+        [
+            SpendBundle([launcher_coin_spend, p2_conditions_spend, auction_coin_spend], G2Element()),
+            origin_spend_transaction.spend_bundle,
+        ]
+    )
+
+    log("Wallet calls:")
+    for line in pipeline.report():
+        log(line)
+    log(f"  {'create_signed_transaction':<24} took {(time.perf_counter() - origin_spend_start) * 1000:7.1f} ms")
+
+    trace_spend_bundle(spend_bundle)
+    emit_spend_bundle(spend_bundle, log, output, save_bundle)
+    report_fee(log, coin_spends_cost(spend_bundle.coin_spends), fee, quote)
+
+    confirm("Do you want to create a new auction?")
+
+    log("Pushing transaction...")
+    pushed = PushedBundle.from_spend_bundle(spend_bundle, "create_auction")
+    result = await wallet_client.push_tx(spend_bundle)
+
+    log(json.dumps(result, sort_keys=True, indent=4))
+
+    # The creator placed the first bid, so the next auction coin has the same puzzle with a higher amount
+    expected_auction_full_puzzle = auction_full_puzzle
+    expected_auction_coin = Coin(auction_coin.name(), auction_full_puzzle_hash, second_bid_amount + 1)
+
+    p2_auction_full_puzzle_hash = p2_auction_puzzle_hash(p2_auction_mod_hash, launcher_coin.name())
+
+    log(f"Auction Launcher ID: `{launcher_coin.name().hex()}`")
+    log(f"P2_auction puzzle hash: `{p2_auction_full_puzzle_hash.hex()}`")
+    log(f"Creator puzzle hash: `{creator_puzhash.hex()}`")
+    log(f"End Height: `{endheight}`")
+    log(f"Highest bidder puzzle hash: `{creator_puzhash.hex()}`")
+    log("")
+    log(f"Latest auction coin ID: `{expected_auction_coin.name().hex()}`")
+    log(f"Latest auction coin: `{expected_auction_coin.to_json_dict()}`")
+    log(f"Latest auction puzzle: `{bytes(expected_auction_full_puzzle).hex()}`")
+
+    return {
+        "push_result": result,
+        "pushed": pushed.to_json_dict(),
+        "launcher_id": launcher_coin.name().hex(),
+        "p2_auction_puzzle_hash": p2_auction_full_puzzle_hash.hex(),
+        "creator_puzzle_hash": creator_puzhash.hex(),
+        "end_height": int(endheight),
+        "latest_auction_coin": expected_auction_coin.to_json_dict(),
+        "latest_auction_puzzle": bytes(expected_auction_full_puzzle).hex(),
+    }
+
+
+async def push(wallet_client: WalletRpcClient, file: str, log: Log) -> Optional[Dict[str, Any]]:
+    spend_bundle = load_spend_bundle(file)
+    log(f"Spend bundle {spend_bundle.name().hex()} with {len(spend_bundle.coin_spends)} coin spends")
+    trace_spend_bundle(spend_bundle)
+    error = verify_spend_bundle(spend_bundle)
+    if error is not None:
+        log(f"Not pushing the spend bundle: {error}")
+        return None
+
+    log("Pushing transaction...")
+    pushed = PushedBundle.from_spend_bundle(spend_bundle, "push")
+    result = await wallet_client.push_tx(spend_bundle)
+    return {**result, "pushed": pushed.to_json_dict()}
+
+
+def get_singleton_puzzle(file: str, launcherid: str) -> bool:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_for_singleton
+
+    parsed_puzzle = load_program(file)
+    if parsed_puzzle is None:
+        return False
+    with open(file + ".singleton.hex", "w") as filehandle:
+        filehandle.write(bytes(puzzle_for_singleton(bytes.fromhex(launcherid.replace("0x", "")), parsed_puzzle)).hex())
+    return True
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+
+@dataclass
+class StepTiming:
+    name: str
+    started: float
+    seconds: float
+
+
+class Pipeline:
+    """
+    Runs named async steps concurrently. A step starts as soon as the steps it depends on have finished
+    and receives their results as positional arguments, so independent wallet RPCs overlap instead of
+    paying one round trip after the other.
+    """
+
+    def __init__(self) -> None:
+        self._steps: Dict[str, Tuple[Callable[..., Awaitable[Any]], Sequence[str]]] = {}
+        self.timings: List[StepTiming] = []
+
+    def step(self, name: str, function: Callable[..., Awaitable[Any]], depends_on: Sequence[str] = ()) -> None:
+        for dependency in depends_on:
+            if dependency not in self._steps:
+                raise ValueError(f"Step {name} depends on unknown step {dependency}")
+        self._steps[name] = (function, depends_on)
+
+    async def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(name: str) -> Any:
+            function, depends_on = self._steps[name]
+            arguments = [await tasks[dependency] for dependency in depends_on]
+            step_start = time.perf_counter()
+            result = await function(*arguments)
+            self.timings.append(StepTiming(name, step_start - start, time.perf_counter() - step_start))
+            return result
+
+        # Steps can only depend on steps added before them, so creating the tasks in order is enough
+        for name in self._steps:
+            tasks[name] = asyncio.ensure_future(run_step(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return {name: task.result() for name, task in tasks.items()}
+
+    def report(self) -> List[str]:
+        return [
+            f"  {timing.name:<24} +{timing.started * 1000:7.1f} ms  took {timing.seconds * 1000:7.1f} ms"
+            for timing in sorted(self.timings, key=lambda timing: timing.started)
+        ]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Tuple
+
+# Python counterpart of `curry_hashes` in clsp/include/curry.clib: computes the tree hash of a curried puzzle
+# from the hash of the mod and the tree hashes of the arguments, without building the curried program.
+# Everything works on plain 32 byte hashes, so it doesn't need to import chia.
+
+
+def sha256(*args: bytes) -> bytes:
+    return hashlib.sha256(b"".join(args)).digest()
+
+
+def hash_atom(atom: bytes) -> bytes:
+    return sha256(b"\1", atom)
+
+
+def hash_pair(first: bytes, rest: bytes) -> bytes:
+    return sha256(b"\2", first, rest)
+
+
+def int_to_atom(value: int) -> bytes:
+    # The minimal signed big-endian encoding CLVM uses for integers
+    if value == 0:
+        return b""
+    atom = value.to_bytes((value.bit_length() + 8) >> 3, "big", signed=True)
+    while len(atom) > 1 and atom[0] == (0xFF if atom[1] & 0x80 else 0):
+        atom = atom[1:]
+    return atom
+
+
+def hash_int(value: int) -> bytes:
+    return hash_atom(int_to_atom(value))
+
+
+# The same constants as `constant_tree` in curry.clib
+SHA256_ONE = hash_atom(b"")  # `(sha256 1)`, the hash of nil
+SHA256_ONE_ONE = hash_atom(b"\1")  # `(sha256 1 1)`, the hash of `q` and of the environment `1`
+TWO_SHA256_ONE_A_KW = b"\2" + hash_atom(b"\2")  # `(concat 2 (sha256 1 #a))`
+TWO_SHA256_ONE_C_KW = b"\2" + hash_atom(b"\4")  # `(concat 2 (sha256 1 #c))`
+
+
+def hash_expression_f(a1: bytes, a2: bytes) -> bytes:
+    # The hash of `((q . a1) a2)`
+    return hash_pair(hash_pair(SHA256_ONE_ONE, a1), hash_pair(a2, SHA256_ONE))
+
+
+def curry_hashes(mod_hash: bytes, *curry_parameter_hashes: bytes) -> bytes:
+    """
+    Returns the tree hash of `mod` curried with the given parameters, where every parameter is passed as its
+    tree hash (i.e. `hash_atom(x)` for atoms) and `mod_hash` is the tree hash of the uncurried mod.
+    """
+    environment_hash = SHA256_ONE_ONE
+    for parameter_hash in reversed(curry_parameter_hashes):
+        environment_hash = sha256(TWO_SHA256_ONE_C_KW, hash_expression_f(parameter_hash, environment_hash))
+    return sha256(TWO_SHA256_ONE_A_KW, hash_expression_f(mod_hash, environment_hash))
+
+
+@lru_cache(maxsize=1)
+def singleton_hashes() -> Tuple[bytes, bytes]:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import SINGLETON_LAUNCHER_HASH, SINGLETON_MOD_HASH
+
+    return bytes(SINGLETON_MOD_HASH), bytes(SINGLETON_LAUNCHER_HASH)
+
+
+def singleton_struct_hash(launcher_id: bytes) -> bytes:
+    singleton_mod_hash, launcher_hash = singleton_hashes()
+    return hash_pair(hash_atom(singleton_mod_hash), hash_pair(hash_atom(launcher_id), hash_atom(launcher_hash)))
+
+
+def singleton_puzzle_hash(launcher_id: bytes, inner_puzzle_hash: bytes) -> bytes:
+    """The tree hash of `puzzle_for_singleton(launcher_id, inner_puzzle)`."""
+    singleton_mod_hash, _ = singleton_hashes()
+    return curry_hashes(singleton_mod_hash, singleton_struct_hash(launcher_id), inner_puzzle_hash)
+
+
+def auction_inner_puzzle_hash(
+    auction_mod_hash: bytes, creator_puzhash: bytes, end_height: int, highest_bidder_puzhash: bytes
+) -> bytes:
+    # Mirrors `build_puzzle_hash` in 5-auction.clsp
+    return curry_hashes(
+        auction_mod_hash,
+        hash_atom(auction_mod_hash),
+        hash_atom(creator_puzhash),
+        hash_int(end_height),
+        hash_atom(highest_bidder_puzhash),
+    )
+
+
+def auction_puzzle_hash(
+    launcher_id: bytes,
+    auction_mod_hash: bytes,
+    creator_puzhash: bytes,
+    end_height: int,
+    highest_bidder_puzhash: bytes,
+) -> bytes:
+    """The full singleton puzzle hash of the auction coin with the given highest bidder."""
+    inner_puzzle_hash = auction_inner_puzzle_hash(auction_mod_hash, creator_puzhash, end_height, highest_bidder_puzhash)
+    return singleton_puzzle_hash(launcher_id, inner_puzzle_hash)
+
+
+def p2_auction_puzzle_hash(p2_auction_mod_hash: bytes, launcher_id: bytes) -> bytes:
+    singleton_mod_hash, launcher_hash = singleton_hashes()
+    return curry_hashes(
+        p2_auction_mod_hash, hash_atom(singleton_mod_hash), hash_atom(launcher_id), hash_atom(launcher_hash)
+    )
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from pprint import pprint
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Union
+
+from workshop import trace
+from workshop.config import get_config
+
+if TYPE_CHECKING:
+    from chia.rpc.full_node_rpc_client import FullNodeRpcClient
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+
+
+# Loading the client requires the standard chia root directory configuration that all of the chia commands rely on.
+# Another wallet (e.g. one shard of `chiwo shard-run`) is reached with its own host, port and root directory.
+async def get_wallet_client(
+    hostname: Optional[str] = None, port: Optional[int] = None, root_path: Optional[Path] = None
+) -> Optional[WalletRpcClient]:
+    import aiohttp
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.util.config import load_config
+    from chia.util.default_root import DEFAULT_ROOT_PATH
+    from chia.util.ints import uint16
+
+    config = get_config() if root_path is None else load_config(root_path, "config.yaml")
+    try:
+        self_hostname = hostname or config["self_hostname"]
+        wallet_rpc_port = port or config["wallet"]["rpc_port"]
+        with trace.span("connect", "rpc", port=wallet_rpc_port):
+            wallet_client: Optional[WalletRpcClient] = await WalletRpcClient.create(
+                self_hostname, uint16(wallet_rpc_port), root_path or DEFAULT_ROOT_PATH, config
+            )
+        if trace.get_tracer() is not None:
+            return trace.TracedWalletClient(wallet_client)  # type: ignore[return-value]
+        return wallet_client
+    except Exception as e:
+        if isinstance(e, aiohttp.ClientConnectorError):
+            pprint(f"Connection error. Check if wallet is running at {wallet_rpc_port}")
+        else:
+            pprint(f"Exception from 'harvester' {e}")
+        return None
+
+
+async def close_rpc_client(client: Optional[Union[WalletRpcClient, FullNodeRpcClient]]) -> None:
+    if client is not None:
+        client.close()
+        await client.await_closed()
+
+
+@asynccontextmanager
+async def wallet_client_session(
+    hostname: Optional[str] = None, port: Optional[int] = None, root_path: Optional[Path] = None
+) -> AsyncIterator[WalletRpcClient]:
+    wallet_client = await get_wallet_client(hostname, port, root_path)
+    if wallet_client is None:
+        raise RuntimeError("Could not connect to the wallet")
+    try:
+        yield wallet_client
+    finally:
+        await close_rpc_client(wallet_client)
+
+
+async def get_full_node_client() -> Optional[FullNodeRpcClient]:
+    import aiohttp
+    from chia.rpc.full_node_rpc_client import FullNodeRpcClient
+    from chia.util.default_root import DEFAULT_ROOT_PATH
+    from chia.util.ints import uint16
+
+    config = get_config()
+    try:
+        self_hostname = config["self_hostname"]
+        full_node_rpc_port = config["full_node"]["rpc_port"]
+        with trace.span("connect", "rpc", port=full_node_rpc_port):
+            full_node_client: Optional[FullNodeRpcClient] = await FullNodeRpcClient.create(
+                self_hostname, uint16(full_node_rpc_port), DEFAULT_ROOT_PATH, config
+            )
+        if trace.get_tracer() is not None:
+            return trace.TracedWalletClient(full_node_client)  # type: ignore[return-value]
+        return full_node_client
+    except Exception as e:
+        if isinstance(e, aiohttp.ClientConnectorError):
+            pprint(f"Connection error. Check if full node is running at {full_node_rpc_port}")
+        else:
+            pprint(f"Exception from 'full_node' {e}")
+        return None
+
+
+@asynccontextmanager
+async def full_node_client_session() -> AsyncIterator[FullNodeRpcClient]:
+    full_node_client = await get_full_node_client()
+    if full_node_client is None:
+        raise RuntimeError("Could not connect to the full node")
+    try:
+        yield full_node_client
+    finally:
+        await close_rpc_client(full_node_client)
+
+
+class WalletClientPool:
+    """
+    Keeps a single wallet RPC connection open for a long-running process.
+
+    The connection is health-checked with the RPC `healthz` endpoint before it is handed out, at most once per
+    `health_check_interval` seconds, and transparently re-created when the check fails.
+    """
+
+    def __init__(self, health_check_interval: float = 5.0):
+        self.health_check_interval = health_check_interval
+        self._client: Optional[WalletRpcClient] = None
+        self._last_healthy = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _is_healthy(self, client: WalletRpcClient) -> bool:
+        try:
+            response = await client.fetch("healthz", {})
+            return bool(response.get("success"))
+        except Exception:
+            return False
+
+    async def get(self) -> WalletRpcClient:
+        async with self._lock:
+            now = time.monotonic()
+            if self._client is not None and now - self._last_healthy > self.health_check_interval:
+                if await self._is_healthy(self._client):
+                    self._last_healthy = now
+                else:
+                    await close_rpc_client(self._client)
+                    self._client = None
+            if self._client is None:
+                self._client = await get_wallet_client()
+                if self._client is None:
+                    raise RuntimeError("Could not connect to the wallet")
+                # Creating the client doesn't talk to the wallet yet, so the next request checks the new connection
+                self._last_healthy = 0.0
+            return self._client
+
+    async def invalidate(self) -> None:
+        # Called after a request failed on the connection, so the next request reconnects
+        async with self._lock:
+            await close_rpc_client(self._client)
+            self._client = None
+
+    async def close(self) -> None:
+        await self.invalidate()
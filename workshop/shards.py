@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from workshop.config import get_tx_config
+from workshop.fees import WALLET_TX_COST, quote_fee
+from workshop.operations import Log
+from workshop.rpc import wallet_client_session
+from workshop.tracking import PushedBundle, wait_for_confirmations
+
+if TYPE_CHECKING:
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.wallet.transaction_record import TransactionRecord
+    from chia_rs import Coin
+
+# Running one workload across several wallets (`chiwo shard-run`). Every shard is a wallet service logged in with
+# its own key. Before the workload starts, each shard splits off one coin per operation, and its operations only
+# ever spend those coins, so concurrent operations neither pick the same coins nor wait on another shard's wallet.
+
+# Outputs per split transaction, well below the mempool cost limit
+MAX_SPLIT_OUTPUTS = 500
+# The cost of one CREATE_COIN condition, to price the split transactions
+CREATE_COIN_COST = 1_800_000
+
+Operation = Callable[["WalletRpcClient"], Awaitable[Any]]
+
+
+@dataclass
+class Shard:
+    name: str
+    hostname: Optional[str] = None
+    port: Optional[int] = None
+    # The chia root directory with the config and certificates of the wallet, if it isn't the default one
+    root: Optional[str] = None
+    fingerprint: Optional[int] = None
+
+
+def read_shards(file: str) -> List[Shard]:
+    """A JSON list of shards, e.g. `[{"port": 9256, "fingerprint": 123}, {"port": 9266, "root": "~/.chia/b"}]`."""
+    with open(file) as filehandle:
+        shards = json.load(filehandle)
+    return [Shard(**{"name": f"shard{index}", **shard}) for index, shard in enumerate(shards)]
+
+
+class PooledWalletClient:
+    """A wallet client whose transactions spend exactly one coin of a pre-split pool each."""
+
+    def __init__(self, wallet_client: WalletRpcClient, coins: List[Coin]):
+        self.wallet_client = wallet_client
+        self.pool: Deque[Coin] = deque(coins)
+
+    def take(self, amount: int) -> Coin:
+        if not self.pool:
+            raise RuntimeError("The coin pool of this shard is empty")
+        coin = self.pool.popleft()
+        if coin.amount < amount:
+            raise RuntimeError(f"Pool coins have {coin.amount} mojos, this transaction needs {amount}")
+        return coin
+
+    async def select_coins(self, amount: int, wallet_id: int, coin_selection_config: Any = None) -> List[Coin]:
+        return [self.take(amount)]
+
+    async def create_signed_transaction(
+        self,
+        additions: List[Dict[str, Any]],
+        tx_config: Any,
+        coins: Optional[List[Coin]] = None,
+        fee: int = 0,
+        **kwargs: Any,
+    ) -> TransactionRecord:
+        if coins is None:
+            coins = [self.take(sum(int(addition["amount"]) for addition in additions) + fee)]
+        return await self.wallet_client.create_signed_transaction(additions, tx_config, coins, fee, **kwargs)
+
+    async def send_transaction(
+        self, wallet_id: int, amount: int, address: str, tx_config: Any, fee: int = 0, **kwargs: Any
+    ) -> TransactionRecord:
+        from chia.util.bech32m import decode_puzzle_hash
+
+        transaction = await self.create_signed_transaction(
+            [{"amount": amount, "puzzle_hash": decode_puzzle_hash(address)}], tx_config, fee=fee
+        )
+        await self.wallet_client.push_tx(transaction.spend_bundle)
+        return transaction
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.wallet_client, name)
+
+
+async def split_coins(wallet_client: WalletRpcClient, count: int, amount: int, log: Log) -> List[Coin]:
+    """Creates `count` coins of at least `amount` mojos and waits until they are confirmed."""
+    from chia.util.bech32m import decode_puzzle_hash
+
+    puzzle_hash = decode_puzzle_hash(await wallet_client.get_next_address(1, False))
+    transactions = []
+    split_amounts = []
+    for start in range(0, count, MAX_SPLIT_OUTPUTS):
+        # Outputs with the same puzzle hash and amount would be the same coin, so every amount is different
+        amounts = [amount + index for index in range(start, min(start + MAX_SPLIT_OUTPUTS, count))]
+        additions = [{"amount": output_amount, "puzzle_hash": puzzle_hash} for output_amount in amounts]
+        quote = await quote_fee(WALLET_TX_COST + len(additions) * CREATE_COIN_COST)
+        # The wallet records these transactions, so the next split never spends the same coins
+        transactions.append(await wallet_client.send_transaction_multi(1, additions, get_tx_config(), fee=quote.fee))
+        split_amounts.append(amounts)
+
+    pushed = [PushedBundle.from_spend_bundle(transaction.spend_bundle, "shard_split") for transaction in transactions]
+    confirmations = await wait_for_confirmations(pushed, log, histogram=None)
+    if any(confirmation.status != "confirmed" for confirmation in confirmations):
+        raise RuntimeError("The split transactions were not confirmed")
+    coins = []
+    for transaction, amounts in zip(transactions, split_amounts):
+        # The change goes to the same puzzle hash (reuse_puzhash), so the outputs are picked by their exact amounts
+        outputs = {coin.amount: coin for coin in transaction.additions if coin.puzzle_hash == puzzle_hash}
+        missing = [output_amount for output_amount in amounts if output_amount not in outputs]
+        if missing:
+            raise RuntimeError(f"The split transaction has no output of {missing[0]} mojos")
+        coins.extend(outputs[output_amount] for output_amount in amounts)
+    return coins
+
+
+@dataclass
+class ShardResult:
+    shard: str
+    operations: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    split_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    # Set when the shard itself failed (e.g. its wallet was unreachable), so none of its operations ran
+    error: Optional[str] = None
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "shard": self.shard,
+            "error": self.error,
+            "operations": self.operations,
+            "failed": self.failed,
+            "seconds": self.seconds,
+            "split_seconds": self.split_seconds,
+            "per_second": self.operations / max(self.seconds, 1e-9),
+            "median_ms": statistics.median(self.latencies) * 1000 if self.latencies else None,
+        }
+
+
+async def run_shard(
+    shard: Shard, count: int, operation: Operation, coin_amount: int, concurrency: int, log: Log
+) -> ShardResult:
+    result = ShardResult(shard.name)
+    if count == 0:
+        return result
+    root = Path(shard.root).expanduser() if shard.root else None
+    async with wallet_client_session(shard.hostname, shard.port, root) as wallet_client:
+        if shard.fingerprint is not None:
+            await wallet_client.log_in(shard.fingerprint)
+
+        split_start = time.perf_counter()
+        coins = await split_coins(wallet_client, count, coin_amount, log)
+        result.split_seconds = time.perf_counter() - split_start
+        log(f"[{shard.name}] Split {len(coins)} coins in {result.split_seconds:.1f} s")
+
+        pooled = PooledWalletClient(wallet_client, coins)
+        pending = deque(range(count))
+
+        async def worker() -> None:
+            while pending:
+                index = pending.popleft()
+                start = time.perf_counter()
+                try:
+                    if await operation(pooled) is None:
+                        raise RuntimeError("the operation returned nothing")
+                except Exception as e:
+                    result.failed += 1
+                    log(f"[{shard.name}] Operation {index} failed: {e}")
+                    continue
+                result.operations += 1
+                result.latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(min(concurrency, count))])
+        result.seconds = time.perf_counter() - start
+    log(
+        f"[{shard.name}] {result.operations} operations in {result.seconds:.1f} s "
+        f"({result.operations / max(result.seconds, 1e-9):.2f}/s), {result.failed} failed"
+    )
+    return result
+
+
+async def run_shards(
+    shards: List[Shard], count: int, operation: Operation, coin_amount: int, concurrency: int, log: Log
+) -> Dict[str, Any]:
+    counts = [count // len(shards) + (1 if index < count % len(shards) else 0) for index in range(len(shards))]
+    outcomes = await asyncio.gather(
+        *[
+            run_shard(shard, shard_count, operation, coin_amount, concurrency, log)
+            for shard, shard_count in zip(shards, counts)
+        ],
+        return_exceptions=True,
+    )
+    # A shard that fails doesn't stop the others, its operations are counted as failed
+    results = []
+    for shard, shard_count, outcome in zip(shards, counts, outcomes):
+        if isinstance(outcome, ShardResult):
+            results.append(outcome)
+        else:
+            log(f"[{shard.name}] Failed: {outcome}")
+            results.append(ShardResult(shard.name, failed=shard_count, error=str(outcome)))
+    # The shards run side by side, so the workload took as long as the slowest shard
+    seconds = max(result.seconds for result in results)
+    operations = sum(result.operations for result in results)
+    log(f"Total: {operations} operations in {seconds:.1f} s ({operations / max(seconds, 1e-9):.2f}/s)")
+    return {
+        "shards": [result.to_json_dict() for result in results],
+        "operations": operations,
+        "failed": sum(result.failed for result in results),
+        "seconds": seconds,
+        "per_second": operations / max(seconds, 1e-9),
+    }
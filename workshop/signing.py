@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from workshop import trace
+from workshop.config import get_constants
+
+if TYPE_CHECKING:
+    from blspy import G1Element, PrivateKey
+    from chia.rpc.wallet_rpc_client import WalletRpcClient
+    from chia.types.coin_spend import CoinSpend
+    from chia.types.spend_bundle import SpendBundle
+
+# Signing for puzzles that require the wallet's master key. Keys are fetched and parsed once per fingerprint and
+# process (which makes them free for `chiwo serve` after the first request), large batches are signed across
+# worker processes, and bundles can be checked locally before they are pushed.
+
+# Below this many coin spends, starting worker processes costs more than it saves
+PARALLEL_SIGNING_THRESHOLD = 64
+
+
+@dataclass(frozen=True)
+class WalletKeys:
+    fingerprint: int
+    public_key: G1Element
+    secret_key: PrivateKey
+
+    def pk_to_sk(self, pk: G1Element) -> Optional[PrivateKey]:
+        return self.secret_key if pk == self.public_key else None
+
+
+_keys: Dict[int, WalletKeys] = {}
+_default_fingerprint: Optional[int] = None
+
+
+async def get_wallet_keys(wallet_client: WalletRpcClient, fingerprint: Optional[int] = None) -> WalletKeys:
+    """The parsed keys for `fingerprint`, or for the wallet's first key. Only the first call talks to the wallet."""
+    from blspy import G1Element, PrivateKey
+
+    global _default_fingerprint
+    if fingerprint is None:
+        if _default_fingerprint is None:
+            public_keys = await wallet_client.get_public_keys()
+            _default_fingerprint = public_keys[0]
+        fingerprint = _default_fingerprint
+    keys = _keys.get(fingerprint)
+    if keys is None:
+        private_key: Dict = await wallet_client.get_private_key(fingerprint)
+        with trace.span("parse_keys", "sign"):
+            keys = WalletKeys(
+                fingerprint,
+                G1Element.from_bytes(bytes.fromhex(private_key["pk"])),
+                PrivateKey.from_bytes(bytes.fromhex(private_key["sk"])),
+            )
+        _keys[fingerprint] = keys
+    return keys
+
+
+def clear_key_cache() -> None:
+    # For when the wallet switched keys, e.g. after a failed request in `chiwo serve`
+    global _default_fingerprint
+    _keys.clear()
+    _default_fingerprint = None
+
+
+async def _sign(coin_spends: List[CoinSpend], keys: WalletKeys) -> SpendBundle:
+    from chia.wallet.sign_coin_spends import sign_coin_spends
+
+    constants = get_constants()
+    return await sign_coin_spends(
+        coin_spends,
+        keys.pk_to_sk,
+        lambda _: None,
+        constants.AGG_SIG_ME_ADDITIONAL_DATA,
+        constants.MAX_BLOCK_COST_CLVM,
+        [],
+    )
+
+
+def _sign_chunk(fingerprint: int, public_key: bytes, secret_key: bytes, coin_spends: List[bytes]) -> bytes:
+    # Runs in a worker process, so everything goes in and out as bytes
+    from blspy import G1Element, PrivateKey
+    from chia.types.coin_spend import CoinSpend
+
+    keys = WalletKeys(fingerprint, G1Element.from_bytes(public_key), PrivateKey.from_bytes(secret_key))
+    spend_bundle = asyncio.run(_sign([CoinSpend.from_bytes(coin_spend) for coin_spend in coin_spends], keys))
+    return bytes(spend_bundle.aggregated_signature)
+
+
+async def sign_spends(coin_spends: List[CoinSpend], keys: WalletKeys, jobs: Optional[int] = None) -> SpendBundle:
+    from blspy import AugSchemeMPL, G2Element
+    from chia.types.spend_bundle import SpendBundle
+
+    workers = min(jobs or os.cpu_count() or 1, len(coin_spends) // PARALLEL_SIGNING_THRESHOLD)
+    with trace.span("sign_coin_spends", "sign", coin_spends=len(coin_spends), workers=max(workers, 1)):
+        if workers <= 1:
+            return await _sign(coin_spends, keys)
+
+        size = -(-len(coin_spends) // workers)
+        serialized = [bytes(coin_spend) for coin_spend in coin_spends]
+        chunks = [serialized[i : i + size] for i in range(0, len(serialized), size)]
+        loop = asyncio.get_event_loop()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            signatures = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        _sign_chunk,
+                        keys.fingerprint,
+                        bytes(keys.public_key),
+                        bytes(keys.secret_key),
+                        chunk,
+                    )
+                    for chunk in chunks
+                ]
+            )
+        signature = AugSchemeMPL.aggregate([G2Element.from_bytes(signature) for signature in signatures])
+        return SpendBundle(coin_spends, signature)
+
+
+def verify_spend_bundle(spend_bundle: SpendBundle) -> Optional[str]:
+    """
+    Runs every spend the way the mempool does and checks the aggregated signature against the AGG_SIG conditions.
+    Returns why the bundle would be rejected, or None. Coin existence and timelocks are left to the full node.
+    """
+    from blspy import AugSchemeMPL, G1Element
+    from chia.full_node.bundle_tools import simple_solution_generator
+    from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
+    from chia.util.condition_tools import pkm_pairs
+    from chia.util.errors import Err
+    from chia.util.ints import uint32
+
+    constants = get_constants()
+    with trace.span("verify_spend_bundle", "sign", coin_spends=len(spend_bundle.coin_spends)):
+        npc_result = get_name_puzzle_conditions(
+            simple_solution_generator(spend_bundle),
+            constants.MAX_BLOCK_COST_CLVM,
+            mempool_mode=True,
+            height=uint32(constants.HARD_FORK_HEIGHT),
+            constants=constants,
+        )
+        if npc_result.error is not None:
+            return f"Invalid conditions: {Err(npc_result.error).name}"
+        assert npc_result.conds is not None
+        public_keys, messages = pkm_pairs(npc_result.conds, constants.AGG_SIG_ME_ADDITIONAL_DATA)
+        if not AugSchemeMPL.aggregate_verify(
+            [G1Element.from_bytes(bytes(public_key)) for public_key in public_keys],
+            messages,
+            spend_bundle.aggregated_signature,
+        ):
+            return "Invalid aggregated signature"
+    return None
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, repeat
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from workshop import trace
+from workshop.puzzle_hash import curry_hashes, hash_atom, hash_pair, singleton_hashes
+from workshop.utils import load_program, load_program_hash
+
+# Batch version of `get-singleton-puzzle`: singleton puzzle hashes for many launcher IDs around one inner puzzle.
+# The hashes come from the hash-only curry path, and full puzzles are spliced from one serialized template, so
+# nothing but the inner puzzle is ever parsed or built.
+
+# Launcher IDs per worker task; smaller inputs are handled in-process
+CHUNK_SIZE = 4096
+
+# Stands in for the launcher ID in the puzzle template
+PLACEHOLDER = bytes([0x5A] * 32)
+
+# Binary output is one record per launcher: the launcher ID and the puzzle hash (32 bytes each), followed by the
+# 4 byte big-endian length and the serialized puzzle when full puzzles are written
+
+
+@dataclass(frozen=True)
+class SingletonTemplate:
+    singleton_mod_hash: bytes
+    launcher_hash: bytes
+    inner_puzzle_hash: bytes
+    # The serialized full puzzle split around the launcher ID, if it is to be serialized
+    prefix: Optional[bytes] = None
+    suffix: Optional[bytes] = None
+
+    def puzzle_hash(self, launcher_id: bytes) -> bytes:
+        # singleton_puzzle_hash() without looking up the singleton hashes again in every worker
+        struct_hash = hash_pair(
+            hash_atom(self.singleton_mod_hash), hash_pair(hash_atom(launcher_id), hash_atom(self.launcher_hash))
+        )
+        return curry_hashes(self.singleton_mod_hash, struct_hash, self.inner_puzzle_hash)
+
+    def puzzle(self, launcher_id: bytes) -> bytes:
+        assert self.prefix is not None and self.suffix is not None
+        return self.prefix + launcher_id + self.suffix
+
+
+def read_launcher_ids(source: str) -> Iterator[bytes]:
+    # One launcher ID per line, "-" reads stdin
+    filehandle = sys.stdin if source == "-" else open(source)
+    try:
+        for line in filehandle:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                launcher_id = bytes.fromhex(line.replace("0x", ""))
+                if len(launcher_id) != 32:
+                    raise ValueError(f"Not a launcher ID: {line}")
+                yield launcher_id
+    finally:
+        if filehandle is not sys.stdin:
+            filehandle.close()
+
+
+def make_template(file: str, full_puzzles: bool) -> Optional[SingletonTemplate]:
+    from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_for_singleton
+
+    inner_puzzle_hash = load_program_hash(file)
+    if inner_puzzle_hash is None:
+        return None
+    singleton_mod_hash, launcher_hash = singleton_hashes()
+    if not full_puzzles:
+        return SingletonTemplate(singleton_mod_hash, launcher_hash, bytes(inner_puzzle_hash))
+
+    inner_puzzle = load_program(file)
+    serialized = bytes(puzzle_for_singleton(PLACEHOLDER, inner_puzzle))
+    # The launcher ID is serialized once as a 32 byte atom (0xa0 prefix); anything else can't be spliced
+    atom = b"\xa0" + PLACEHOLDER
+    if serialized.count(atom) != 1:
+        raise ValueError(f"{file} contains the launcher ID placeholder, can't build a puzzle template")
+    offset = serialized.index(atom) + 1
+    return SingletonTemplate(
+        singleton_mod_hash,
+        launcher_hash,
+        bytes(inner_puzzle_hash),
+        serialized[:offset],
+        serialized[offset + len(PLACEHOLDER) :],
+    )
+
+
+Result = Tuple[bytes, bytes, Optional[bytes]]
+
+
+def process_chunk(template: SingletonTemplate, launcher_ids: List[bytes]) -> List[Result]:
+    full = template.prefix is not None
+    return [
+        (launcher_id, template.puzzle_hash(launcher_id), template.puzzle(launcher_id) if full else None)
+        for launcher_id in launcher_ids
+    ]
+
+
+def chunked(launcher_ids: Iterable[bytes], size: int) -> Iterator[List[bytes]]:
+    chunk: List[bytes] = []
+    for launcher_id in launcher_ids:
+        chunk.append(launcher_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def singleton_puzzles(
+    template: SingletonTemplate, launcher_ids: Iterable[bytes], jobs: Optional[int] = None
+) -> Iterator[Result]:
+    """Yields (launcher_id, puzzle_hash, puzzle or None) in input order."""
+    chunks = chunked(launcher_ids, CHUNK_SIZE)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None or jobs == 1:
+        # Not worth starting workers for a single chunk
+        for chunk in chain([first], [second] if second is not None else [], chunks):
+            yield from process_chunk(template, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        for results in executor.map(process_chunk, repeat(template), chain([first, second], chunks)):
+            yield from results
+
+
+def write_jsonl(output: IO[str], results: Iterable[Result]) -> int:
+    count = 0
+    for launcher_id, puzzle_hash, puzzle in results:
+        record = {"launcher_id": launcher_id.hex(), "puzzle_hash": puzzle_hash.hex()}
+        if puzzle is not None:
+            record["puzzle"] = puzzle.hex()
+        output.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def write_binary(output: IO[bytes], results: Iterable[Result]) -> int:
+    count = 0
+    for launcher_id, puzzle_hash, puzzle in results:
+        output.write(launcher_id + puzzle_hash)
+        if puzzle is not None:
+            output.write(len(puzzle).to_bytes(4, "big") + puzzle)
+        count += 1
+    return count
+
+
+def get_singleton_puzzles(
+    file: str,
+    launcher_ids_source: str,
+    output: Optional[str],
+    binary: bool,
+    full_puzzles: bool,
+    jobs: Optional[int] = None,
+) -> Optional[int]:
+    """Writes the singleton puzzle hash (and puzzle) for every launcher ID, returns how many were written."""
+    template = make_template(file, full_puzzles)
+    if template is None:
+        return None
+    launcher_ids = read_launcher_ids(launcher_ids_source)
+    with trace.span("singleton_puzzles", "clvm", full_puzzles=full_puzzles) as span_args:
+        results = singleton_puzzles(template, launcher_ids, jobs)
+        if binary:
+            if output is None:
+                count = write_binary(sys.stdout.buffer, results)
+            else:
+                with open(output, "wb") as filehandle:
+                    count = write_binary(filehandle, results)
+        elif output is None:
+            count = write_jsonl(sys.stdout, results)
+        else:
+            with open(output, "w") as filehandle:
+                count = write_jsonl(filehandle, results)
+        span_args["launchers"] = count
+    return count
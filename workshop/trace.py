@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+# Hot-path tracing for `chiwo --trace out.json`. Spans and counters are recorded in the Chrome trace event
+# format, so the output opens in chrome://tracing or https://ui.perfetto.dev. A `.jsonl` file name writes one
+# event per line instead. When tracing is off, `span` and `counter` do nothing.
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self.pid = os.getpid()
+        self._start = time.perf_counter()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._start) * 1_000_000
+
+    def _tid(self) -> int:
+        # Concurrent asyncio tasks get their own track, so overlapping RPCs don't stack on one line
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return id(task) if task is not None else threading.get_ident()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        event: Dict[str, Any] = {"name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": self._tid()}
+        event["args"] = dict(args)
+        start = self._now_us()
+        try:
+            yield event["args"]
+        except BaseException as e:
+            event["args"]["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            event["ts"] = start
+            event["dur"] = self._now_us() - start
+            self.events.append(event)
+
+    def complete(self, name: str, category: str, seconds: float, **args: Any) -> None:
+        # For work that was timed elsewhere, e.g. in a worker process
+        now = self._now_us()
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "pid": self.pid,
+                "tid": self._tid(),
+                "ts": now - seconds * 1_000_000,
+                "dur": seconds * 1_000_000,
+                "args": args,
+            }
+        )
+
+    def counter(self, name: str, **values: float) -> None:
+        self.events.append({"name": name, "ph": "C", "pid": self.pid, "tid": 0, "ts": self._now_us(), "args": values})
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as filehandle:
+            if path.endswith(".jsonl"):
+                for event in self.events:
+                    filehandle.write(json.dumps(event, default=str) + "\n")
+            else:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, filehandle, default=str)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, category: str = "workshop", **args: Any) -> ContextManager[Dict[str, Any]]:
+    if _tracer is None:
+        return nullcontext({})
+    return _tracer.span(name, category, **args)
+
+
+def complete(name: str, category: str, seconds: float, **args: Any) -> None:
+    if _tracer is not None:
+        _tracer.complete(name, category, seconds, **args)
+
+
+def counter(name: str, **values: float) -> None:
+    if _tracer is not None:
+        _tracer.counter(name, **values)
+
+
+class TracedWalletClient:
+    """Wraps a WalletRpcClient (or any other RPC client) and records a span for every RPC call."""
+
+    def __init__(self, wallet_client: Any):
+        self._wallet_client = wallet_client
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._wallet_client, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            # `fetch` is the generic call, so the endpoint name is more useful than the method name
+            span_name = args[0] if name == "fetch" and args else name
+            with span(span_name, "rpc"):
+                return await attribute(*args, **kwargs)
+
+        return traced
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from workshop import trace
+
+if TYPE_CHECKING:
+    from chia.rpc.full_node_rpc_client import FullNodeRpcClient
+    from chia.types.spend_bundle import SpendBundle
+
+    from workshop.operations import Log
+
+DEFAULT_HISTOGRAM = ".chiwo/latency.json"
+
+# Watching pushed spend bundles until their coins are on chain. One poll asks the full node whether the bundles
+# entered the mempool (until they all did) and for the coin records of their removals and additions, however many
+# bundles are tracked. Polls start fast to catch the mempool entry and back off towards MAX_POLL_INTERVAL, since
+# blocks are much further apart; the confirmation time comes from the block timestamp, not from when the poll
+# noticed it.
+
+MIN_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 10.0
+POLL_BACKOFF = 1.5
+DEFAULT_TIMEOUT = 600.0
+
+# Upper bounds in seconds of the histogram buckets, the last bucket counts everything slower
+BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+
+@dataclass
+class PushedBundle:
+    name: bytes
+    removals: List[bytes]
+    additions: List[bytes]
+    pushed_at: float
+    kind: str
+
+    @classmethod
+    def from_spend_bundle(cls, spend_bundle: SpendBundle, kind: str, pushed_at: Optional[float] = None) -> PushedBundle:
+        return cls(
+            bytes(spend_bundle.name()),
+            [bytes(coin.name()) for coin in spend_bundle.removals()],
+            [bytes(coin.name()) for coin in spend_bundle.additions()],
+            time.time() if pushed_at is None else pushed_at,
+            kind,
+        )
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name.hex(),
+            "removals": [coin_id.hex() for coin_id in self.removals],
+            "additions": [coin_id.hex() for coin_id in self.additions],
+            "pushed_at": self.pushed_at,
+            "kind": self.kind,
+        }
+
+    @classmethod
+    def from_json_dict(cls, value: Dict[str, Any]) -> PushedBundle:
+        return cls(
+            bytes.fromhex(value["name"]),
+            [bytes.fromhex(coin_id) for coin_id in value["removals"]],
+            [bytes.fromhex(coin_id) for coin_id in value["additions"]],
+            float(value["pushed_at"]),
+            value["kind"],
+        )
+
+
+@dataclass
+class Confirmation:
+    bundle: PushedBundle
+    # "confirmed", "conflict" (the coins were spent by another bundle) or "timeout"
+    status: str = "pending"
+    mempool_seconds: Optional[float] = None
+    confirmation_seconds: Optional[float] = None
+    height: Optional[int] = None
+    polls: int = 0
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "spend_bundle": self.bundle.name.hex(),
+            "kind": self.bundle.kind,
+            "status": self.status,
+            "mempool_seconds": self.mempool_seconds,
+            "confirmation_seconds": self.confirmation_seconds,
+            "height": self.height,
+            "polls": self.polls,
+        }
+
+
+async def in_mempool(full_node_client: FullNodeRpcClient, names: Sequence[bytes]) -> List[bytes]:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    if len(names) == 1:
+        item = await full_node_client.get_mempool_item_by_tx_id(bytes32(names[0]))
+        return list(names) if item is not None else []
+    mempool = {bytes(tx_id) for tx_id in await full_node_client.get_all_mempool_tx_ids()}
+    return [name for name in names if name in mempool]
+
+
+async def track(
+    full_node_client: FullNodeRpcClient,
+    bundles: Sequence[PushedBundle],
+    log: Log,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> List[Confirmation]:
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    confirmations = [Confirmation(bundle) for bundle in bundles]
+    pending = list(confirmations)
+    deadline = time.monotonic() + timeout
+    interval = MIN_POLL_INTERVAL
+    with trace.span("track", "rpc", bundles=len(bundles)):
+        while pending:
+            unseen = [confirmation for confirmation in pending if confirmation.mempool_seconds is None]
+            if unseen:
+                seen = set(await in_mempool(full_node_client, [confirmation.bundle.name for confirmation in unseen]))
+                for confirmation in unseen:
+                    if confirmation.bundle.name in seen:
+                        bundle = confirmation.bundle
+                        confirmation.mempool_seconds = time.time() - bundle.pushed_at
+                        log(f"{bundle.name.hex()} in the mempool after {confirmation.mempool_seconds:.1f} s")
+
+            coin_ids = {coin_id for c in pending for coin_id in c.bundle.removals + c.bundle.additions}
+            records = {
+                bytes(record.coin.name()): record
+                for record in await full_node_client.get_coin_records_by_names(
+                    [bytes32(coin_id) for coin_id in coin_ids], include_spent_coins=True
+                )
+            }
+            for confirmation in list(pending):
+                confirmation.polls += 1
+                bundle = confirmation.bundle
+                spent = [records[coin_id] for coin_id in bundle.removals if coin_id in records]
+                if len(spent) < len(bundle.removals) or any(record.spent_block_index == 0 for record in spent):
+                    continue
+                pending.remove(confirmation)
+                if not all(coin_id in records for coin_id in bundle.additions):
+                    confirmation.status = "conflict"
+                    log(f"{bundle.name.hex()} lost its coins to another spend bundle")
+                    continue
+                created = [records[coin_id] for coin_id in bundle.additions]
+                confirmation.status = "confirmed"
+                confirmation.height = max(record.spent_block_index for record in spent)
+                timestamp = max((record.timestamp for record in created), default=time.time())
+                confirmation.confirmation_seconds = max(timestamp - bundle.pushed_at, 0.0)
+                log(
+                    f"{bundle.name.hex()} confirmed at height {confirmation.height} "
+                    f"{confirmation.confirmation_seconds:.1f} s after the push"
+                )
+
+            if not pending:
+                break
+            if time.monotonic() >= deadline:
+                for confirmation in pending:
+                    confirmation.status = "timeout"
+                log(f"Gave up waiting for {len(pending)} spend bundle{'s' if len(pending) != 1 else ''}")
+                break
+            await asyncio.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+    return confirmations
+
+
+@dataclass
+class Histogram:
+    bounds: List[float] = field(default_factory=lambda: list(BUCKETS))
+    counts: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    total: float = 0.0
+    maximum: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, q: float) -> float:
+        # The upper bound of the bucket holding the quantile, so it never understates the latency
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.maximum
+        return 0.0
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {"bounds": self.bounds, "counts": self.counts, "total": self.total, "max": self.maximum}
+
+    @classmethod
+    def from_json_dict(cls, value: Dict[str, Any]) -> Histogram:
+        return cls(list(value["bounds"]), list(value["counts"]), value["total"], value["max"])
+
+
+def load_histograms(path: str = DEFAULT_HISTOGRAM) -> Dict[str, Dict[str, Histogram]]:
+    """The latency histograms by kind ("mempool" and "confirmation" for every puzzle or command)."""
+    try:
+        with open(path) as filehandle:
+            stored = json.load(filehandle)
+    except FileNotFoundError:
+        return {}
+    return {
+        kind: {stage: Histogram.from_json_dict(histogram) for stage, histogram in stages.items()}
+        for kind, stages in stored.items()
+    }
+
+
+def record_latencies(confirmations: Sequence[Confirmation], path: str = DEFAULT_HISTOGRAM) -> None:
+    histograms = load_histograms(path)
+    for confirmation in confirmations:
+        stages = histograms.setdefault(confirmation.bundle.kind, {})
+        if confirmation.mempool_seconds is not None:
+            stages.setdefault("mempool", Histogram()).add(confirmation.mempool_seconds)
+        if confirmation.confirmation_seconds is not None:
+            stages.setdefault("confirmation", Histogram()).add(confirmation.confirmation_seconds)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as filehandle:
+        json.dump(
+            {
+                kind: {stage: histogram.to_json_dict() for stage, histogram in stages.items()}
+                for kind, stages in histograms.items()
+            },
+            filehandle,
+            sort_keys=True,
+            indent=4,
+        )
+
+
+async def wait_for_confirmations(
+    bundles: Sequence[PushedBundle],
+    log: Log,
+    timeout: float = DEFAULT_TIMEOUT,
+    histogram: Optional[str] = DEFAULT_HISTOGRAM,
+) -> List[Confirmation]:
+    from workshop.rpc import full_node_client_session
+
+    async with full_node_client_session() as full_node_client:
+        confirmations = await track(full_node_client, bundles, log, timeout)
+    if histogram is not None:
+        record_latencies(confirmations, histogram)
+    return confirmations
+
+
+def format_histograms(histograms: Dict[str, Dict[str, Histogram]]) -> List[str]:
+    lines = []
+    for kind in sorted(histograms):
+        lines.append(kind)
+        for stage in ("mempool", "confirmation"):
+            histogram = histograms[kind].get(stage)
+            if histogram is None or not histogram.count:
+                continue
+            lines.append(
+                f"  {stage:<13} {histogram.count:5} runs  mean {histogram.total / histogram.count:7.1f} s  "
+                f"p50 <= {histogram.quantile(0.5):g} s  p90 <= {histogram.quantile(0.9):g} s  "
+                f"max {histogram.maximum:.1f} s"
+            )
+            widest = max(histogram.counts)
+            labels = [f"<= {bound:g} s" for bound in histogram.bounds] + [f"> {histogram.bounds[-1]:g} s"]
+            for label, count in zip(labels, histogram.counts):
+                if count:
+                    lines.append(f"    {label:>10} {count:5} {'#' * max(1, round(count / widest * 40))}")
+    return lines
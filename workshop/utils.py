@@ -1,12 +1,165 @@
+from __future__ import annotations
+
+import hashlib
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from clvm_tools_rs import compile_clvm
 
+from workshop import trace
+
+if TYPE_CHECKING:
+    from chia.types.blockchain_format.program import Program
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+CACHE_DIR = ".chiwo/build-cache"
+
+INCLUDE_PATTERN = re.compile(rb"\(\s*include\s+([^\s()]+)\s*\)")
+
+
+@lru_cache(maxsize=1)
+def compiler_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("clvm_tools_rs")
+    except Exception:
+        return "unknown"
+
+
+def resolve_include(name: str, search_paths: List[Path]) -> Optional[Path]:
+    for search_path in search_paths:
+        candidate = search_path.joinpath(name)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+class DependencyGraph:
+    """
+    Maps every puzzle to the `.clib` files it pulls in via `(include ...)`, following includes of includes.
+    Each file is read and hashed only once, no matter how many puzzles include it.
+    """
+
+    def __init__(self, search_paths: List[Path]):
+        self.search_paths = search_paths
+        self._includes: Dict[Path, Dict[str, Path]] = {}
+        self._digests: Dict[Path, bytes] = {}
+
+    def _direct_includes(self, filename: Path) -> Dict[str, Path]:
+        if filename not in self._includes:
+            source = filename.read_bytes()
+            self._digests[filename] = hashlib.sha256(source).digest()
+            includes: Dict[str, Path] = {}
+            for match in INCLUDE_PATTERN.finditer(source):
+                name = match.group(1).decode().strip("\"'")
+                resolved = resolve_include(name, self.search_paths)
+                # Unresolved includes are left for the compiler to report
+                if resolved is not None:
+                    includes[name] = resolved
+            self._includes[filename] = includes
+        return self._includes[filename]
+
+    def forget(self, paths: Iterable[Path]) -> None:
+        """Drops what was read from changed files, so the next closure or build key reads them again."""
+        changed = set(paths)
+        if not changed.issubset(self._includes):
+            # A file read for the first time may resolve an include that failed before, so start over
+            self._includes.clear()
+            self._digests.clear()
+            return
+        for filename, includes in list(self._includes.items()):
+            # Files that include a changed file are read again too, in case it was deleted
+            if filename in changed or changed.intersection(includes.values()):
+                del self._includes[filename]
+                self._digests.pop(filename, None)
+
+    def closure(self, filename: Path) -> Dict[str, Path]:
+        closure: Dict[str, Path] = {}
+        pending = [filename]
+        while pending:
+            for name, path in self._direct_includes(pending.pop()).items():
+                if name not in closure:
+                    closure[name] = path
+                    pending.append(path)
+        return closure
+
+    def build_key(self, filename: Path) -> str:
+        # The key covers everything the compiled output depends on: source, resolved includes and compiler
+        digest = hashlib.sha256()
+        digest.update(compiler_version().encode())
+        closure = self.closure(filename)
+        digest.update(b"\0" + self._digests[filename])
+        for name, path in sorted(closure.items()):
+            digest.update(b"\0" + name.encode() + b"\0" + self._digests[path])
+        return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    filename: Path
+    key: str
+    success: bool
+    cached: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+def write_atomically(path: Path, content: bytes) -> None:
+    # Write to a temporary file first so concurrent builds never see a partial cache entry
+    tmp_file_name = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    tmp_file_name.write_bytes(content)
+    os.replace(tmp_file_name, path)
+
+
+def compile_file(filename: Path, include_path: Path, cached_hex_file_name: Path) -> BuildResult:
+    # Runs in a worker process for parallel builds, so it must not rely on any state from the parent
+    start = time.perf_counter()
+    full_hex_file_name = Path(filename.parent).joinpath(filename.name + ".hex")
+    # The compiler skips files whose output is newer than the source, even if an include changed since,
+    # so it always writes to a fresh path
+    compiled_hex_file_name = cached_hex_file_name.with_suffix(f".{os.getpid()}.compile.hex")
+    try:
+        cached_hex_file_name.parent.mkdir(parents=True, exist_ok=True)
+        compiled_hex_file_name.unlink(missing_ok=True)
+        compile_clvm(str(filename), str(compiled_hex_file_name), search_paths=[os.fspath(include_path)])
+        compiled_hex = compiled_hex_file_name.read_bytes()
+        # The serialized program goes in first, so a cache hit on the `.hex` always finds its `.bin`
+        write_atomically(cached_hex_file_name.with_suffix(".bin"), bytes.fromhex(compiled_hex.decode().strip()))
+        os.replace(compiled_hex_file_name, cached_hex_file_name)
+        write_atomically(full_hex_file_name, compiled_hex)
+        return BuildResult(filename, cached_hex_file_name.stem, True, False, time.perf_counter() - start)
+    except Exception as e:
+        compiled_hex_file_name.unlink(missing_ok=True)
+        return BuildResult(filename, cached_hex_file_name.stem, False, False, time.perf_counter() - start, str(e))
+
+
+def restore_from_cache(filename: Path, cached_hex_file_name: Path) -> BuildResult:
+    start = time.perf_counter()
+    full_hex_file_name = Path(filename.parent).joinpath(filename.name + ".hex")
+    cached_hex = cached_hex_file_name.read_bytes()
+    if not (full_hex_file_name.exists() and full_hex_file_name.read_bytes() == cached_hex):
+        full_hex_file_name.write_bytes(cached_hex)
+    if not cached_hex_file_name.with_suffix(".bin").exists():
+        # Cache entries written before the binary store only have the `.hex`
+        write_atomically(cached_hex_file_name.with_suffix(".bin"), bytes.fromhex(cached_hex.decode().strip()))
+    return BuildResult(filename, cached_hex_file_name.stem, True, True, time.perf_counter() - start)
+
+
+def find_sources(file: str, project_path: Path) -> List[Path]:
+    # A plain path is resolved directly, only patterns walk the whole tree (including any virtualenv in it)
+    direct_path = Path(project_path).joinpath(file)
+    if direct_path.is_file():
+        return [direct_path]
+    if direct_path.is_dir():
+        return sorted(direct_path.rglob("*.cl[vs][mp]"))
 
-def build(file: str) -> bool:
-    project_path = Path.cwd()
-    include_path = project_path.joinpath("clsp/include")
     clvm_files = []
     for path in Path(project_path).rglob(file):
         if path.is_dir():
@@ -14,20 +167,141 @@ def build(file: str) -> bool:
                 clvm_files.append(clvm_path)
         else:
             clvm_files.append(path)
+    return sorted(set(clvm_files))
+
+
+def build_all(file: str, jobs: Optional[int] = None, verbose: bool = False) -> List[BuildResult]:
+    with trace.span("build", "build", file=file):
+        return build_sources(find_sources(file, Path.cwd()), jobs, verbose)
+
+
+def build_sources(
+    sources: List[Path], jobs: Optional[int] = None, verbose: bool = False, graph: Optional[DependencyGraph] = None
+) -> List[BuildResult]:
+    """Builds the given puzzles. Pass a `graph` to reuse the includes it already read."""
+    results = _build_sources(sources, jobs, verbose, graph)
+    for result in results:
+        # Compilation may have happened in a worker process, so the spans are recorded from the results
+        trace.complete("restore" if result.cached else "compile", "build", result.seconds, file=str(result.filename))
+    return results
+
+
+def _build_sources(
+    sources: List[Path], jobs: Optional[int], verbose: bool, graph: Optional[DependencyGraph]
+) -> List[BuildResult]:
+    project_path = Path.cwd()
+    include_path = project_path.joinpath("clsp/include")
+    cache_path = project_path.joinpath(CACHE_DIR)
+    if graph is None:
+        graph = DependencyGraph([include_path])
+
+    results: List[BuildResult] = []
+    stale: List[Tuple[Path, Path]] = []
+    for filename in sources:
+        cached_hex_file_name = cache_path.joinpath(graph.build_key(filename) + ".hex")
+        # We only rebuild the file if neither the source nor any of its includes changed
+        if cached_hex_file_name.exists():
+            results.append(restore_from_cache(filename, cached_hex_file_name))
+        else:
+            stale.append((filename, cached_hex_file_name))
+
+    if len(stale) == 1:
+        filename, cached_hex_file_name = stale[0]
+        print("Beginning compilation of " + filename.name + "...")
+        result = compile_file(filename, include_path, cached_hex_file_name)
+        if result.success:
+            print(f"...Compilation finished in {result.seconds * 1000:.1f} ms")
+        results.append(result)
+    elif stale:
+        # Puzzles never depend on each other's output, only on shared `.clib` sources,
+        # so every stale puzzle can be compiled independently
+        with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(stale))) as executor:
+            futures = [executor.submit(compile_file, f, include_path, c) for f, c in stale]
+            for future in futures:
+                result = future.result()
+                if result.success:
+                    print(f"Compiled {result.filename.relative_to(project_path)} in {result.seconds * 1000:.1f} ms")
+                results.append(result)
+
+    for result in results:
+        if not result.success:
+            print("Couldn't build " + result.filename.name + ": " + str(result.error))
+        elif verbose and result.cached:
+            print(f"Up to date {result.filename.relative_to(project_path)} ({result.seconds * 1000:.1f} ms)")
+    return results
+
+
+def build(file: str, jobs: Optional[int] = None) -> bool:
+    results = build_all(file, jobs)
+    return len(results) > 0 and all(result.success for result in results)
+
+
+# Compiled programs and their tree hashes stay in memory for the lifetime of the process. Programs are shared by
+# the hash of their serialized bytes, and build keys map to those content hashes, so long-running processes only
+# deserialize and hash a puzzle again after its compiled output changed.
+_content_hashes: Dict[str, bytes] = {}
+_programs: Dict[bytes, Program] = {}
+_tree_hashes: Dict[bytes, bytes32] = {}
+
+
+def load_serialized_program(path: Path) -> Tuple[bytes, Program]:
+    """Loads a program from a file of serialized CLVM bytes. Returns the content hash and the program."""
+    import mmap
+
+    from chia.types.blockchain_format.program import Program
+
+    with open(path, "rb") as filehandle:
+        with mmap.mmap(filehandle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            content_hash = hashlib.sha256(mapped).digest()
+            if content_hash not in _programs:
+                with trace.span("parse_program", "build", file=str(path), bytes=len(mapped)):
+                    # The CLVM parser needs a `bytes` object, this is the only copy of the file contents
+                    _programs[content_hash] = Program.from_bytes(mapped[:])
+    return content_hash, _programs[content_hash]
+
+
+def _load_program(file: str) -> Tuple[Optional[bytes], Optional[Program]]:
+    from cdv.cmds.util import parse_program
+
+    if file.endswith(".hex"):
+        with trace.span("parse_program", "build", file=file):
+            return None, parse_program(file, "clsp/include")
+
+    results = build_all(file)
+    if len(results) == 0 or not all(result.success for result in results):
+        return None, None
+    if len(results) > 1:
+        with trace.span("parse_program", "build", file=file):
+            return None, parse_program(file + ".hex", "clsp/include")
+
+    return load_built_program(results[0].key)
+
+
+def load_built_program(key: str) -> Tuple[bytes, Program]:
+    """The program compiled under a build key. Returns the content hash and the program."""
+    if key not in _content_hashes:
+        serialized_file_name = Path.cwd().joinpath(CACHE_DIR, key + ".bin")
+        _content_hashes[key], _ = load_serialized_program(serialized_file_name)
+    content_hash = _content_hashes[key]
+    return content_hash, _programs[content_hash]
+
+
+def program_tree_hash(content_hash: bytes, program: Program) -> bytes32:
+    if content_hash not in _tree_hashes:
+        with trace.span("tree_hash", "clvm"):
+            _tree_hashes[content_hash] = program.get_tree_hash()
+    return _tree_hashes[content_hash]
+
+
+def load_program(file: str) -> Optional[Program]:
+    return _load_program(file)[1]
+
 
-    for filename in clvm_files:
-        hex_file_name: str = filename.name + ".hex"
-        full_hex_file_name = Path(filename.parent).joinpath(hex_file_name)
-        # We only rebuild the file if the .hex is older
-        if not (full_hex_file_name.exists() and full_hex_file_name.stat().st_mtime > filename.stat().st_mtime):
-            outfile = str(filename) + ".hex"
-            try:
-                print("Beginning compilation of " + filename.name + "...")
-                compile_clvm(str(filename), outfile, search_paths=[os.fspath(include_path)])
-                print("...Compilation finished")
-                return True
-            except Exception as e:
-                print("Couldn't build " + filename.name + ": " + str(e))
-                return False
-
-        return True
+def load_program_hash(file: str) -> Optional[bytes32]:
+    content_hash, program = _load_program(file)
+    if program is None:
+        return None
+    if content_hash is None:
+        with trace.span("tree_hash", "clvm", file=file):
+            return program.get_tree_hash()
+    return program_tree_hash(content_hash, program)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from workshop.bench import DEFAULT_CORPUS, CaseResult, condition_name, run_case
+from workshop.utils import DependencyGraph, build_sources, find_sources, load_built_program, program_tree_hash
+
+if TYPE_CHECKING:
+    from chia.types.blockchain_format.program import Program
+    from chia.types.blockchain_format.sized_bytes import bytes32
+
+    from workshop.cost import SpendCost
+    from workshop.operations import Log
+
+# `chiwo watch` rebuilds puzzles as their sources change, in one long-running process. The dependency graph, the
+# compiled programs and their tree hashes stay in memory between changes, so an edit only recompiles the puzzles
+# that include the changed file and reruns their cases of the bench corpus, printing what changed since the last
+# run. Changes come from watchdog's filesystem notifications if it is installed (`pip install watchdog`), otherwise
+# the watched directories are polled.
+
+SOURCE_SUFFIXES = (".clsp", ".clvm", ".clib")
+DEFAULT_INTERVAL = 0.2
+# Editors often write a file in several steps, so changes are collected for a moment before rebuilding
+SETTLE_SECONDS = 0.05
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def scan(directories: List[Path], files: List[Path]) -> Snapshot:
+    snapshot: Snapshot = {}
+    for directory in directories:
+        for root, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(SOURCE_SUFFIXES):
+                    path = Path(root, filename)
+                    stat = path.stat()
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    for path in files:
+        if path.is_file():
+            stat = path.stat()
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def poll_changes(directories: List[Path], files: List[Path], interval: float) -> Iterator[Set[Path]]:
+    previous = scan(directories, files)
+    while True:
+        time.sleep(interval)
+        current = scan(directories, files)
+        changed = {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}
+        previous = current
+        if changed:
+            yield changed
+
+
+def notified_changes(directories: List[Path], files: List[Path]) -> Iterator[Set[Path]]:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    pending: Set[Path] = set()
+    lock = threading.Lock()
+    ready = threading.Event()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event: FileSystemEvent) -> None:
+            # Saving via a temporary file shows up as a move onto the source
+            paths = [event.src_path, getattr(event, "dest_path", "")]
+            relevant = [
+                Path(os.path.abspath(path))
+                for path in paths
+                if path and (path.endswith(SOURCE_SUFFIXES) or Path(os.path.abspath(path)) in files)
+            ]
+            if relevant:
+                with lock:
+                    pending.update(relevant)
+                ready.set()
+
+    observer = Observer()
+    for directory in directories:
+        observer.schedule(Handler(), os.fspath(directory), recursive=True)
+    for parent in {path.parent for path in files if not any(d in path.parents for d in directories)}:
+        observer.schedule(Handler(), os.fspath(parent), recursive=False)
+    observer.start()
+    try:
+        while True:
+            ready.wait()
+            time.sleep(SETTLE_SECONDS)
+            with lock:
+                ready.clear()
+                changed = set(pending)
+                pending.clear()
+            yield changed
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def changes(directories: List[Path], files: List[Path], interval: float = DEFAULT_INTERVAL) -> Iterator[Set[Path]]:
+    """Yields the set of changed source files (and `files`) whenever something changed."""
+    from importlib.util import find_spec
+
+    if find_spec("watchdog") is None:
+        return poll_changes(directories, files, interval)
+    return notified_changes(directories, files)
+
+
+def describe_conditions(cost: SpendCost) -> List[str]:
+    return [
+        " ".join([condition_name(condition)] + ["0x" + bytes(var).hex() for var in condition.vars])
+        for condition in cost.conditions
+    ]
+
+
+def report(key: str, result: CaseResult, previous: Optional[CaseResult], log: Log) -> None:
+    cost = result.cost
+    if cost is None:
+        if previous is None or previous.error != result.error:
+            log(f"{key}: failed: {result.error}")
+        return
+    if previous is None or previous.cost is None:
+        log(
+            f"{key}: cost {cost.total} (clvm {cost.clvm_cost}, conditions {cost.condition_cost}, "
+            f"bytes {cost.byte_cost})"
+        )
+        for line in describe_conditions(cost):
+            log(f"      {line}")
+        return
+
+    before = previous.cost
+    conditions = [
+        line
+        for line in difflib.ndiff(describe_conditions(before), describe_conditions(cost))
+        if line.startswith(("- ", "+ "))
+    ]
+    if before.total == cost.total and not conditions:
+        return
+    parts = [
+        f"{name} {old} -> {new}"
+        for name, old, new in (
+            ("clvm", before.clvm_cost, cost.clvm_cost),
+            ("conditions", before.condition_cost, cost.condition_cost),
+            ("bytes", before.byte_cost, cost.byte_cost),
+        )
+        if old != new
+    ]
+    log(
+        f"{key}: cost {before.total} -> {cost.total} ({cost.total - before.total:+d})"
+        + (f" ({', '.join(parts)})" if parts else "")
+    )
+    for line in conditions:
+        log(f"    {line}")
+
+
+class WatchSession:
+    def __init__(self, directory: str, log: Log, corpus: str = DEFAULT_CORPUS, runs: int = 1):
+        self.project_path = Path.cwd()
+        self.directory = self.project_path.joinpath(directory)
+        self.include_path = self.project_path.joinpath("clsp/include")
+        self.corpus = self.project_path.joinpath(corpus)
+        self.log = log
+        self.runs = runs
+        self.graph = DependencyGraph([self.include_path])
+        self.cases: Dict[Path, List[Dict[str, Any]]] = {}
+        self.programs: Dict[Path, Tuple[Program, bytes32]] = {}
+        self.results: Dict[str, CaseResult] = {}
+
+    def load_corpus(self) -> None:
+        self.cases = {}
+        if not self.corpus.is_file():
+            return
+        try:
+            with open(self.corpus) as filehandle:
+                cases_by_puzzle: Dict[str, List[Dict[str, Any]]] = json.load(filehandle)
+        except ValueError as e:
+            self.log(f"Couldn't read {self.corpus.relative_to(self.project_path)}: {e}")
+            return
+        for file, cases in cases_by_puzzle.items():
+            self.cases[self.project_path.joinpath(file)] = cases
+
+    def affected(self, changed: Set[Path]) -> List[Path]:
+        self.graph.forget(path for path in changed if path.suffix in SOURCE_SUFFIXES)
+        return [
+            puzzle
+            for puzzle in find_sources(os.fspath(self.directory), self.project_path)
+            if puzzle in changed or changed.intersection(self.graph.closure(puzzle).values())
+        ]
+
+    def rebuild(self, puzzles: List[Path]) -> None:
+        for result in build_sources(puzzles, graph=self.graph):
+            if not result.success:
+                self.programs.pop(result.filename, None)
+                continue
+            content_hash, program = load_built_program(result.key)
+            self.programs[result.filename] = (program, program_tree_hash(content_hash, program))
+
+    def run_cases(self, puzzles: List[Path]) -> int:
+        count = 0
+        for puzzle in puzzles:
+            relative = puzzle.relative_to(self.project_path).as_posix()
+            for case in self.cases.get(puzzle, []):
+                key = f"{relative}:{case['name']}"
+                if puzzle in self.programs:
+                    program, puzzle_hash = self.programs[puzzle]
+                    result = run_case(program, case, self.runs, puzzle_hash)
+                else:
+                    result = CaseResult(case["name"], error=f"Couldn't build {relative}")
+                report(key, result, self.results.get(key), self.log)
+                self.results[key] = result
+                count += 1
+        return count
+
+    def update(self, changed: Optional[Set[Path]] = None) -> None:
+        start = time.perf_counter()
+        if changed is None or self.corpus in changed:
+            self.load_corpus()
+        if changed is None:
+            puzzles = find_sources(os.fspath(self.directory), self.project_path)
+        else:
+            puzzles = self.affected(changed)
+        self.rebuild(puzzles)
+        built = time.perf_counter()
+        if changed is not None and self.corpus in changed:
+            # Cases that changed are run again even if their puzzles didn't
+            puzzles = sorted(set(puzzles) | (self.cases.keys() & self.programs.keys()))
+        if not puzzles:
+            return
+        cases = self.run_cases(puzzles)
+        self.log(
+            f"Rebuilt {len(puzzles)} puzzle{'s' if len(puzzles) != 1 else ''} in {(built - start) * 1000:.1f} ms, "
+            f"ran {cases} case{'s' if cases != 1 else ''} in {(time.perf_counter() - built) * 1000:.1f} ms"
+        )
+
+
+def watch(directory: str, log: Log, corpus: str = DEFAULT_CORPUS, interval: float = DEFAULT_INTERVAL) -> None:
+    session = WatchSession(directory, log, corpus)
+    session.update()
+    directories = [session.directory]
+    if session.directory not in session.include_path.parents:
+        directories.append(session.include_path)
+    log(f"Watching {directory} for changes...")
+    for changed in changes(directories, [session.corpus], interval):
+        session.update(changed)